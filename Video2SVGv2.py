@@ -2,19 +2,25 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
 from PIL import Image, ImageTk
 import cv2
-import numpy as np
 import os
 import threading
-import subprocess
-import re
 import io
 import datetime
 
+from video2svg.edges import EDGE_CANNY, EDGE_DETECTORS
+from video2svg.engine import format_timecode, parse_timecode, run_conversion
+from video2svg.framecache import CachedFrameSource
+from video2svg.metrics import RunMetrics
+from video2svg.outputs import FORMAT_SVG, OUTPUT_FORMATS
+from video2svg.preview import OUTPUT_PREVIEW_SIZE, LatestWinsWorker, PreviewRenderer
+from video2svg.settings import SCALE_MODES, ConversionSettings, parse_output_size
+from video2svg.tracing import TRACER_CHOICES, TRACER_INPROCESS, TRACER_POTRACE, is_potrace_installed
+
 # this script was created by ProjectileObjects. It is designed to help convert video files into .SVG sequences for the use of RGB laser projectors (such as the LaserCube, Pangolin, and others).
 # --- Constants ---
 PREVIEW_WIDTH = 640
 PREVIEW_HEIGHT = 480
-OUTPUT_PREVIEW_SIZE = 210 # For the 1:1 aspect ratio preview
+OUTPUT_SIZES = ("256x256", "512x512", "768x768", "1024x1024", "Native")
 
 class InfoWindow(tk.Toplevel):
     """A simple popup window to display help text."""
@@ -50,15 +56,16 @@ class VideoToSVGConverter:
         # --- State Variables ---
         self.video_path = None
         self.output_path = None
-        self.capture = None
+        self.frame_source = None # Cached, prefetching frame reader for the preview
+        self.preview_renderer = PreviewRenderer() # Only used on the preview worker thread
         self.total_frames = 0
         self.fps = 30 # Default FPS
         self.in_frame = 0
         self.out_frame = -1
-        self.is_potrace_installed = self.check_potrace()
+        self.is_potrace_installed = is_potrace_installed()
         self.preview_update_job = None
-        self.preview_thread = None
-        self.preview_image_size = (0, 0) # Store actual size of image in preview
+        self.preview_worker = LatestWinsWorker(self._process_frame_for_preview) # Persistent, latest request wins
+        self.preview_transform = None # Source frame -> preview canvas image, from the last rendered preview
         self.preview_image_offset = (0, 0) # Store offset of image in preview
 
         # --- New Feature State Variables ---
@@ -80,21 +87,27 @@ class VideoToSVGConverter:
         self.optimization_level = tk.DoubleVar(value=0.2)
         self.speckle_removal = tk.IntVar(value=2)
         self.corner_smoothing = tk.DoubleVar(value=1.0)
+        self.point_budget = tk.IntVar(value=0) # Max points per exported frame; 0 = off
+        self.is_compact_svg = tk.BooleanVar(value=False)
+        self.is_optimize_paths = tk.BooleanVar(value=False) # Minimize blanked travel between paths
+        self.is_temporal = tk.BooleanVar(value=False) # Keep path order stable across frames
+        self.frame_step = tk.IntVar(value=1) # Export every Nth frame
+        self.jobs = tk.IntVar(value=max(1, (os.cpu_count() or 2) - 1)) # Conversion worker processes
+        self.is_incremental = tk.BooleanVar(value=False)
+        self.is_dedup = tk.BooleanVar(value=False)
+        self.dedup_tolerance = tk.IntVar(value=0) # Differing edge pixels still counted as a duplicate
+        self.output_size = tk.StringVar(value="512x512") # Export raster, one of OUTPUT_SIZES
+        self.output_format = tk.StringVar(value=FORMAT_SVG)
+        self.working_resolution = tk.IntVar(value=1024) # Long side frames are downscaled to before edge detection; 0 = native
+        self.tracer_backend = tk.StringVar(value=TRACER_POTRACE if self.is_potrace_installed else TRACER_INPROCESS)
+        self.edge_detector = tk.StringVar(value=EDGE_CANNY) # One of EDGE_DETECTORS
 
         # --- UI Setup ---
         self.create_styles()
         self.create_widgets()
         
         if not self.is_potrace_installed:
-            messagebox.showerror("Dependency Missing","'potrace' not found. Please install it using Homebrew:\n'brew install potrace'")
-            self.start_button.config(state=tk.DISABLED)
-
-    def check_potrace(self):
-        try:
-            subprocess.run(['potrace', '--version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+            messagebox.showwarning("Dependency Missing","'potrace' not found. Using the built-in in-process tracer instead.\nFor the best curves, install potrace using Homebrew:\n'brew install potrace'")
 
     def create_styles(self):
         style = ttk.Style()
@@ -119,6 +132,8 @@ class VideoToSVGConverter:
         left_frame.columnconfigure(0, weight=1)
         
         ttk.Label(left_frame, text="Input Window", font=("Helvetica", 10, "italic")).grid(row=0, column=0, sticky='w', padx=5)
+        self.preview_timing_label = ttk.Label(left_frame, text="", font=("Courier", 8), foreground="gray")
+        self.preview_timing_label.grid(row=0, column=0, sticky='e', padx=5)
 
         self.preview_canvas = tk.Canvas(left_frame, width=PREVIEW_WIDTH, height=PREVIEW_HEIGHT, bg="black", highlightthickness=0)
         self.preview_canvas.grid(row=1, column=0, sticky="nsew")
@@ -179,7 +194,7 @@ class VideoToSVGConverter:
         ttk.Checkbutton(crop_row, text="Crop", variable=self.is_crop_enabled, command=self.toggle_framing_mode).grid(row=0, column=0, padx=5)
         ttk.Button(crop_row, text="Clear Crop", command=self.clear_crop).grid(row=0, column=1)
         ttk.Checkbutton(crop_row, text="1:1", variable=self.is_1_to_1_aspect, command=self.schedule_preview_update).grid(row=0, column=2, padx=5)
-        self.scale_mode_combo = ttk.Combobox(crop_row, textvariable=self.scale_mode, values=["Fit", "Fill", "Stretch"], width=8, state="readonly")
+        self.scale_mode_combo = ttk.Combobox(crop_row, textvariable=self.scale_mode, values=list(SCALE_MODES), width=8, state="readonly")
         self.scale_mode_combo.grid(row=0, column=3, padx=5)
         self.scale_mode_combo.bind("<<ComboboxSelected>>", self.schedule_preview_update)
 
@@ -193,6 +208,12 @@ class VideoToSVGConverter:
         self._create_labeled_slider(controls_lf, 6, "Pre-Blur:", 0, 25, self.pre_blur)
         self._create_labeled_slider(controls_lf, 7, "Threshold 1:", 0, 255, self.threshold1_slider_var)
         self._create_labeled_slider(controls_lf, 8, "Threshold 2:", 0, 255, self.threshold2_slider_var)
+        detector_row = self._create_row(controls_lf, 9)
+        ttk.Label(detector_row, text="Edge Detector:").grid(row=0, column=0, padx=5)
+        detector_combo = ttk.Combobox(detector_row, textvariable=self.edge_detector, values=list(EDGE_DETECTORS), width=12, state="readonly")
+        detector_combo.grid(row=0, column=1, padx=5)
+        detector_combo.bind("<<ComboboxSelected>>", self.schedule_preview_update)
+        ttk.Button(detector_row, text="?", style="Help.TButton", width=2, command=lambda: InfoWindow(self.root, "Edge Detector", "canny: Canny with the two thresholds above. canny-median / canny-otsu: Canny with thresholds picked for each frame from its gradients, so fades, grain and exposure changes keep a steady amount of detail; at the default 50 / 150 the picked thresholds are used as they are, higher or lower sliders scale them. sobel / scharr: a cheaper gradient threshold at Threshold 2, with thicker lines. adaptive: traces dark lines against their surroundings, for drawings and cartoons.")).grid(row=0, column=2)
         
         # Laser Optimization
         style_lf = self._create_control_group(right_frame, "4. Laser Optimization", 3)
@@ -202,11 +223,22 @@ class VideoToSVGConverter:
         ttk.Button(color_row, text="Stroke Color", command=self.choose_stroke_color).grid(row=0, column=0, padx=5)
         self.color_swatch_label = tk.Label(color_row, text="  ", bg=self.stroke_color.get(), relief='sunken')
         self.color_swatch_label.grid(row=0, column=1, padx=5)
-        ttk.Checkbutton(color_row, text="Multi-Pass (Centerline)", variable=self.is_multipass).grid(row=0, column=2, padx=5)
+        ttk.Checkbutton(color_row, text="Multi-Pass (Centerline)", variable=self.is_multipass, command=self.schedule_preview_update).grid(row=0, column=2, padx=5)
+        ttk.Checkbutton(color_row, text="Compact SVG", variable=self.is_compact_svg).grid(row=0, column=3, padx=5)
+        ttk.Checkbutton(color_row, text="Optimize Path Order", variable=self.is_optimize_paths).grid(row=0, column=4, padx=5)
+        ttk.Checkbutton(color_row, text="Temporal Coherence", variable=self.is_temporal).grid(row=0, column=5, padx=5)
 
         self._create_labeled_slider(style_lf, 2, "Speckle Removal:", 0, 50, self.speckle_removal, help_text="Removes small, noisy pixel groups before vectorization. Higher values remove larger noise but can erase detail. A value of 2-5 is a good starting point.")
         self._create_labeled_slider(style_lf, 3, "Curve Smoothing:", 0.0, 5.0, self.optimization_level, help_text="Controls how closely the vector path follows the pixel outline. Higher values create simpler, smoother (but less accurate) curves.")
         self._create_labeled_slider(style_lf, 4, "Corner Smoothing:", 0.0, 1.334, self.corner_smoothing, help_text="Controls the sharpness of corners. Higher values produce more rounded, fluid corners, which is ideal for reducing laser burns and mechanical stress.")
+
+        self._create_labeled_slider(style_lf, 5, "Point Budget:", 0, 5000, self.point_budget, help_text="Maximum points per frame your projector can draw without flicker. Frames over the budget are exported with more speckle removal, smoother curves and, if needed, higher edge thresholds until a fast estimate fits. 0 turns it off. Final counts are written to video2svg_points.csv in the output folder.")
+
+        tracer_row = self._create_row(style_lf, 6)
+        ttk.Label(tracer_row, text="Tracer:").grid(row=0, column=0, padx=5)
+        tracer_combo = ttk.Combobox(tracer_row, textvariable=self.tracer_backend, values=list(TRACER_CHOICES) if self.is_potrace_installed else [TRACER_INPROCESS], width=10, state="readonly")
+        tracer_combo.grid(row=0, column=1, padx=5)
+        tracer_combo.bind("<<ComboboxSelected>>", self.schedule_preview_update)
         
         # Conversion
         conv_lf = self._create_control_group(right_frame, "5. Convert", 4)
@@ -214,8 +246,29 @@ class VideoToSVGConverter:
         self.point_estimate_label = ttk.Label(conv_lf, text="Point Estimate: ---", font=("Helvetica", 10, "italic"))
         self.point_estimate_label.grid(row=0, column=0, sticky="ew", pady=(0,5))
         
+        self._create_labeled_slider(conv_lf, 1, "Frame Step:", 1, 10, self.frame_step, help_text="Exports every Nth frame of the selected range. Skipped frames are not decoded, so higher values convert much faster at a lower output frame rate.")
+        self._create_labeled_slider(conv_lf, 2, "Worker Jobs:", 1, os.cpu_count() or 1, self.jobs, help_text="Number of frames converted in parallel. Each job runs edge detection and potrace in its own process; use one less than your CPU core count to keep the UI responsive.")
+
+        incremental_row = self._create_row(conv_lf, 3)
+        ttk.Checkbutton(incremental_row, text="Incremental (skip up-to-date frames)", variable=self.is_incremental).grid(row=0, column=0, padx=5)
+        ttk.Button(incremental_row, text="?", style="Help.TButton", width=2, command=lambda: InfoWindow(self.root, "Incremental", "Remembers what every SVG was traced from. Re-running the same range only re-traces frames whose edges or tracing settings changed; a stroke color change just restyles the existing files.")).grid(row=0, column=1)
+
+        dedup_row = self._create_row(conv_lf, 4)
+        ttk.Checkbutton(dedup_row, text="Skip Duplicate Frames", variable=self.is_dedup).grid(row=0, column=0, padx=5)
+        self._create_labeled_slider(conv_lf, 5, "Dup. Tolerance:", 0, 500, self.dedup_tolerance, help_text="When 'Skip Duplicate Frames' is on, a frame whose edges differ from the last traced frame by at most this many pixels reuses that frame's SVG (as a hard link) instead of being traced again. Great for held frames and static shots.")
+        size_row = self._create_row(conv_lf, 6)
+        ttk.Label(size_row, text="Output Size:").grid(row=0, column=0, padx=5, sticky='w')
+        size_combo = ttk.Combobox(size_row, textvariable=self.output_size, values=list(OUTPUT_SIZES), width=10, state="readonly")
+        size_combo.grid(row=0, column=1, padx=5)
+        size_combo.bind("<<ComboboxSelected>>", self.schedule_preview_update)
+        ttk.Button(size_row, text="?", style="Help.TButton", width=2, command=lambda: InfoWindow(self.root, "Output Size", "The raster every frame is scaled into (using the Fit / Fill / Stretch mode) before edge detection and tracing. A fixed size keeps tracing time and SVG point counts predictable whatever the source resolution. 'Native' traces the framed source, downscaled to the Working Res.")).grid(row=0, column=2)
+        ttk.Label(size_row, text="Format:").grid(row=0, column=3, padx=5, sticky='w')
+        ttk.Combobox(size_row, textvariable=self.output_format, values=list(OUTPUT_FORMATS), width=5, state="readonly").grid(row=0, column=4, padx=5)
+        ttk.Button(size_row, text="?", style="Help.TButton", width=2, command=lambda: InfoWindow(self.root, "Format", "svg: one SVG file per frame. zip: every SVG appended to a single archive as it is traced. ilda: every frame appended to a single .ild laser show file. The single-file formats import much faster into playback software.")).grid(row=0, column=5)
+        self._create_labeled_slider(conv_lf, 7, "Working Res.:", 0, 2048, self.working_resolution, help_text="With Output Size 'Native', frames are downscaled so their long side is at most this many pixels before the image adjustments, edge detection and tracing. 0 keeps the native resolution. The Pre-Blur radius is scaled to match.")
+
         self.start_button = ttk.Button(conv_lf, text="Start Conversion", command=self.start_conversion)
-        self.start_button.grid(row=1, column=0, sticky='ew', padx=5, pady=5)
+        self.start_button.grid(row=8, column=0, sticky='ew', padx=5, pady=5)
         
         self.progress_bar = ttk.Progressbar(right_frame, orient="horizontal", mode='determinate')
         self.progress_bar.grid(row=5, column=0, sticky="ew", pady=5)
@@ -282,50 +335,38 @@ class VideoToSVGConverter:
         self.preview_update_job = self.root.after(50, self.start_preview_generation_thread)
 
     def start_preview_generation_thread(self):
-        if self.preview_thread and self.preview_thread.is_alive(): return
-        if not self.capture or not self.capture.isOpened(): return
-        self.preview_thread = threading.Thread(target=self._process_frame_for_preview, daemon=True)
-        self.preview_thread.start()
-
-    def _process_frame_for_preview(self):
-        try:
-            frame_num = int(self.timeline_slider.get())
-            self.capture.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-            ret, frame = self.capture.read()
-            if not ret: return
-
-            processed_full = self.apply_image_adjustments(frame)
-            
-            preview_w = self.preview_canvas.winfo_width()
-            preview_h = self.preview_canvas.winfo_height()
-            if preview_w <= 1: preview_w = PREVIEW_WIDTH
-            if preview_h <= 1: preview_h = PREVIEW_HEIGHT
-            
-            h, w = processed_full.shape[:2]
-            scale = min(preview_w/w, preview_h/h) if h > 0 and w > 0 else 1
-            self.preview_image_size = (int(w*scale), int(h*scale))
-            self.preview_image_offset = ((preview_w - self.preview_image_size[0])//2, (preview_h - self.preview_image_size[1])//2)
-
-            resized = cv2.resize(processed_full, self.preview_image_size, interpolation=cv2.INTER_AREA) if h > 0 and w > 0 else processed_full
-            main_edges = cv2.Canny(resized, self.threshold1_slider_var.get(), self.threshold2_slider_var.get())
-            main_photo = self._get_photo_from_data(main_edges)
-            
-            output_edges = self._get_output_preview_edges(frame)
-            output_photo = self._get_photo_from_data(output_edges) if output_edges is not None else None
-
-            inverted_edges = cv2.bitwise_not(main_edges)
-            point_count = self._run_potrace_estimate(inverted_edges)
-
-            self.root.after(0, self._update_ui_from_thread, frame_num, main_photo, output_photo, point_count)
-        except Exception as e:
-            print(f"Error in preview thread: {e}")
+        if not self.frame_source or not self.frame_source.is_opened(): return
+        # Snapshot everything on the Tk thread; the worker never reads Tk variables.
+        canvas_size = (self.preview_canvas.winfo_width(), self.preview_canvas.winfo_height())
+        self.preview_worker.submit((int(self.timeline_slider.get()), self._get_settings(), canvas_size))
+
+    def _process_frame_for_preview(self, request, stages):
+        """Runs on the preview worker; `stages` times each step and aborts once a newer request arrives."""
+        frame_num, settings, (preview_w, preview_h) = request
+        with stages.stage("decode"):
+            frame = self.frame_source.get_frame(frame_num)
+            self.frame_source.prefetch_around(frame_num)
+        if frame is None: return
+
+        if preview_w <= 1: preview_w = PREVIEW_WIDTH
+        if preview_h <= 1: preview_h = PREVIEW_HEIGHT
+
+        main_edges, output_edges, point_count, transform = self.preview_renderer.render(frame, frame_num, settings, (preview_w, preview_h), stages, self.frame_source.cache)
+        preview_image_offset = ((preview_w - transform.size[0])//2, (preview_h - transform.size[1])//2)
+
+        stages.checkpoint()
+        main_photo = self._get_photo_from_data(main_edges)
+        output_photo = self._get_photo_from_data(output_edges) if output_edges is not None else None
+        self.root.after(0, self._update_ui_from_thread, frame_num, main_photo, output_photo, point_count, transform, preview_image_offset, stages.summary())
 
     def _get_photo_from_data(self, image_data):
         img_rgb = cv2.cvtColor(image_data, cv2.COLOR_GRAY2RGB) if len(image_data.shape) == 2 else image_data
         img_pil = Image.fromarray(img_rgb)
         return ImageTk.PhotoImage(image=img_pil)
 
-    def _update_ui_from_thread(self, frame_num, main_photo, output_photo, point_count):
+    def _update_ui_from_thread(self, frame_num, main_photo, output_photo, point_count, preview_transform, preview_image_offset, timing_summary):
+        self.preview_transform = preview_transform
+        self.preview_image_offset = preview_image_offset
         self.preview_canvas.create_image(self.preview_image_offset[0], self.preview_image_offset[1], anchor="nw", image=main_photo)
         self.preview_canvas.photo = main_photo
         if self.crop_rect_id: self.preview_canvas.tag_raise(self.crop_rect_id)
@@ -336,7 +377,9 @@ class VideoToSVGConverter:
         else:
              self.output_preview_canvas.delete("all")
 
-        self.point_estimate_label.config(text=f"Point Estimate: ~{point_count}")
+        budget = self.point_budget.get()
+        self.point_estimate_label.config(text=f"Point Estimate: ~{point_count}" + (f" (budget {budget})" if budget > 0 else ""))
+        self.preview_timing_label.config(text=timing_summary)
         self._update_timeline_indicator()
         self.current_time_label.config(text=self.format_time(frame_num))
 
@@ -382,13 +425,15 @@ class VideoToSVGConverter:
         self.output_path = path; self.output_path_label.config(text=self.output_path)
 
     def load_video(self):
-        if self.capture: self.capture.release()
-        self.capture = cv2.VideoCapture(self.video_path)
-        if not self.capture.isOpened():
+        if self.frame_source: self.frame_source.close()
+        try:
+            self.frame_source = CachedFrameSource(self.video_path, gray=True) # The preview only shows edges
+        except (IOError, ValueError):
+            self.frame_source = None
             messagebox.showerror("Error", "Could not open video file."); return
             
-        self.total_frames = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30
+        self.total_frames = self.frame_source.total_frames
+        self.fps = self.frame_source.fps
         
         self.timeline_slider.config(to=self.total_frames - 1, state="normal")
         self.set_in_button.config(state='normal'); self.set_out_button.config(state='normal')
@@ -400,43 +445,6 @@ class VideoToSVGConverter:
         
         self.timeline_slider.set(0); self.schedule_preview_update()
 
-    def apply_pan_and_zoom(self, frame):
-        zoom = self.zoom_level.get()
-        
-        h, w = frame.shape[:2]
-        
-        # Calculate the size of the zoomed-in window
-        zoomed_w = int(w / zoom)
-        zoomed_h = int(h / zoom)
-        
-        # Calculate the maximum possible offset from the center
-        max_offset_x = (w - zoomed_w) / 2
-        max_offset_y = (h - zoomed_h) / 2
-        
-        # Normalize slider values from -100,100 to a -1,1 range
-        norm_x = self.x_offset.get() / 100.0
-        norm_y = self.y_offset.get() / 100.0
-        
-        # Calculate the actual pixel offset based on the max possible offset
-        offset_x = int(norm_x * max_offset_x)
-        offset_y = int(norm_y * max_offset_y)
-        
-        # Calculate the top-left corner of the crop window
-        center_x, center_y = w // 2, h // 2
-        x1 = center_x - (zoomed_w // 2) + offset_x
-        y1 = center_y - (zoomed_h // 2) + offset_y
-        
-        # Clamp coordinates to ensure they are within the frame bounds
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(w, x1 + zoomed_w), min(h, y1 + zoomed_h)
-        
-        return frame[y1:y2, x1:x2]
-        
-    def apply_image_adjustments(self, frame):
-        adjusted = cv2.convertScaleAbs(frame, alpha=self.contrast.get(), beta=self.brightness.get())
-        blur_k = self.pre_blur.get() * 2 + 1
-        return cv2.GaussianBlur(adjusted, (blur_k, blur_k), 0) if blur_k > 1 else adjusted
-
     def _update_timeline_indicator(self):
         self.timeline_indicator.delete("all")
         if self.total_frames <= 1: return
@@ -448,79 +456,13 @@ class VideoToSVGConverter:
         out_x = (self.out_frame / self.total_frames) * widget_width
         self.timeline_indicator.create_rectangle(in_x, 0, out_x, 8, fill="#0078d4", outline="")
         
-    def _get_output_preview_edges(self, original_frame):
-        source_img = original_frame
-        
-        if self.is_crop_enabled.get() and self.crop_coords:
-            h, w = original_frame.shape[:2]
-            scale_w = w / self.preview_image_size[0]
-            scale_h = h / self.preview_image_size[1]
-            x1, y1 = self.crop_coords[0] - self.preview_image_offset[0], self.crop_coords[1] - self.preview_image_offset[1]
-            x2, y2 = self.crop_coords[2] - self.preview_image_offset[0], self.crop_coords[3] - self.preview_image_offset[1]
-            
-            frame_x1, frame_y1 = int(x1 * scale_w), int(y1 * scale_h)
-            frame_x2, frame_y2 = int(x2 * scale_w), int(y2 * scale_h)
-            
-            if frame_x2 > frame_x1 and frame_y2 > frame_y1:
-                source_img = original_frame[frame_y1:frame_y2, frame_x1:frame_x2]
-        else:
-             source_img = self.apply_pan_and_zoom(source_img)
-
-        if self.is_1_to_1_aspect.get():
-            h, w = source_img.shape[:2]
-            side = min(h, w); x_off = (w - side) // 2; y_off = (h - side) // 2
-            source_img = source_img[y_off:y_off+side, x_off:x_off+side]
-        
-        h, w = source_img.shape[:2]
-        if h == 0 or w == 0: return None
-        out_w, out_h = OUTPUT_PREVIEW_SIZE, OUTPUT_PREVIEW_SIZE
-        mode = self.scale_mode.get()
-        
-        if mode == "Stretch":
-            scaled = cv2.resize(source_img, (out_w, out_h), interpolation=cv2.INTER_AREA)
-        else: # Fit or Fill
-            scale = min(out_w/w, out_h/h) if mode == "Fit" else max(out_w/w, out_h/h)
-            scaled_w, scaled_h = int(w * scale), int(h * scale)
-            scaled_resized = cv2.resize(source_img, (scaled_w, scaled_h), interpolation=cv2.INTER_AREA)
-            
-            scaled = np.zeros((out_h, out_w, 3), dtype=np.uint8)
-            if mode == "Fit":
-                x_off = (out_w - scaled_w) // 2
-                y_off = (out_h - scaled_h) // 2
-                scaled[y_off:y_off+scaled_h, x_off:x_off+scaled_w] = scaled_resized
-            else: # Fill
-                cx_off = (scaled_w - out_w) // 2
-                cy_off = (scaled_h - out_h) // 2
-                scaled = scaled_resized[cy_off:cy_off+out_h, cx_off:cx_off+out_w]
-
-        processed = self.apply_image_adjustments(scaled)
-        return cv2.Canny(processed, self.threshold1_slider_var.get(), self.threshold2_slider_var.get())
-
-    def _run_potrace_estimate(self, image_data):
-        try:
-            command = ['potrace', '-', '-s', '--turdsize', str(self.speckle_removal.get()), '--opttolerance', str(self.optimization_level.get())]
-            proc = subprocess.run(command, input=cv2.imencode('.bmp', image_data)[1].tobytes(), capture_output=True, check=True, timeout=1)
-            return len(re.findall(b'[MLC]', proc.stdout))
-        except Exception:
-            return "---"
-
     def format_time(self, frame_num):
-        if self.fps == 0: return "00:00:00:00"
-        seconds_total = frame_num / self.fps
-        hours, remainder = divmod(seconds_total, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        frames = int((seconds_total * self.fps) % self.fps)
-        return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}:{int(frames):02}"
+        return format_timecode(frame_num, self.fps)
         
     def parse_time(self, time_str):
         try:
-            parts = time_str.split(':')
-            if len(parts) == 4:
-                h, m, s, f = [int(p) for p in parts]
-                total_seconds = (h * 3600) + (m * 60) + s + (f / self.fps)
-                return total_seconds
-            return -1
-        except Exception:
+            return parse_timecode(time_str, self.fps)
+        except ValueError:
             return -1
 
     def update_in_out_entries(self):
@@ -565,77 +507,54 @@ class VideoToSVGConverter:
         if not self.video_path or not self.output_path or self.in_frame >= self.out_frame:
             messagebox.showerror("Error", "Please set valid video, output, and in/out points."); return
         self.start_button.config(state="disabled"); self.progress_bar['value'] = 0
-        threading.Thread(target=self.run_conversion_logic, daemon=True).start()
-
-    def run_conversion_logic(self):
+        threading.Thread(target=self.run_conversion_logic, args=(self._get_settings(),), daemon=True).start()
+
+    def _get_crop_in_source(self):
+        """Maps the crop rectangle drawn on the preview canvas to source frame pixels."""
+        if not self.is_crop_enabled.get() or not self.crop_coords: return None
+        if self.preview_transform is None or min(self.preview_transform.size) <= 0: return None
+        x_off, y_off = self.preview_image_offset
+        x1, y1 = self.preview_transform.to_source(self.crop_coords[0] - x_off, self.crop_coords[1] - y_off)
+        x2, y2 = self.preview_transform.to_source(self.crop_coords[2] - x_off, self.crop_coords[3] - y_off)
+        return (int(x1), int(y1), int(x2), int(y2))
+
+    def _get_settings(self):
+        """Snapshots the GUI controls into a ConversionSettings that can be sent to worker processes."""
+        output_width, output_height = parse_output_size(self.output_size.get())
+        return ConversionSettings(
+            zoom=self.zoom_level.get(), x_offset=self.x_offset.get(), y_offset=self.y_offset.get(),
+            crop=self._get_crop_in_source(), square=self.is_1_to_1_aspect.get(), scale_mode=self.scale_mode.get(),
+            output_width=output_width, output_height=output_height, working_resolution=self.working_resolution.get(),
+            brightness=self.brightness.get(), contrast=self.contrast.get(), pre_blur=self.pre_blur.get(),
+            edge_detector=self.edge_detector.get(), threshold1=self.threshold1_slider_var.get(), threshold2=self.threshold2_slider_var.get(),
+            multipass=self.is_multipass.get(), stroke_color=self.stroke_color.get(), tracer=self.tracer_backend.get(),
+            turdsize=self.speckle_removal.get(), opttolerance=self.optimization_level.get(), alphamax=self.corner_smoothing.get(), point_budget=self.point_budget.get(),
+            svg_compact=self.is_compact_svg.get(), optimize_paths=self.is_optimize_paths.get(), temporal=self.is_temporal.get(),
+            frame_step=max(1, self.frame_step.get()), jobs=max(1, self.jobs.get()), incremental=self.is_incremental.get(),
+            dedup=self.is_dedup.get(), dedup_tolerance=self.dedup_tolerance.get(), output_format=self.output_format.get(),
+        )
+
+    def run_conversion_logic(self, settings):
         video_name = os.path.splitext(os.path.basename(self.video_path))[0]
-        final_output_folder = os.path.join(self.output_path, video_name); os.makedirs(final_output_folder, exist_ok=True)
-        local_capture = cv2.VideoCapture(self.video_path)
-        total_frames_to_process = self.out_frame - self.in_frame + 1
-        
-        for i, frame_num in enumerate(range(self.in_frame, self.out_frame + 1)):
-            self.root.after(0, self.status_label.config, {'text': f"Processing frame {i+1} of {total_frames_to_process}..."})
-            local_capture.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-            ret, frame = local_capture.read()
-            if not ret: continue
-
-            source_img = frame
-            if self.is_crop_enabled.get() and self.crop_coords:
-                h, w = frame.shape[:2]
-                scale_w = w / self.preview_canvas.winfo_width()
-                scale_h = h / self.preview_canvas.winfo_height()
-                x1, y1 = self.crop_coords[0] - self.preview_image_offset[0], self.crop_coords[1] - self.preview_image_offset[1]
-                x2, y2 = self.crop_coords[2] - self.preview_image_offset[0], self.crop_coords[3] - self.preview_image_offset[1]
-                
-                frame_x1, frame_y1 = int(x1 * scale_w), int(y1 * scale_h)
-                frame_x2, frame_y2 = int(x2 * scale_w), int(y2 * scale_h)
-
-                if frame_x2 > frame_x1 and frame_y2 > frame_y1:
-                    source_img = frame[frame_y1:frame_y2, frame_x1:frame_x2]
-            else:
-                 source_img = self.apply_pan_and_zoom(source_img)
-                 
-            if self.is_1_to_1_aspect.get():
-                h, w = source_img.shape[:2]
-                side = min(h, w); x_off = (w - side) // 2; y_off = (h - side) // 2
-                source_img = source_img[y_off:y_off+side, x_off:x_off+side]
-
-            processed = self.apply_image_adjustments(source_img)
-            if self.is_multipass.get():
-                edges = cv2.Canny(processed, self.threshold1_slider_var.get(), self.threshold2_slider_var.get())
-                skeleton = cv2.ximgproc.thinning(edges)
-                processed = skeleton
-            
-            edges_inverted = cv2.bitwise_not(cv2.Canny(processed, self.threshold1_slider_var.get(), self.threshold2_slider_var.get()))
-            temp_bmp_path = os.path.join(final_output_folder, "temp_frame.bmp")
-            cv2.imwrite(temp_bmp_path, edges_inverted)
-            
-            svg_filename = f"{i+1:05d}.svg"; svg_filepath = os.path.join(final_output_folder, svg_filename)
-            try:
-                command = ['potrace', temp_bmp_path, '-s', '--turdsize', str(self.speckle_removal.get()), '--opttolerance', str(self.optimization_level.get()), '--alphamax', str(self.corner_smoothing.get()), '-o', svg_filepath]
-                subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                self.colorize_svg_file(svg_filepath, self.stroke_color.get())
-            except Exception as e:
-                self.root.after(0, self.handle_conversion_error, str(e)); break
-            finally:
-                if os.path.exists(temp_bmp_path): os.remove(temp_bmp_path)
-            self.root.after(0, self.progress_bar.config, {'value': (i + 1) / total_frames_to_process * 100})
-        
-        local_capture.release()
-        self.root.after(0, self.handle_conversion_complete, final_output_folder)
-
-    def colorize_svg_file(self, filepath, color_hex):
+        final_output_folder = os.path.join(self.output_path, video_name)
+
+        metrics = RunMetrics()
+
+        def report_progress(completed, total):
+            self.root.after(0, self.status_label.config, {'text': metrics.progress_text(completed, total)})
+            self.root.after(0, self.progress_bar.config, {'value': completed / total * 100})
+
         try:
-            with open(filepath, 'r') as f: content = f.read()
-            content = re.sub(r'<path', f'<path stroke="{color_hex}" fill="none"', content)
-            with open(filepath, 'w') as f: f.write(content)
+            actions = run_conversion(self.video_path, final_output_folder, settings, self.in_frame, self.out_frame, report_progress, metrics)
         except Exception as e:
-            print(f"Could not colorize SVG {filepath}: {e}")
+            self.root.after(0, self.handle_conversion_error, str(e)); return
+        self.root.after(0, self.handle_conversion_complete, final_output_folder, actions, metrics.summary())
 
-    def handle_conversion_complete(self, output_folder):
-        self.status_label.config(text=f"Success! Files saved to: {output_folder}")
+    def handle_conversion_complete(self, output_folder, actions, run_summary):
+        summary = ', '.join(f"{n} {a}" for a, n in sorted(actions.items()))
+        self.status_label.config(text=f"Success! Files saved to: {output_folder} ({run_summary['fps']:.1f} fps, slowest stage: {run_summary['bottleneck']})")
         self.start_button.config(state="normal")
-        messagebox.showinfo("Complete", f"Conversion successful.\nFiles saved to:\n{output_folder}")
+        messagebox.showinfo("Complete", f"Conversion successful ({summary}).\nFiles saved to:\n{output_folder}")
 
     def handle_conversion_error(self, error_message):
         self.status_label.config(text="Error during conversion.")
@@ -0,0 +1,82 @@
+"""
+Compares per-frame seeking, the sequential frame reader and the threaded
+ring-buffer reader, for every installed decoder backend, on a synthetic clip.
+Every reader is timed with the same simulated per-frame processing cost, which
+is what the threaded reader's decode thread overlaps with.
+
+Usage: python benchmarks/bench_decode.py [--frames 300] [--size 1280x720] [--step 1] [--work-ms 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from video2svg.decode import DECODER_OPENCV, DECODER_PYAV, ThreadedFrameReader, av, open_video, read_frames
+
+def make_synthetic_video(path, frames, width, height, fps=30):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    rng = np.random.default_rng(0)
+    for i in range(frames):
+        frame = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+        cx = int((i * 7) % width); cy = height // 2
+        cv2.circle(frame, (cx, cy), height // 6, (255, 255, 255), 3)
+        cv2.rectangle(frame, (width // 4, (i * 3) % height), (width // 4 + 80, (i * 3) % height + 80), (0, 200, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+def bench_seek_per_frame(path, backend, start, end, step, work):
+    decoder = open_video(path, backend)
+    count = 0; t0 = time.perf_counter()
+    for frame_num in range(start, end + 1, step):
+        decoder.seek(frame_num); decoder.position = -1 # Force a real seek every time
+        if decoder.read() is None: continue
+        time.sleep(work); count += 1
+    elapsed = time.perf_counter() - t0
+    decoder.close()
+    return count, elapsed
+
+def bench_sequential(path, backend, start, end, step, work):
+    decoder = open_video(path, backend)
+    count = 0; t0 = time.perf_counter()
+    for _ in read_frames(decoder, start, end, step):
+        time.sleep(work); count += 1
+    elapsed = time.perf_counter() - t0
+    decoder.close()
+    return count, elapsed
+
+def bench_threaded(path, backend, start, end, step, work):
+    decoder = open_video(path, backend)
+    count = 0; t0 = time.perf_counter()
+    with ThreadedFrameReader(decoder, start, end, step) as frames:
+        for _ in frames:
+            time.sleep(work); count += 1
+    elapsed = time.perf_counter() - t0
+    decoder.close()
+    return count, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--step", type=int, default=1)
+    parser.add_argument("--work-ms", type=float, default=5.0, help="simulated processing per frame, the same for every reader")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.mp4")
+        make_synthetic_video(path, args.frames, width, height)
+        start, end = args.frames // 10, args.frames - 1
+        backends = [DECODER_OPENCV] + ([DECODER_PYAV] if av is not None else [])
+        for backend in backends:
+            for name, bench in (("seek per frame", bench_seek_per_frame), ("sequential", bench_sequential), ("threaded", bench_threaded)):
+                count, elapsed = bench(path, backend, start, end, args.step, args.work_ms / 1000)
+                print(f"{backend:>6} {name:>15}: {count} frames in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f} fps)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compares the edge detectors (see video2svg.edges) on a fixed synthetic corpus:
+per-frame detection cost and the point counts the frames trace to. One scene
+fades from dark to bright and back, so the spread of its point counts shows how
+steady a detector's output stays under exposure changes; the other is bright
+shapes on black, typical laser material.
+
+Usage: python benchmarks/bench_edges.py [--frames 40] [--size 512] [--tracer potrace]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from video2svg.edges import EDGE_DETECTORS, find_edges
+from video2svg.settings import ConversionSettings
+from video2svg.tracing import TRACER_CHOICES, TRACER_INPROCESS, TRACER_POTRACE, count_svg_points, create_tracer, is_potrace_installed
+
+def _compress(img, quality=70):
+    # Video frames carry codec artifacts rather than clean Gaussian noise
+    return cv2.imdecode(cv2.imencode(".jpg", img, (cv2.IMWRITE_JPEG_QUALITY, quality))[1], cv2.IMREAD_GRAYSCALE)
+
+def make_corpus(frames, size):
+    """
+    Two grayscale scenes of `frames` frames each, with noise and compression:
+    "fade", moving shapes, line art and text over a gradient, fading from dark
+    to bright and back; "stage", bright shapes moving on a near-black background.
+    """
+    rng = np.random.default_rng(0)
+    background = np.tile(np.linspace(40, 200, size).astype(np.uint8), (size, 1))
+    fade, stage = [], []
+    for i in range(frames):
+        img = background.copy()
+        for j in range(8):
+            cx, cy = (i * 5 + j * 61) % size, (j * 97 + i * 3) % size
+            cv2.circle(img, (cx, cy), 10 + (j * 7) % 50, 230 if j % 2 else 20, -1 if j % 3 else 3)
+        cv2.rectangle(img, (size // 10, size // 10), (size // 3, size // 4), 10, 2) # Dark line art
+        cv2.putText(img, f"FRAME {i}", (size // 8, size // 2), cv2.FONT_HERSHEY_SIMPLEX, size / 300, 15, 2)
+        gain = 0.35 + 0.65 * abs(np.sin(np.pi * i / max(1, frames - 1))) # Dark -> bright -> dark
+        fade.append(_compress(np.clip(img * gain + rng.normal(0, 4, img.shape), 0, 255).astype(np.uint8)))
+
+        img = np.full((size, size), 12, np.uint8)
+        for j in range(5):
+            cx, cy = (i * 7 + j * 101) % size, (j * 83 + i * 4) % size
+            cv2.ellipse(img, (cx, cy), (20 + j * 9, 12 + j * 5), i * 3 + j * 40, 0, 360, 180 + j * 15, -1 if j % 2 else 4)
+        stage.append(_compress(np.clip(img + rng.normal(0, 2, img.shape), 0, 255).astype(np.uint8)))
+    return {"fade": fade, "stage": stage}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=40, help="frames per scene")
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--tracer", choices=TRACER_CHOICES, default=TRACER_POTRACE if is_potrace_installed() else TRACER_INPROCESS)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.frames, args.size)
+    tracer = create_tracer(args.tracer)
+    print(f"{args.frames} frames per scene at {args.size}x{args.size}, traced with {args.tracer}; points/frame as mean (spread = std / mean)")
+    for detector in EDGE_DETECTORS:
+        settings = ConversionSettings(edge_detector=detector)
+        out = np.empty((args.size, args.size), np.uint8)
+        ms, columns = [], []
+        for scene, frames in corpus.items():
+            points = []
+            for frame in frames:
+                t0 = time.perf_counter()
+                edges = find_edges(frame, settings, out)
+                ms.append((time.perf_counter() - t0) * 1000)
+                points.append(count_svg_points(tracer.trace(cv2.bitwise_not(edges))))
+            points = np.array(points)
+            columns.append(f"{scene} {points.mean():8.1f} ({points.std() / max(1.0, points.mean()):4.2f})")
+        print(f"{detector:>13}: {np.median(ms):6.2f} ms/frame, " + ", ".join(columns))
+
+if __name__ == "__main__":
+    main()
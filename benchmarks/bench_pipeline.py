@@ -0,0 +1,208 @@
+"""
+Benchmarks the headless conversion pipeline and the GUI preview path on a
+synthetic clip corpus (moving shapes, text and noise at 480p, 1080p and 4K,
+written locally with cv2.VideoWriter and cached between runs). Every case runs
+in its own process, so peak RSS is the case's own. Records frames/sec,
+per-stage latency, peak RSS and output size; --save writes them as a JSON
+baseline and --compare flags regressions against one (exit status 1).
+
+Usage: python benchmarks/bench_pipeline.py [--resolutions 480p,1080p,4k] [--frames 60]
+           [--jobs N] [--set threshold2=120 ...] [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from video2svg.decode import open_video, read_frames
+from video2svg.engine import run_conversion
+from video2svg.metrics import RunMetrics
+from video2svg.preview import PreviewRenderer, StageTimer
+from video2svg.settings import ConversionSettings
+from video2svg.tracing import TRACER_INPROCESS, TRACER_POTRACE, is_potrace_installed
+
+RESOLUTIONS = {"480p": (854, 480), "1080p": (1920, 1080), "4k": (3840, 2160)}
+CASES = ("convert", "preview")
+PREVIEW_SIZE = (640, 480) # The GUI's default preview canvas
+DEFAULT_TOLERANCE = 0.15
+# Differences below these are noise whatever the relative change: ms per stage, MB of RSS
+MIN_STAGE_MS = 0.5
+MIN_RSS_MB = 20
+IDLE_STAGES = ("wait", "decode_wait") # Time spent blocked on another stage; not compared
+
+def make_clip(path, width, height, frames, fps=30):
+    """Moving filled and outlined shapes, scrolling text and sensor-like noise over a gradient."""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened(): raise IOError(f"Could not write {path}")
+    rng = np.random.default_rng(0)
+    s = height / 480 # Shapes and text scale with the resolution, so every clip shows the same scene
+    background = np.tile(np.linspace(30, 160, width).astype(np.uint8)[None, :, None], (height, 1, 3))
+    for i in range(frames):
+        frame = background.copy()
+        for j in range(6):
+            center = (int((i * 6 * s + j * width / 6) % width), int(height / 2 + np.sin(i / 10 + j) * height / 3))
+            cv2.circle(frame, center, int((20 + j * 8) * s), (255, 200 - j * 30, j * 40), -1 if j % 2 else max(1, int(3 * s)))
+        cv2.rectangle(frame, (int(width / 5), int((i * 4 * s) % height)), (int(width / 5 + 90 * s), int((i * 4 * s) % height + 60 * s)), (0, 180, 255), -1)
+        cv2.putText(frame, f"VIDEO2SVG {i:04d}", (int(width - (i * 8 * s) % (width + 400 * s)), int(height * 0.85)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.5 * s, (240, 240, 240), max(1, int(3 * s)))
+        frame = cv2.add(frame, rng.integers(0, 12, frame.shape, dtype=np.uint8))
+        writer.write(frame)
+    writer.release()
+
+def corpus_clip(folder, resolution, frames):
+    """The corpus clip for a resolution, generated on first use."""
+    width, height = RESOLUTIONS[resolution]
+    path = os.path.join(folder, f"synthetic_{resolution}_{frames}.mp4")
+    if not os.path.exists(path):
+        print(f"Generating {path}...", file=sys.stderr)
+        make_clip(path + ".tmp.mp4", width, height, frames)
+        os.replace(path + ".tmp.mp4", path)
+    return path
+
+def _peak_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1) # Bytes on macOS, KiB elsewhere
+
+def _folder_bytes(folder):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(folder) for name in names)
+
+def _stage_summary(metrics):
+    return {name: {"p50_ms": stats["p50_ms"], "p90_ms": stats["p90_ms"]} for name, stats in metrics.summary()["stages"].items()}
+
+def run_convert(clip, settings):
+    metrics = RunMetrics()
+    with tempfile.TemporaryDirectory() as output:
+        started = time.perf_counter()
+        run_conversion(clip, output, settings, metrics=metrics)
+        elapsed = time.perf_counter() - started
+        output_bytes = _folder_bytes(output)
+    return {"frames": metrics.frames, "fps": round(metrics.frames / elapsed, 2), "stages": _stage_summary(metrics),
+            "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF), "worker_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+            "output_bytes": output_bytes}
+
+def run_preview(clip, settings):
+    """
+    Renders every frame the way the GUI's preview worker does. Decoding is
+    recorded as its own stage but left out of frames/sec, as the GUI caches it.
+    """
+    decoder = open_video(clip, settings.decoder, gray=True)
+    renderer, metrics = PreviewRenderer(), RunMetrics()
+    elapsed = 0.0
+    try:
+        frames = read_frames(decoder, 0, decoder.total_frames - 1)
+        while True:
+            started = time.perf_counter()
+            item = next(frames, None)
+            if item is None: break
+            metrics.record("decode", time.perf_counter() - started)
+            frame_num, frame = item
+            stages = StageTimer()
+            started = time.perf_counter()
+            renderer.render(frame, frame_num, settings, PREVIEW_SIZE, stages)
+            seconds = time.perf_counter() - started
+            elapsed += seconds
+            for name, stage_seconds in stages.timings.items(): metrics.record(name, stage_seconds)
+            metrics.record("render", seconds)
+            metrics.add_frame()
+    finally:
+        decoder.close()
+    return {"frames": metrics.frames, "fps": round(metrics.frames / elapsed, 2) if elapsed else 0.0, "stages": _stage_summary(metrics),
+            "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF)}
+
+def _run_case_process(case, clip, settings_values):
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", case, clip, json.dumps(settings_values)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0: raise RuntimeError(f"{case} on {clip} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def _median_result(runs):
+    """The run with the median frames/sec, so repeats smooth out a noisy machine without mixing runs."""
+    return sorted(runs, key=lambda run: run["fps"])[len(runs) // 2]
+
+def compare(results, baseline, tolerance):
+    """Lines describing every regression of results against baseline."""
+    regressions = []
+    for key, result in sorted(results.items()):
+        before = baseline.get("results", {}).get(key)
+        if before is None: continue
+        if result["fps"] < before["fps"] * (1 - tolerance):
+            regressions.append(f"{key}: {before['fps']} -> {result['fps']} fps")
+        for name, stats in result["stages"].items():
+            if name in IDLE_STAGES: continue
+            old = before["stages"].get(name)
+            if old and stats["p50_ms"] > old["p50_ms"] * (1 + tolerance) and stats["p50_ms"] - old["p50_ms"] > MIN_STAGE_MS:
+                regressions.append(f"{key}: stage {name} p50 {old['p50_ms']} -> {stats['p50_ms']} ms")
+        for field in ("peak_rss_mb", "worker_peak_rss_mb"):
+            if field in result and field in before and result[field] > before[field] * (1 + tolerance) and result[field] - before[field] > MIN_RSS_MB:
+                regressions.append(f"{key}: {field} {before[field]} -> {result[field]} MB")
+        if "output_bytes" in result and "output_bytes" in before and abs(result["output_bytes"] - before["output_bytes"]) > before["output_bytes"] * tolerance:
+            regressions.append(f"{key}: output size {before['output_bytes']} -> {result['output_bytes']} bytes")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS), help="comma-separated, from " + ", ".join(RESOLUTIONS))
+    parser.add_argument("--cases", default=",".join(CASES), help="comma-separated, from " + ", ".join(CASES))
+    parser.add_argument("--frames", type=int, default=60, help="frames per clip")
+    parser.add_argument("--jobs", type=int, default=ConversionSettings().jobs, help="conversion worker processes")
+    parser.add_argument("--tracer", default=None, help="tracing backend (default: potrace if installed, else in-process)")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], metavar="NAME=VALUE", help="override a ConversionSettings field; repeatable")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median (by frames/sec) is kept")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "video2svg-bench-corpus"), help="where the generated clips are cached")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="flag regressions against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="relative change that counts as a regression (default: %(default)s)")
+    parser.add_argument("--run-case", nargs=3, help=argparse.SUPPRESS) # CASE CLIP SETTINGS_JSON, in a child process
+    args = parser.parse_args()
+
+    if args.run_case:
+        case, clip, values = args.run_case
+        settings = ConversionSettings.from_dict(json.loads(values))
+        print(json.dumps((run_convert if case == "convert" else run_preview)(clip, settings)))
+        return
+
+    values = {"tracer": args.tracer or (TRACER_POTRACE if is_potrace_installed() else TRACER_INPROCESS), "jobs": args.jobs}
+    for override in args.overrides:
+        name, _, value = override.partition("=")
+        values[name.strip()] = value
+    ConversionSettings.from_dict(values) # Fail on a typo before generating anything
+    os.makedirs(args.corpus, exist_ok=True)
+
+    results = {}
+    for resolution in args.resolutions.split(","):
+        clip = corpus_clip(args.corpus, resolution.strip(), args.frames)
+        for case in args.cases.split(","):
+            key = f"{resolution.strip()}/{case.strip()}"
+            result = results[key] = _median_result([_run_case_process(case.strip(), clip, values) for _ in range(max(1, args.repeat))])
+            slowest = sorted(((name, stats) for name, stats in result["stages"].items() if name not in IDLE_STAGES), key=lambda item: -item[1]["p50_ms"])[:3]
+            line = f"{key:>14}: {result['fps']:7.1f} fps, peak RSS {result['peak_rss_mb']:.0f} MB"
+            if "worker_peak_rss_mb" in result: line += f" (workers {result['worker_peak_rss_mb']:.0f} MB)"
+            if "output_bytes" in result: line += f", output {result['output_bytes'] / 1e6:.2f} MB"
+            print(line + "; p50 " + ", ".join(f"{name} {stats['p50_ms']:.2f}ms" for name, stats in slowest))
+
+    report = {"meta": {"python": platform.python_version(), "opencv": cv2.__version__, "numpy": np.__version__, "machine": platform.machine(),
+                       "cpus": os.cpu_count(), "frames": args.frames, "settings": values},
+              "results": results}
+    if args.save:
+        with open(args.save, "w") as f: json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)
+        mismatched = [k for k in ("cpus", "frames", "settings", "opencv") if baseline.get("meta", {}).get(k) != report["meta"][k]]
+        if mismatched: print(f"Warning: the baseline was recorded with different {', '.join(mismatched)}; differences may not be regressions")
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions: print(f"REGRESSION {line}")
+        if regressions: sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+if __name__ == "__main__":
+    main()
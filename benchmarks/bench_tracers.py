@@ -0,0 +1,55 @@
+"""
+Compares per-frame latency and path counts of the available tracing backends
+on synthetic edge maps.
+
+Usage: python benchmarks/bench_tracers.py [--frames 50] [--size 512]
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from video2svg.tracing import ContourTracer, PotraceCLITracer, PypotraceTracer, count_svg_paths, count_svg_points, is_potrace_installed, potrace_bindings
+
+def make_edge_bitmaps(frames, size):
+    """Inverted Canny edge maps (black lines on white) of moving shapes and text."""
+    rng = np.random.default_rng(0)
+    bitmaps = []
+    for i in range(frames):
+        img = np.zeros((size, size), dtype=np.uint8)
+        for j in range(8):
+            cx, cy = (i * 5 + j * 61) % size, (j * 97 + i * 3) % size
+            cv2.circle(img, (cx, cy), 10 + (j * 7) % 50, 255, -1 if j % 2 else 3)
+        cv2.putText(img, f"FRAME {i}", (size // 8, size // 2), cv2.FONT_HERSHEY_SIMPLEX, size / 300, 200, 2)
+        img = cv2.add(img, rng.integers(0, 30, img.shape, dtype=np.uint8))
+        bitmaps.append(cv2.bitwise_not(cv2.Canny(img, 50, 150)))
+    return bitmaps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--size", type=int, default=512)
+    args = parser.parse_args()
+
+    bitmaps = make_edge_bitmaps(args.frames, args.size)
+    tracers = [ContourTracer()]
+    if potrace_bindings is not None: tracers.append(PypotraceTracer())
+    if is_potrace_installed(): tracers.append(PotraceCLITracer())
+    else: print("potrace not found on PATH; skipping the CLI backend")
+
+    for tracer in tracers:
+        paths = points = 0
+        t0 = time.perf_counter()
+        for bitmap in bitmaps:
+            svg = tracer.trace(bitmap)
+            paths += count_svg_paths(svg); points += count_svg_points(svg)
+        elapsed = time.perf_counter() - t0
+        n = len(bitmaps)
+        print(f"{tracer.name:>10}: {elapsed / n * 1000:7.2f} ms/frame, {paths / n:7.1f} paths/frame, {points / n:8.1f} points/frame")
+
+if __name__ == "__main__":
+    main()
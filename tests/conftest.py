@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+import pytest
+
+from video2svg.settings import ConversionSettings
+from video2svg.tracing import TRACER_INPROCESS
+
+CLIP_FRAMES = 12
+HOLD = 3 # Every picture is held for this many frames, so consecutive frames repeat
+
+def clip_frame(i, width=160, height=120):
+    """A bright circle and bar on black that move every HOLD frames."""
+    frame = np.zeros((height, width, 3), np.uint8)
+    step = i // HOLD
+    cv2.circle(frame, (30 + step * 25, height // 2), 18, (255, 255, 255), -1)
+    cv2.rectangle(frame, (10, 10 + step * 8), (60, 25 + step * 8), (200, 200, 200), -1)
+    return frame
+
+@pytest.fixture(scope="session")
+def video(tmp_path_factory):
+    """A short lossless (FFV1) clip of CLIP_FRAMES clip_frame()s, so held frames decode identically."""
+    path = str(tmp_path_factory.mktemp("video") / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"FFV1"), 30, (160, 120))
+    for i in range(CLIP_FRAMES): writer.write(clip_frame(i))
+    writer.release()
+    return path
+
+@pytest.fixture
+def settings():
+    """Fast conversion settings that need no potrace binary."""
+    return ConversionSettings(tracer=TRACER_INPROCESS, jobs=1, output_width=128, output_height=96, square=False)
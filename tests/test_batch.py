@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from video2svg.batch import load_manifest, load_state, run_batch
+from video2svg.tracing import TRACER_INPROCESS
+
+from conftest import CLIP_FRAMES
+
+FAST = {"tracer": TRACER_INPROCESS, "output_width": 64, "output_height": 48, "square": False}
+
+def _manifest(tmp_path, video, jobs, name="batch.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps({"settings": FAST, "jobs": [dict(job, video=video) for job in jobs]}))
+    return str(path)
+
+def _svgs(folder):
+    return sorted(name for name in os.listdir(folder) if name.endswith(".svg")) if os.path.isdir(folder) else []
+
+def test_load_json_and_csv(tmp_path):
+    (tmp_path / "batch.json").write_text(json.dumps({
+        "settings": {"threshold1": 40, "stroke_color": "#00ff00"},
+        "jobs": [{"video": "a.mp4", "output": "out/a", "in": "00:00:01", "out": 30},
+                 {"video": "a.mp4", "output": "out/b", "settings": {"threshold1": 70, "frame_step": 0}}]}))
+    a, b = load_manifest(str(tmp_path / "batch.json"), TRACER_INPROCESS)
+    assert a.video == str(tmp_path / "a.mp4") and a.output == str(tmp_path / "out" / "a")
+    assert (a.in_time, a.out_time, b.in_time, b.out_time) == ("00:00:01", 30, None, None)
+    assert (a.settings.threshold1, b.settings.threshold1, b.settings.stroke_color) == (40, 70, "#00ff00")
+    assert a.settings.tracer == TRACER_INPROCESS and b.settings.frame_step == 1
+
+    (tmp_path / "batch.csv").write_text("video,output,in,out,threshold2,multipass\nb.mp4,out/c,5,,200,true\n")
+    (c,) = load_manifest(str(tmp_path / "batch.csv"))
+    assert (c.in_time, c.out_time, c.settings.threshold2, c.settings.multipass) == (5, None, 200, True)
+
+@pytest.mark.parametrize("jobs, message", [
+    ([{"video": "a.mp4", "output": "same"}, {"video": "b.mp4", "output": "same"}], "distinct output folders"),
+    ([{"video": "a.mp4", "output": "a", "in": 20, "out": 10}], "after out frame"),
+    ([{"output": "a"}], "missing: video"),
+])
+def test_invalid_manifests(tmp_path, jobs, message):
+    (tmp_path / "batch.json").write_text(json.dumps(jobs))
+    with pytest.raises(ValueError, match=message): load_manifest(str(tmp_path / "batch.json"))
+
+def test_shared_decoder_and_resume(tmp_path, video):
+    path = _manifest(tmp_path, video, [{"output": "a", "in": 0, "out": 7}, {"output": "b", "in": 4, "out": 11, "frame_step": 2}])
+    state_path = path + ".state.json"
+    run_batch(load_manifest(path), 1, state_path)
+    assert _svgs(tmp_path / "a") == [f"{i:05d}.svg" for i in range(1, 9)]
+    assert _svgs(tmp_path / "b") == [f"{i:05d}.svg" for i in range(1, 5)]
+    assert {os.path.basename(k): (v["completed"], v["total"]) for k, v in load_state(state_path).items()} == {"a": (8, 8), "b": (4, 4)}
+
+    # Interrupted after frame 3 of job a: only the missing frames are converted again
+    state = json.load(open(state_path))
+    state["jobs"][str(tmp_path / "a")]["completed"] = 3
+    json.dump(state, open(state_path, "w"))
+    for name in _svgs(tmp_path / "a")[3:]: os.remove(tmp_path / "a" / name)
+    progress = []
+    run_batch(load_manifest(path), 1, state_path, lambda job, done, total: progress.append((os.path.basename(job.output), done)))
+    assert progress == [("a", n) for n in range(4, 9)]
+    assert _svgs(tmp_path / "a") == [f"{i:05d}.svg" for i in range(1, 9)]
+
+def test_empty_timecode_range_is_done(tmp_path, video):
+    path = _manifest(tmp_path, video, [{"output": "empty", "in": "00:00:00.300", "out": "00:00:00.100"}, {"output": "all"}])
+    state_path = path + ".state.json"
+    jobs = run_batch(load_manifest(path), 1, state_path)
+    assert [(job.total, job.is_done) for job in jobs] == [(0, True), (CLIP_FRAMES, True)]
+    progress = []
+    run_batch(load_manifest(path), 1, state_path, lambda job, done, total: progress.append(job))
+    assert progress == [] and _svgs(tmp_path / "empty") == []
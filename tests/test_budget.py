@@ -0,0 +1,73 @@
+import csv
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from video2svg.budget import REPORT_FILENAME, estimate_points, fit_to_budget, frame_stats, write_report
+from video2svg.engine import detect_edges, run_conversion, trace_frame
+from video2svg.settings import ConversionSettings
+from video2svg.tracing import TRACER_INPROCESS, count_svg_points
+
+from conftest import CLIP_FRAMES
+
+def _busy_image(size=200, seed=0):
+    """Many small shapes, with noise, so the trace is far over a small budget."""
+    rng = np.random.default_rng(seed)
+    image = np.zeros((size, size), np.uint8)
+    for _ in range(60):
+        x, y = rng.integers(0, size, 2)
+        cv2.circle(image, (int(x), int(y)), int(rng.integers(2, 12)), int(rng.integers(80, 255)), -1)
+    return cv2.add(image, rng.integers(0, 30, image.shape, dtype=np.uint8))
+
+def test_estimate_follows_traced_count():
+    image = _busy_image()
+    for multipass in (False, True):
+        settings = ConversionSettings(tracer=TRACER_INPROCESS, multipass=multipass)
+        edges = detect_edges(image, settings)
+        estimate = estimate_points(edges, settings.turdsize, settings.opttolerance, multipass)
+        traced = count_svg_points(trace_frame(edges, settings)[0])
+        assert abs(estimate - traced) <= 0.25 * traced, (multipass, estimate, traced)
+    # Centerline output is counted exactly, not as both sides of every line
+    assert estimate == traced
+
+def test_fit_escalates_until_within_budget():
+    image = _busy_image()
+    settings = ConversionSettings(tracer=TRACER_INPROCESS)
+    edges = detect_edges(image, settings)
+    settings = replace(settings, point_budget=estimate_points(edges, settings.turdsize, settings.opttolerance) // 2)
+    _, adapted, estimate = fit_to_budget(edges, settings, lambda s: detect_edges(image, s))
+    assert estimate <= settings.point_budget
+    assert adapted.turdsize > settings.turdsize and adapted.opttolerance >= settings.opttolerance
+
+def test_fit_without_redetect_keeps_thresholds():
+    image = _busy_image()
+    settings = ConversionSettings(tracer=TRACER_INPROCESS, point_budget=1)
+    edges = detect_edges(image, settings)
+    _, adapted, _ = fit_to_budget(edges, settings)
+    assert (adapted.threshold1, adapted.threshold2) == (settings.threshold1, settings.threshold2)
+    _, adapted, _ = fit_to_budget(edges, settings, lambda s: detect_edges(image, s))
+    assert adapted.threshold2 > settings.threshold2
+
+def test_frames_within_budget_are_untouched():
+    image = _busy_image()
+    settings = ConversionSettings(tracer=TRACER_INPROCESS, point_budget=10 ** 6)
+    edges = detect_edges(image, settings)
+    assert fit_to_budget(edges, settings, lambda s: detect_edges(image, s))[1] == settings
+
+def test_report(tmp_path, video, settings):
+    output = tmp_path / "out"
+    run_conversion(video, str(output), replace(settings, point_budget=40))
+    with open(output / REPORT_FILENAME, newline="") as f: rows = list(csv.DictReader(f))
+    assert [row["frame"] for row in rows] == [f"{i:05d}.svg" for i in range(1, CLIP_FRAMES + 1)]
+    assert all(row["action"] == "traced" and row["over_budget"] in ("0", "1") for row in rows)
+    assert sum(int(row["points"]) <= 40 for row in rows) >= CLIP_FRAMES // 2
+
+def test_write_report_marks_over_budget(tmp_path):
+    settings = ConversionSettings()
+    write_report(str(tmp_path), 100, {"00002.svg": ("traced", frame_stats(150, 120, settings)),
+                                      "00001.svg": ("traced", frame_stats(80, 90, settings, (10.0, 4.0))),
+                                      "00003.svg": ("deduplicated", None)})
+    with open(tmp_path / REPORT_FILENAME, newline="") as f: rows = list(csv.DictReader(f))
+    assert [(r["frame"], r["over_budget"], r["points"], r["travel_after"]) for r in rows] == [
+        ("00001.svg", "0", "80", "4.0"), ("00002.svg", "1", "150", ""), ("00003.svg", "", "", "")]
@@ -0,0 +1,70 @@
+import cv2
+import numpy as np
+import pytest
+
+from video2svg.decode import DECODER_OPENCV, ThreadedFrameReader, open_video, read_frames
+
+class FakeDecoder:
+    """Frames filled with their index; raises on frame `fail_at`."""
+    def __init__(self, total, fail_at=None):
+        self.total_frames, self.fail_at, self.position = total, fail_at, 0
+
+    def frame_shape(self):
+        return (4, 6)
+
+    def seek(self, frame_num):
+        self.position = frame_num
+
+    def read(self, out=None):
+        if self.position >= self.total_frames: return None
+        if self.position == self.fail_at: raise RuntimeError("corrupt frame")
+        out = out if out is not None else np.empty(self.frame_shape(), np.uint8)
+        out[:] = self.position; self.position += 1
+        return out
+
+    def skip(self):
+        if self.position >= self.total_frames: return False
+        self.position += 1
+        return True
+
+@pytest.fixture(scope="module")
+def clip(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("decode") / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(20): writer.write(np.full((48, 64, 3), i * 12, np.uint8))
+    writer.release()
+    return path
+
+def test_threaded_reader_matches_sequential(clip):
+    decoder = open_video(clip, DECODER_OPENCV, gray=True)
+    expected = [(n, frame.copy()) for n, frame in read_frames(decoder, 3, 17, step=2)]
+    assert [n for n, _ in expected] == [3, 5, 7, 9, 11, 13, 15, 17]
+    with ThreadedFrameReader(decoder, 3, 17, step=2, buffers=3) as frames:
+        got = [(n, frame.copy()) for n, frame in frames]
+    decoder.close()
+    assert [n for n, _ in got] == [n for n, _ in expected]
+    assert all((a == b).all() for (_, a), (_, b) in zip(got, expected))
+    assert abs(int(got[0][1].mean()) - 3 * 12) <= 3 # Really frame 3, in gray
+
+def test_ring_buffers_are_reused():
+    buffer_ids = set()
+    with ThreadedFrameReader(FakeDecoder(30), 0, 29, buffers=4) as frames:
+        for n, frame in frames:
+            assert (frame == n).all()
+            buffer_ids.add(id(frame))
+    assert len(buffer_ids) <= 4
+
+def test_stops_at_end_of_stream_and_on_break():
+    with ThreadedFrameReader(FakeDecoder(5), 2, 100) as frames:
+        assert [n for n, _ in frames] == [2, 3, 4]
+    reader = ThreadedFrameReader(FakeDecoder(100), 0, 99, buffers=2)
+    for n, _ in reader:
+        if n == 3: break
+    assert not reader._thread.is_alive()
+
+def test_decode_errors_are_raised_from_iteration():
+    seen = []
+    with pytest.raises(RuntimeError, match="corrupt"):
+        with ThreadedFrameReader(FakeDecoder(10, fail_at=4), 0, 9) as frames:
+            for n, _ in frames: seen.append(n)
+    assert seen == [0, 1, 2, 3]
@@ -0,0 +1,51 @@
+import os
+import zipfile
+from dataclasses import replace
+
+from video2svg.engine import reuse_svg_file, run_conversion, write_svg_file
+from video2svg.incremental import ACTION_DEDUPLICATED, ACTION_SKIPPED, ACTION_TRACED
+from video2svg.outputs import FORMAT_ZIP, stream_path
+from video2svg.settings import DEDUP_COPY
+
+from conftest import CLIP_FRAMES, HOLD
+
+def _inode(folder, index):
+    return os.stat(os.path.join(folder, f"{index:05d}.svg")).st_ino
+
+def test_held_frames_are_linked(tmp_path, video, settings):
+    output = str(tmp_path / "out")
+    actions = run_conversion(video, output, replace(settings, dedup=True))
+    assert actions == {ACTION_TRACED: CLIP_FRAMES // HOLD, ACTION_DEDUPLICATED: CLIP_FRAMES - CLIP_FRAMES // HOLD}
+    assert _inode(output, 1) == _inode(output, 2) == _inode(output, 3) != _inode(output, 4)
+
+def test_copy_mode_writes_separate_files(tmp_path, video, settings):
+    output = str(tmp_path / "out")
+    run_conversion(video, output, replace(settings, dedup=True, dedup_mode=DEDUP_COPY))
+    assert _inode(output, 1) != _inode(output, 2)
+    with open(os.path.join(output, "00001.svg")) as a, open(os.path.join(output, "00002.svg")) as b: assert a.read() == b.read()
+
+def test_without_dedup_every_frame_is_traced(tmp_path, video, settings):
+    assert run_conversion(video, str(tmp_path / "out"), settings) == {ACTION_TRACED: CLIP_FRAMES}
+
+def test_tolerance_counts_small_changes_as_duplicates(tmp_path, video, settings):
+    actions = run_conversion(video, str(tmp_path / "out"), replace(settings, dedup=True, dedup_tolerance=10 ** 6))
+    assert actions == {ACTION_TRACED: 1, ACTION_DEDUPLICATED: CLIP_FRAMES - 1}
+
+def test_duplicates_in_stream_and_incremental_output(tmp_path, video, settings):
+    output = str(tmp_path / "zip")
+    run_conversion(video, output, replace(settings, dedup=True, output_format=FORMAT_ZIP))
+    with zipfile.ZipFile(stream_path(output, FORMAT_ZIP)) as archive:
+        assert len(archive.namelist()) == CLIP_FRAMES
+        assert archive.read("00001.svg") == archive.read("00003.svg") != archive.read("00004.svg")
+
+    output = str(tmp_path / "incremental")
+    incremental = replace(settings, dedup=True, incremental=True)
+    run_conversion(video, output, incremental)
+    assert run_conversion(video, output, incremental)[ACTION_SKIPPED] == CLIP_FRAMES // HOLD
+
+def test_rewriting_a_linked_file_leaves_its_duplicates(tmp_path):
+    source, target = str(tmp_path / "a.svg"), str(tmp_path / "b.svg")
+    write_svg_file(source, "<svg>old</svg>")
+    reuse_svg_file(source, target)
+    write_svg_file(source, "<svg>new</svg>")
+    with open(target) as f: assert f.read() == "<svg>old</svg>"
@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+from video2svg import edges
+from video2svg.edges import (EDGE_ADAPTIVE, EDGE_DETECTORS, EDGE_SCHARR, EDGE_SOBEL, find_edges, gradient_edges,
+                             median_thresholds, register_detector, uses_thresholds)
+from video2svg.settings import ConversionSettings
+
+def _scene(contrast=1.0, seed=0):
+    """Shapes on a mid-gray background plus grain, with their contrast scaled around the background."""
+    rng = np.random.default_rng(seed)
+    image = np.full((120, 160), 128, np.float32)
+    cv2.circle(image, (50, 60), 30, 220, -1)
+    cv2.rectangle(image, (100, 20), (150, 100), 40, -1)
+    image = 128 + (image - 128) * contrast + rng.normal(0, 4 * contrast, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+@pytest.mark.parametrize("name", EDGE_DETECTORS)
+def test_detectors_return_binary_edges(name):
+    image = _scene()
+    settings = ConversionSettings(edge_detector=name)
+    result = find_edges(image, settings)
+    assert result.dtype == np.uint8 and result.shape == image.shape
+    assert set(np.unique(result)) <= {0, 255} and result.any()
+    out = np.empty_like(image)
+    assert (find_edges(image, settings, out) == result).all() and (out == result).all()
+
+def test_unknown_detector():
+    with pytest.raises(ValueError, match="Unknown edge detector: nope"):
+        find_edges(_scene(), ConversionSettings(edge_detector="nope"))
+
+def test_register_detector(monkeypatch):
+    monkeypatch.setitem(edges._DETECTORS, "threshold", None) # Removed again after the test
+    register_detector("threshold", lambda image, settings, out: cv2.threshold(image, 127, 255, cv2.THRESH_BINARY, dst=out)[1])
+    image = _scene()
+    assert (find_edges(image, ConversionSettings(edge_detector="threshold")) == np.where(image > 127, 255, 0)).all()
+    assert not uses_thresholds("threshold") and uses_thresholds(EDGE_SOBEL) and not uses_thresholds(EDGE_ADAPTIVE)
+
+def test_median_thresholds_follow_contrast():
+    settings = ConversionSettings()
+    low1, high1 = median_thresholds(_scene(1.0), settings)
+    low2, high2 = median_thresholds(_scene(0.5), settings)
+    assert high2 < high1 and low1 / high1 == pytest.approx(low2 / high2)
+    assert low1 / high1 == pytest.approx(settings.threshold1 / settings.threshold2)
+
+def test_scharr_matches_sobel():
+    image = cv2.GaussianBlur(_scene(), (5, 5), 0)
+    sobel = gradient_edges(image, 60) > 0
+    scharr = gradient_edges(image, 60, scharr=True) > 0
+    assert (sobel != scharr).mean() < 0.01
+    assert (find_edges(image, ConversionSettings(threshold2=60, edge_detector=EDGE_SCHARR)) > 0).sum() == scharr.sum()
+    assert (find_edges(image, ConversionSettings(threshold2=60, edge_detector=EDGE_SOBEL)) > 0).sum() == sobel.sum()
+
+def test_adaptive_finds_dark_lines():
+    image = np.full((100, 100), 230, np.uint8)
+    cv2.line(image, (10, 50), (90, 50), 20, 2)
+    result = find_edges(image, ConversionSettings(edge_detector=EDGE_ADAPTIVE))
+    assert (result[49:52, 15:85] == 255).all() # The stroke itself, not its two outlines
+    assert not result[:40].any() and not result[60:].any()
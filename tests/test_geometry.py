@@ -0,0 +1,80 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from video2svg.engine import run_conversion
+from video2svg.geometry import FrameTransform, source_roi
+from video2svg.settings import ConversionSettings
+from video2svg.svgpath import parse_svg_paths
+
+def _settings(**values):
+    return ConversionSettings(square=False, **values)
+
+@pytest.mark.parametrize("values, roi", [
+    ({}, (0, 0, 640, 360)),
+    ({"square": True}, (140, 0, 500, 360)),
+    ({"zoom": 2}, (160, 90, 480, 270)),
+    ({"zoom": 2, "x_offset": 100, "y_offset": -100}, (320, 0, 640, 180)),
+    ({"crop": (10, 20, 110, 70)}, (10, 20, 110, 70)),
+    ({"crop": (600, 300, 900, 500)}, (600, 300, 640, 360)), # Clamped to the frame
+    ({"crop": (700, 0, 800, 10)}, (0, 0, 640, 360)), # Outside the frame: whole frame
+    ({"crop": (0, 0, 200, 100), "zoom": 4}, (0, 0, 200, 100)), # Crop overrides pan/zoom
+])
+def test_source_roi(values, roi):
+    values = dict(values)
+    square = values.pop("square", False)
+    assert source_roi(640, 360, ConversionSettings(square=square, **values)) == roi
+
+def test_scale_modes():
+    fit = FrameTransform.for_output(640, 360, _settings(scale_mode="Fit"), 400, 200)
+    assert (fit.roi, fit.size, fit.canvas, fit.offset) == ((0, 0, 640, 360), (355, 200), (400, 200), (22, 0))
+    fill = FrameTransform.for_output(640, 360, _settings(scale_mode="Fill"), 400, 200)
+    assert (fill.roi, fill.size, fill.canvas, fill.scale) == ((0, 20, 640, 340), (400, 200), (400, 200), 0.625)
+    stretch = FrameTransform.for_output(640, 360, _settings(scale_mode="Stretch"), 400, 200)
+    assert (stretch.roi, stretch.size, stretch.canvas) == ((0, 0, 640, 360), (400, 200), (400, 200))
+
+def test_fit_and_working_resolution():
+    assert FrameTransform.fit((0, 0, 640, 360), 320, 320).size == (320, 180)
+    big = FrameTransform.for_working_resolution(4000, 2000, _settings(working_resolution=1000))
+    assert (big.size, big.scale) == ((1000, 500), 0.25)
+    small = FrameTransform.for_working_resolution(640, 360, _settings(working_resolution=1000))
+    assert (small.size, small.scale) == ((640, 360), 1.0)
+    assert FrameTransform.for_working_resolution(4000, 2000, _settings(working_resolution=0)).size == (4000, 2000)
+
+def test_apply_letterboxes_and_maps_back():
+    frame = np.full((360, 640), 200, np.uint8)
+    fit = FrameTransform.for_output(640, 360, _settings(scale_mode="Fit"), 400, 200)
+    raster = fit.apply(frame)
+    assert raster.shape == (200, 400)
+    assert (raster[:, :22] == 0).all() and (raster[:, 22 + 355:] == 0).all() and (raster[:, 30:370] == 200).all()
+    assert fit.to_source(22, 0) == pytest.approx((0, 0))
+    assert fit.to_source(22 + 355, 200) == pytest.approx((640, 360))
+
+def test_apply_without_resize_is_a_view():
+    frame = np.zeros((360, 640), np.uint8)
+    transform = FrameTransform.for_output(640, 360, _settings(crop=(100, 50, 300, 150), scale_mode="Stretch"), 200, 100)
+    assert np.shares_memory(transform.apply(frame), frame)
+
+def test_export_uses_fixed_raster_or_working_resolution():
+    fixed = FrameTransform.for_export(3840, 2160, _settings(output_width=512, output_height=256, scale_mode="Fit"))
+    assert fixed.canvas == (512, 256)
+    native = FrameTransform.for_export(3840, 2160, _settings(output_width=0, output_height=0, working_resolution=1024))
+    assert native.canvas == (1024, 576)
+
+def test_apply_into_reused_canvas():
+    transform = FrameTransform.for_output(640, 360, _settings(scale_mode="Fit"), 400, 200)
+    rng = np.random.default_rng(0)
+    canvas = None
+    for _ in range(2):
+        frame = rng.integers(0, 256, (360, 640), dtype=np.uint8)
+        if canvas is None: canvas = transform.new_canvas(frame)
+        assert transform.apply(frame, out=canvas) is canvas
+        assert (canvas == transform.apply(frame)).all()
+
+def test_export_svg_size_follows_output_raster(tmp_path, video, settings):
+    for scale_mode in ("Fit", "Fill", "Stretch"):
+        output = tmp_path / scale_mode
+        run_conversion(video, str(output), replace(settings, scale_mode=scale_mode, output_width=100, output_height=40), out_frame=0)
+        width, height, subpaths = parse_svg_paths((output / "00001.svg").read_text())
+        assert (width, height) == (100, 40) and subpaths
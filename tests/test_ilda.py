@@ -0,0 +1,54 @@
+import numpy as np
+
+from video2svg.ilda import COMPANY, FORMAT_TRUE_COLOR_2D, HEADER, RECORD, STATUS_BLANKED, STATUS_LAST_POINT, IldaWriter, frame_records
+
+# A closed square and an open line; a large spacing keeps one point per segment
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><path d="M10 10 L90 10 L90 90 L10 90 Z M20 50 L80 50"/></svg>'
+
+def _read_frames(path):
+    """(header fields, records) of every frame, including the closing zero-record header."""
+    data = open(path, "rb").read()
+    frames, offset = [], 0
+    while offset < len(data):
+        fields = HEADER.unpack_from(data, offset)
+        offset += HEADER.size
+        records = np.frombuffer(data, RECORD, fields[4], offset)
+        offset += records.nbytes
+        frames.append((fields, records))
+    return frames
+
+def test_frame_records_blanking():
+    records = np.frombuffer(frame_records(SVG, "#ff8000", 1000), RECORD)
+    assert len(records) == 6 + 3 # Square: blanked move, start, 3 corners, back to start; line: blanked move, 2 points
+    blanked = (records["status"] & STATUS_BLANKED) != 0
+    assert blanked.tolist() == [True, False, False, False, False, False, True, False, False]
+    assert (records["r"][blanked] == 0).all() and (records["r"][~blanked] == 255).all() and (records["g"][~blanked] == 0x80).all()
+    assert ((records["status"] & STATUS_LAST_POINT) != 0).tolist() == [False] * 8 + [True]
+    # Centered, y up, the longer side spanning the int16 range
+    assert (records["x"][0], records["y"][0]) == (-26214, 26214)
+    assert (records["x"][-1], records["y"][-1]) == (19660, 0)
+
+def test_empty_frame_has_one_dark_point():
+    records = np.frombuffer(frame_records('<svg viewBox="0 0 10 10"></svg>', "#fff", 1), RECORD)
+    assert len(records) == 1 and records["status"][0] == STATUS_BLANKED | STATUS_LAST_POINT
+
+def test_writer_round_trip_and_resume(tmp_path):
+    path = str(tmp_path / "out.ild")
+    first, second = frame_records(SVG, "#ffffff", 1000), frame_records(SVG, "#00ff00", 1000)
+    writer = IldaWriter(path)
+    writer.write("00001.svg", first)
+    writer.write("00002.svg", first)
+    writer.close()
+
+    writer = IldaWriter(path, keep_frames=1) # Drops the second frame and the closing header
+    writer.write("00002.svg", second)
+    writer.close()
+
+    frames = _read_frames(path)
+    assert len(frames) == 3
+    for number, (fields, records) in enumerate(frames[:2]):
+        signature, format_code, name, company, count, frame_number, total, projector = fields
+        assert (signature, format_code, company) == (b"ILDA", FORMAT_TRUE_COLOR_2D, COMPANY.ljust(8, b"\0"))
+        assert (name.rstrip(b"\0"), count, frame_number, total, projector) == (f"{number + 1:05d}".encode(), 9, number, 2, 0)
+    assert frames[0][1].tobytes() == first and frames[1][1].tobytes() == second
+    assert frames[2][0][4:7] == (0, 2, 2) # Closing header: no records
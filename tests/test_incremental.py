@@ -0,0 +1,56 @@
+import os
+from dataclasses import replace
+
+import numpy as np
+
+from video2svg.engine import run_conversion
+from video2svg.incremental import (ACTION_RESTYLED, ACTION_SKIPPED, ACTION_TRACED, MANIFEST_FILENAME, FrameManifest,
+                                   frame_entry, hash_trace_params, plan_frame)
+from video2svg.outputs import FORMAT_ILDA
+from video2svg.settings import ConversionSettings
+
+from conftest import CLIP_FRAMES
+
+EDGES = np.zeros((8, 8), np.uint8)
+
+def test_trace_hash_covers_geometry_not_styling():
+    base = ConversionSettings()
+    for change in ({"multipass": True}, {"tracer": "in-process"}, {"turdsize": 5}, {"point_budget": 100}, {"svg_compact": True},
+                   {"output_format": FORMAT_ILDA}, {"ilda_point_spacing": 2.0}, {"temporal": True}):
+        assert hash_trace_params(replace(base, **change)) != hash_trace_params(base), change
+    assert hash_trace_params(replace(base, stroke_color="#ff0000")) == hash_trace_params(base)
+
+def test_plan_frame(tmp_path):
+    svg = tmp_path / "00001.svg"
+    settings = ConversionSettings()
+    entry = frame_entry(EDGES, settings)
+    assert plan_frame(None, entry, str(svg)) == ACTION_TRACED
+    assert plan_frame(entry, entry, str(svg)) == ACTION_TRACED # Recorded, but the file is gone
+    svg.write_text("<svg/>")
+    assert plan_frame(entry, entry, str(svg)) == ACTION_SKIPPED
+    assert plan_frame(entry, frame_entry(EDGES, replace(settings, stroke_color="#ff0000")), str(svg)) == ACTION_RESTYLED
+    assert plan_frame(entry, frame_entry(EDGES, replace(settings, multipass=True)), str(svg)) == ACTION_TRACED
+    changed = EDGES.copy(); changed[3, 3] = 255
+    assert plan_frame(entry, frame_entry(changed, settings), str(svg)) == ACTION_TRACED
+
+def test_manifest_round_trip(tmp_path):
+    manifest = FrameManifest(str(tmp_path))
+    manifest.record("00001.svg", {"edges": "a", "trace": "b", "stroke_color": "#000000"})
+    manifest.save()
+    assert FrameManifest.load(str(tmp_path)).get("00001.svg") == {"edges": "a", "trace": "b", "stroke_color": "#000000"}
+    (tmp_path / MANIFEST_FILENAME).write_text("{not json")
+    assert FrameManifest.load(str(tmp_path)).frames == {}
+
+def test_incremental_rerun(tmp_path, video, settings):
+    output = str(tmp_path / "out")
+    settings = replace(settings, incremental=True)
+    assert run_conversion(video, output, settings) == {ACTION_TRACED: CLIP_FRAMES}
+    assert run_conversion(video, output, settings) == {ACTION_SKIPPED: CLIP_FRAMES}
+
+    recolored = replace(settings, stroke_color="#ff0000")
+    assert run_conversion(video, output, recolored) == {ACTION_RESTYLED: CLIP_FRAMES}
+    with open(os.path.join(output, "00001.svg")) as f: assert "#ff0000" in f.read()
+
+    os.remove(os.path.join(output, "00004.svg"))
+    assert run_conversion(video, output, recolored) == {ACTION_SKIPPED: CLIP_FRAMES - 1, ACTION_TRACED: 1}
+    assert run_conversion(video, output, replace(recolored, multipass=True)) == {ACTION_TRACED: CLIP_FRAMES}
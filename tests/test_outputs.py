@@ -0,0 +1,53 @@
+import os
+import zipfile
+
+import pytest
+
+from video2svg.outputs import FORMAT_ILDA, FORMAT_SVG, FORMAT_ZIP, ZipBundleWriter, open_stream, stream_path
+from video2svg.settings import ConversionSettings
+
+def _write(path, count, keep_frames=0, first=1):
+    writer = ZipBundleWriter(path, keep_frames)
+    for i in range(first, first + count): writer.write(f"{i:05d}.svg", f"<svg>{i}</svg>".encode())
+    return writer
+
+def test_stream_path_and_writer_choice(tmp_path):
+    folder = str(tmp_path / "clip")
+    os.makedirs(folder)
+    assert stream_path(folder, FORMAT_ZIP) == os.path.join(folder, "clip.zip")
+    assert open_stream(folder, ConversionSettings(output_format=FORMAT_SVG)) is None
+    writer = open_stream(folder, ConversionSettings(output_format=FORMAT_ZIP))
+    assert isinstance(writer, ZipBundleWriter)
+    writer.close()
+    writer = open_stream(folder, ConversionSettings(output_format=FORMAT_ILDA))
+    writer.close()
+    assert os.path.exists(os.path.join(folder, "clip.ild"))
+
+def test_zip_resume_keeps_first_frames(tmp_path):
+    path = str(tmp_path / "out.zip")
+    _write(path, 3).close()
+    _write(path, 2, keep_frames=2, first=3).close()
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["00001.svg", "00002.svg", "00003.svg", "00004.svg"]
+        assert archive.getinfo("00001.svg").compress_type == zipfile.ZIP_STORED
+        assert archive.read("00003.svg") == b"<svg>3</svg>" and archive.testzip() is None
+
+def test_zip_resume_after_hard_kill(tmp_path):
+    path = str(tmp_path / "out.zip")
+    writer = _write(path, 4)
+    written = open(path, "rb").read() # What a kill leaves: the flushed entries, no central directory
+    writer.close()
+    with open(path, "wb") as f: f.write(written + b"PK\x03\x04cut off") # ... and one entry cut off
+    with pytest.raises(zipfile.BadZipFile): zipfile.ZipFile(path)
+
+    _write(path, 1, keep_frames=3, first=4).close()
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["00001.svg", "00002.svg", "00003.svg", "00004.svg"]
+        assert [archive.read(name) for name in archive.namelist()] == [f"<svg>{i}</svg>".encode() for i in range(1, 5)]
+
+def test_zip_resume_with_missing_frames_leaves_archive(tmp_path):
+    path = str(tmp_path / "out.zip")
+    _write(path, 2).close()
+    before = open(path, "rb").read()
+    with pytest.raises(IOError, match="only 2 of the 5"): ZipBundleWriter(path, keep_frames=5)
+    assert open(path, "rb").read() == before and not os.path.exists(path + ".resume")
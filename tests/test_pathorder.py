@@ -0,0 +1,73 @@
+import csv
+import math
+import random
+from dataclasses import replace
+
+import pytest
+
+from video2svg.budget import REPORT_FILENAME
+from video2svg.engine import run_conversion
+from video2svg.pathorder import PointGrid, optimize_order, path_end, reverse_subpath, travel_distance
+from video2svg.svgpath import Subpath, parse_svg_paths
+
+from conftest import CLIP_FRAMES
+
+def _line(a, b):
+    return Subpath(a, [('L', b)], False)
+
+def _square(x, y, size=2):
+    return Subpath((x, y), [('L', (x + size, y)), ('L', (x + size, y + size)), ('L', (x, y + size))], True)
+
+def test_reverse_subpath():
+    path = Subpath((0, 0), [('L', (1, 0)), ('C', (2, 0), (3, 1), (3, 2))], False)
+    reversed_path = reverse_subpath(path)
+    assert reversed_path.start == (3, 2) and path_end(reversed_path) == (0, 0)
+    assert reversed_path.segments == [('C', (3, 1), (2, 0), (1, 0)), ('L', (0, 0))]
+    assert reverse_subpath(reversed_path) == path
+
+def test_travel_distance():
+    assert travel_distance([_line((0, 0), (1, 0)), _line((4, 4), (5, 5)), _square(5, 5)]) == pytest.approx(5.0)
+    assert travel_distance([_square(0, 0), _square(3, 4)]) == pytest.approx(5.0) # Closed paths end at their start
+
+def test_grid_nearest_with_removal():
+    rng = random.Random(1)
+    points = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(200)]
+    grid = PointGrid(points, 10)
+    for _ in range(50):
+        x, y = rng.uniform(-20, 120), rng.uniform(-20, 120)
+        nearest = grid.nearest(x, y)
+        alive = [i for i in range(len(points)) if grid.alive[i]]
+        assert math.dist(points[nearest], (x, y)) == pytest.approx(min(math.dist(points[i], (x, y)) for i in alive))
+        grid.remove(nearest)
+
+def test_optimize_reduces_travel_and_keeps_paths():
+    rng = random.Random(0)
+    paths = [_line((rng.uniform(0, 500), rng.uniform(0, 500)), (rng.uniform(0, 500), rng.uniform(0, 500))) for _ in range(60)]
+    paths += [_square(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(20)]
+    ordered, before, after = optimize_order(paths)
+    assert before == pytest.approx(travel_distance(paths)) and after == pytest.approx(travel_distance(ordered))
+    assert after < before / 2
+    # Every path is drawn once, open ones possibly reversed; closed ones are never changed
+    canonical = lambda p: p if p.closed else min(p, reverse_subpath(p))
+    assert sorted(map(canonical, ordered)) == sorted(map(canonical, paths))
+
+def test_optimize_reverses_lines_to_chain_them():
+    paths = [_line((0, 0), (10, 0)), _line((20, 0), (10, 0)), _line((20, 0), (30, 0))]
+    ordered, before, after = optimize_order(paths)
+    assert (before, after) == (pytest.approx(20.0), 0.0)
+    assert [p.start for p in ordered] == [(0, 0), (10, 0), (20, 0)]
+
+def test_optimize_never_worse_than_scan_order():
+    paths = [_line((i * 10, 0), (i * 10 + 5, 0)) for i in range(10)] # Already optimal
+    ordered, before, after = optimize_order(paths)
+    assert after <= before
+
+def test_report_records_travel_saved(tmp_path, video, settings):
+    output = tmp_path / "out"
+    run_conversion(video, str(output), replace(settings, optimize_paths=True))
+    with open(output / REPORT_FILENAME, newline="") as f: rows = list(csv.DictReader(f))
+    assert len(rows) == CLIP_FRAMES
+    assert all(float(row["travel_after"]) <= float(row["travel_before"]) for row in rows)
+    # The frames on disk are the reordered ones the report describes
+    _, _, subpaths = parse_svg_paths((output / "00001.svg").read_text())
+    assert travel_distance(subpaths) == pytest.approx(float(rows[0]["travel_after"]), abs=0.1)
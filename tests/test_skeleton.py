@@ -0,0 +1,35 @@
+import numpy as np
+
+from video2svg.skeleton import skeleton_polylines, thin_edges, zhang_suen_thinning
+
+def test_thinning_bar():
+    image = np.zeros((7, 14), np.uint8)
+    image[2:5, 2:12] = 255
+    expected = np.zeros_like(image)
+    expected[3, 3:10] = 255
+    assert (zhang_suen_thinning(image) == expected).all()
+
+def test_thinning_cross_splits_at_junction():
+    image = np.zeros((12, 12), np.uint8)
+    image[5:8, 1:11] = 1
+    image[1:11, 5:8] = 1
+    skeleton = zhang_suen_thinning(image)
+    assert (skeleton[6, 2:9] == 255).all() and (skeleton[2:9, 6] == 255).all()
+    assert np.count_nonzero(skeleton) == 13
+    polylines = skeleton_polylines(skeleton > 0)
+    assert len(polylines) == 4 and not any(closed for _, closed in polylines)
+    assert all((6, 6) in {tuple(p) for p in (points[0], points[-1])} for points, _ in polylines) # Every branch ends at the junction
+
+def test_thin_edges_merges_parallel_lines():
+    edges = np.zeros((12, 30), np.uint8)
+    edges[5, 3:27] = edges[7, 3:27] = 255 # Both sides of a 1 px gap, as Canny outlines a thin line
+    polylines = skeleton_polylines(thin_edges(edges) > 0)
+    assert len(polylines) == 1 and not polylines[0][1]
+    assert np.ptp(polylines[0][0][:, 1]) <= 1
+
+def test_skeleton_loop_is_closed():
+    image = np.zeros((20, 20), np.uint8)
+    image[4:15, 4:15] = 255
+    image[7:12, 7:12] = 0
+    polylines = skeleton_polylines(zhang_suen_thinning(image) > 0)
+    assert len(polylines) == 1 and polylines[0][1]
@@ -0,0 +1,45 @@
+import pytest
+
+from video2svg.svgpath import _parse_subpaths, compact_svg, parse_svg_paths
+
+# Shaped like potrace output: flipped, scaled group transform, relative commands and implicit repeats
+POTRACE_SVG = """<?xml version="1.0" standalone="no"?>
+<svg version="1.0" xmlns="http://www.w3.org/2000/svg" width="100pt" height="50pt" viewBox="0 0 100 50" preserveAspectRatio="xMidYMid meet">
+<g transform="translate(0.000000,50.000000) scale(0.100000,-0.100000)" fill="#000000" stroke="none">
+<path d="M100 200 l50 0 0 100 c10 0 20 10 20 20 z m5 5 h10 v-10"/>
+<path d="M10 10 L20 10 30 10"/>
+</g>
+</svg>
+"""
+
+def _points(subpath):
+    return [subpath.start] + [p for segment in subpath.segments for p in segment[1:]]
+
+def test_parse_potrace_path():
+    width, height, subpaths = parse_svg_paths(POTRACE_SVG)
+    assert (width, height) == (100, 50)
+    assert [s.closed for s in subpaths] == [True, False, False]
+    assert [[segment[0] for segment in s.segments] for s in subpaths] == [['L', 'L', 'C'], ['L', 'L'], ['L', 'L']]
+    # Implicit lineto after a relative moveto, relative curve control points
+    assert _points(subpaths[0]) == pytest.approx([(10, 30), (15, 30), (15, 20), (16, 20), (17, 19), (17, 18)])
+    # A relative moveto after closepath is relative to the closed subpath's start
+    assert _points(subpaths[1]) == pytest.approx([(10.5, 29.5), (11.5, 29.5), (11.5, 30.5)])
+    # Implicit absolute linetos
+    assert _points(subpaths[2]) == pytest.approx([(1, 49), (2, 49), (3, 49)])
+
+def test_compact_svg_round_trip():
+    width, height, subpaths = parse_svg_paths(POTRACE_SVG)
+    _, _, reparsed = parse_svg_paths(compact_svg(width, height, subpaths, "#ff0000", precision=3))
+    assert [s.closed for s in reparsed] == [s.closed for s in subpaths]
+    for before, after in zip(subpaths, reparsed):
+        assert _points(after) == pytest.approx(_points(before), abs=1e-3)
+
+def test_drawing_after_closepath_starts_at_subpath_start():
+    subpaths = _parse_subpaths("M1 1 L2 1 Z L3 3 l1 0 z", (1, 1, 0, 0))
+    assert [(s.start, s.segments, s.closed) for s in subpaths] == [
+        ((1, 1), [('L', (2, 1))], True), ((1, 1), [('L', (3, 3)), ('L', (4, 3))], True)]
+
+@pytest.mark.parametrize("data", ["M0 0 L1 1 Z 5 5", "M0 0 S1 1 2 2", "M0 0 Q1 1 2 2", "M0 0 T1 1", "M0 0 A1 1 0 0 1 2 2"])
+def test_rejects_unsupported_path_data(data):
+    with pytest.raises(ValueError):
+        _parse_subpaths(data, (1, 1, 0, 0))
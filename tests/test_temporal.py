@@ -0,0 +1,66 @@
+import csv
+from dataclasses import replace
+
+from video2svg.budget import REPORT_FILENAME
+from video2svg.engine import run_conversion
+from video2svg.pathorder import path_end
+from video2svg.svgpath import Subpath
+from video2svg.temporal import TemporalAligner, align_start, centroid, rotate_closed
+
+from conftest import CLIP_FRAMES, HOLD
+
+def _square(x, y, size=10):
+    return Subpath((x, y), [('L', (x + size, y)), ('L', (x + size, y + size)), ('L', (x, y + size))], True)
+
+def _vertices(subpath):
+    return [subpath.start] + [segment[-1] for segment in subpath.segments]
+
+def test_centroid():
+    assert centroid(_square(0, 0)) == (5, 5)
+    assert centroid(Subpath((0, 0), [('C', (9, 9), (9, 9), (4, 2))], False)) == (2, 1) # Control points don't count
+
+def test_rotate_closed():
+    square = _square(0, 0)
+    rotated = rotate_closed(square, 2)
+    assert rotated.start == (10, 10)
+    assert _vertices(rotated) == [(10, 10), (0, 10), (0, 0), (10, 0), (10, 10)]
+    assert rotate_closed(square, 0) == square and rotate_closed(square, 4) == square
+
+def test_align_start():
+    reference = _square(0, 0)
+    # A later frame's square, traced from another corner and the other way round
+    shifted = Subpath((11, 12), [('L', (11, 2)), ('L', (1, 2)), ('L', (1, 12))], True)
+    aligned = align_start(shifted, reference)
+    assert aligned.start == (1, 2)
+    assert _vertices(aligned)[:4] == [(1, 2), (11, 2), (11, 12), (1, 12)]
+    # Open paths are only reversed, to start near the reference's start
+    line = Subpath((20, 0), [('L', (1, 1))], False)
+    assert align_start(line, reference).start == (1, 1) and path_end(align_start(line, reference)) == (20, 0)
+
+def test_aligner_keeps_previous_order():
+    aligner = TemporalAligner()
+    first = [_square(0, 0), _square(50, 0), _square(0, 50)]
+    assert aligner.align(first, 100, 100) == (first, 0)
+    # The same shapes moved a little, traced in another order and from other corners
+    second = [rotate_closed(_square(1, 51), 3), rotate_closed(_square(51, 1), 1), _square(1, 1)]
+    aligned, matched = aligner.align(second, 100, 100)
+    assert matched == 3
+    assert [min(_vertices(s)) for s in aligned] == [(1, 1), (51, 1), (1, 51)]
+    assert [s.start for s in aligned] == [(1, 1), (51, 1), (1, 51)]
+
+def test_aligner_counts_only_nearby_matches():
+    aligner = TemporalAligner()
+    aligner.align([_square(0, 0), _square(50, 50)], 100, 100)
+    new = _square(90, 0)
+    aligned, matched = aligner.align([new, _square(51, 50)], 100, 100)
+    assert matched == 1
+    assert aligned[-1] == new # Unmatched paths follow the matched ones
+
+def test_report_records_matches(tmp_path, video, settings):
+    output = tmp_path / "out"
+    run_conversion(video, str(output), replace(settings, temporal=True))
+    with open(output / REPORT_FILENAME, newline="") as f: rows = list(csv.DictReader(f))
+    assert len(rows) == CLIP_FRAMES
+    # Held frames match every path of the frame before; the shapes jump further than MATCH_RADIUS when the picture moves
+    matched = [int(row["matched"]) for row in rows]
+    assert all((count > 0) == (i % HOLD != 0) for i, count in enumerate(matched))
@@ -0,0 +1 @@
+"""Video to SVG conversion pipeline, usable without the Tkinter GUI."""
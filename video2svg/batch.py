@@ -0,0 +1,189 @@
+"""
+Batch queue: converts many videos / segments listed in a JSON or CSV manifest.
+
+JSON manifests are either a list of jobs or {"settings": {...}, "jobs": [...]},
+where the top-level settings are defaults for every job:
+
+    {"settings": {"threshold1": 40, "stroke_color": "#00ff00"},
+     "jobs": [{"video": "show.mp4", "output": "out/intro", "in": "00:00:00", "out": "00:00:30"},
+              {"video": "show.mp4", "output": "out/chorus", "in": "00:01:10", "out": "00:01:40",
+               "settings": {"zoom": 1.5}}]}
+
+CSV manifests have video, output, in and out columns; any other column is a
+ConversionSettings field (empty cells keep the default). Relative paths are
+resolved against the manifest's folder.
+
+All jobs share one worker pool. Jobs on the same source video share one decoder:
+overlapping ranges are decoded once and each frame is handed to every job that
+wants it. Progress is persisted to a state file so an interrupted batch resumes
+at the first frame that was not written yet. Jobs with incremental=true also
+keep a per-folder frame manifest (see video2svg.incremental), so a --restart
+after a color-only change restyles instead of re-tracing. Deduplication
+(dedup=true) works per job, against that job's previous output frame.
+"""
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from video2svg.decode import ThreadedFrameReader, open_video
+from video2svg.engine import BoundedFramePool, SequenceWriter, timecode_to_frame
+from video2svg.metrics import RunMetrics, recording
+from video2svg.settings import ConversionSettings
+
+JOB_KEYS = ("video", "output", "in", "out")
+STATE_SAVE_INTERVAL = 1.0 # Seconds between state file writes while frames complete
+
+@dataclass
+class BatchJob:
+    video: str
+    output: str
+    in_time: Union[str, int, None] = None # Timecode or frame number; None = first frame
+    out_time: Union[str, int, None] = None # None = last frame
+    settings: ConversionSettings = field(default_factory=ConversionSettings)
+    # Resolved when the batch runs
+    in_frame: int = 0
+    out_frame: int = -1
+    total: Optional[int] = None # Frames to write; None until resolved, 0 for an empty range (done at once)
+    completed: int = 0 # Output files written, always a contiguous 00001..N prefix
+
+    @property
+    def key(self):
+        return os.path.abspath(self.output)
+
+    @property
+    def is_done(self):
+        return self.total is not None and self.completed >= self.total
+
+    def output_index(self, frame_num):
+        """1-based SVG index for a source frame, or None if this job doesn't want it (any more)."""
+        if frame_num < self.in_frame or frame_num > self.out_frame: return None
+        offset = frame_num - self.in_frame
+        if offset % self.settings.frame_step: return None
+        index = offset // self.settings.frame_step + 1
+        return index if index > self.completed else None
+
+    def next_frame(self):
+        return self.in_frame + self.completed * self.settings.frame_step
+
+def _frame_value(value):
+    """Manifest in/out values: ints (or digit strings) are frame numbers, anything else a timecode."""
+    if value is None or value == "": return None
+    if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()): return int(value)
+    return str(value)
+
+def _make_job(values, default_settings, base_dir, tracer_default):
+    values = dict(values)
+    missing = [k for k in ("video", "output") if not values.get(k)]
+    if missing: raise ValueError(f"Manifest job is missing: {', '.join(missing)}")
+    job_settings = dict(default_settings)
+    job_settings.update(values.pop("settings", None) or {})
+    job_settings.update({k: v for k, v in values.items() if k not in JOB_KEYS}) # Flat CSV columns
+    job_settings.setdefault("tracer", tracer_default)
+    settings = ConversionSettings.from_dict(job_settings)
+    settings.frame_step = max(1, settings.frame_step)
+    in_time, out_time = _frame_value(values.get("in")), _frame_value(values.get("out"))
+    # Timecodes need the video's frame rate; an inverted timecode range resolves to an empty, done job
+    if isinstance(in_time, int) and isinstance(out_time, int) and in_time > out_time:
+        raise ValueError(f"Manifest job {values['output']}: in frame {in_time} is after out frame {out_time}")
+    return BatchJob(
+        video=os.path.join(base_dir, values["video"]), output=os.path.join(base_dir, values["output"]),
+        in_time=in_time, out_time=out_time, settings=settings,
+    )
+
+def load_manifest(path, tracer_default=None):
+    """Reads a .json or .csv manifest into a list of BatchJobs."""
+    base_dir = os.path.dirname(os.path.abspath(path))
+    tracer_default = tracer_default or ConversionSettings().tracer
+    if path.lower().endswith(".csv"):
+        with open(path, newline="") as f:
+            rows = [{k.strip(): v for k, v in row.items() if k} for row in csv.DictReader(f)]
+        jobs = [_make_job(row, {}, base_dir, tracer_default) for row in rows]
+    else:
+        with open(path) as f: manifest = json.load(f)
+        if isinstance(manifest, list): manifest = {"jobs": manifest}
+        defaults = manifest.get("settings", {})
+        jobs = [_make_job(job, defaults, base_dir, tracer_default) for job in manifest.get("jobs", [])]
+
+    keys = [job.key for job in jobs]
+    duplicates = sorted({k for k in keys if keys.count(k) > 1})
+    if duplicates: raise ValueError(f"Jobs must write to distinct output folders: {', '.join(duplicates)}")
+    return jobs
+
+def load_state(state_path):
+    if not state_path or not os.path.exists(state_path): return {}
+    with open(state_path) as f: return json.load(f).get("jobs", {})
+
+def save_state(state_path, jobs):
+    if not state_path: return
+    state = {"jobs": {job.key: {"video": job.video, "completed": job.completed, "total": job.total} for job in jobs}}
+    temp_path = state_path + ".tmp"
+    with open(temp_path, "w") as f: json.dump(state, f, indent=2)
+    os.replace(temp_path, state_path) # Atomic, so a crash never leaves a half-written state file
+
+def _decode_spans(jobs):
+    """Groups jobs with overlapping remaining frame ranges so each span is decoded once."""
+    spans = []
+    for job in sorted(jobs, key=lambda j: j.next_frame()):
+        if spans and job.next_frame() <= spans[-1][1] + 1:
+            spans[-1][1] = max(spans[-1][1], job.out_frame); spans[-1][2].append(job)
+        else:
+            spans.append([job.next_frame(), job.out_frame, [job]])
+    return spans
+
+def run_batch(jobs, pool_size, state_path=None, progress_callback=None, metrics=None):
+    """
+    Runs every job in the queue, skipping frames already recorded in state_path.
+    progress_callback(job, completed, total) is called after each frame is written;
+    metrics (a video2svg.metrics.RunMetrics) collects stage timings for the whole
+    batch, and is what each job's run report summarizes.
+    Worker and decode errors are re-raised after the state file is saved, so the
+    batch can be re-run to resume.
+    """
+    saved = load_state(state_path)
+    for job in jobs: job.completed = saved.get(job.key, {}).get("completed", 0)
+
+    by_video = {}
+    for job in jobs: by_video.setdefault(os.path.abspath(job.video), []).append(job)
+
+    writers = {}
+    if metrics is None: metrics = RunMetrics()
+    metrics.parallelism = max(1, pool_size)
+
+    last_save = time.monotonic()
+    def frame_done(job):
+        nonlocal last_save
+        job.completed += 1
+        if progress_callback: progress_callback(job, job.completed, job.total)
+        if job.is_done or time.monotonic() - last_save >= STATE_SAVE_INTERVAL:
+            save_state(state_path, jobs); last_save = time.monotonic()
+
+    try:
+        with recording(metrics), BoundedFramePool(pool_size) as pool:
+            for video_path, video_jobs in by_video.items():
+                decoder = open_video(video_path, video_jobs[0].settings.decoder, gray=True)
+                try:
+                    fps, total_frames = decoder.fps, decoder.total_frames
+                    for job in video_jobs:
+                        job.in_frame = timecode_to_frame(job.in_time if job.in_time is not None else 0, fps, total_frames)
+                        job.out_frame = timecode_to_frame(job.out_time if job.out_time is not None else total_frames - 1, fps, total_frames)
+                        job.total = len(range(job.in_frame, job.out_frame + 1, job.settings.frame_step))
+                        if not job.is_done: writers[job.key] = SequenceWriter(job.output, job.settings, lambda _, job=job: frame_done(job), job.completed, metrics)
+
+                    for start, end, span_jobs in _decode_spans([job for job in video_jobs if not job.is_done]):
+                        step = span_jobs[0].settings.frame_step if len(span_jobs) == 1 else 1
+                        with ThreadedFrameReader(decoder, start, end, step) as frames:
+                            for frame_num, frame in frames:
+                                for job in span_jobs:
+                                    index = job.output_index(frame_num)
+                                    if index is None: continue
+                                    writers[job.key].submit(pool, index, frame)
+                finally:
+                    decoder.close()
+            pool.drain()
+    finally:
+        save_state(state_path, jobs)
+        for writer in writers.values(): writer.close()
+    return jobs
@@ -0,0 +1,219 @@
+"""
+Headless command-line entry point. Imports no GUI modules, so it runs on render
+nodes without a display:
+
+    python -m video2svg convert in.mp4 -o out_dir --in 00:01:00 --out 00:02:00
+    python -m video2svg batch playlist.json --jobs 16
+    python -m video2svg live 0 --to tcp://127.0.0.1:9000 --payload points
+"""
+import argparse
+import cProfile
+import json
+import os
+import sys
+
+from video2svg.batch import load_manifest, run_batch
+from video2svg.decode import DECODER_CHOICES, open_video
+from video2svg.edges import EDGE_DETECTORS
+from video2svg.engine import run_conversion, timecode_to_frame
+from video2svg.live import DEFAULT_LATENCY_BUDGET_MS, PAYLOAD_SVG, PAYLOADS, LiveConverter, open_sink, open_source
+from video2svg.metrics import RunMetrics
+from video2svg.outputs import OUTPUT_FORMATS
+from video2svg.settings import DEDUP_MODES, SCALE_MODES, ConversionSettings, parse_output_size
+from video2svg.tracing import TRACER_CHOICES, TRACER_INPROCESS, TRACER_POTRACE, is_potrace_installed
+
+def _crop_arg(value):
+    try:
+        x1, y1, x2, y2 = (int(v) for v in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected X1,Y1,X2,Y2 in source pixels")
+    return (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+def _size_arg(value):
+    try:
+        return parse_output_size(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected WIDTHxHEIGHT (e.g. 512x512) or 'native'")
+
+def add_settings_arguments(parser):
+    """Adds one option per ConversionSettings field, defaulting to the GUI defaults."""
+    defaults = ConversionSettings()
+    framing = parser.add_argument_group("framing")
+    framing.add_argument("--zoom", type=float, default=defaults.zoom, help="1.0-4.0 (default: %(default)s)")
+    framing.add_argument("--x-offset", type=float, default=defaults.x_offset, help="-100..100 pan (default: %(default)s)")
+    framing.add_argument("--y-offset", type=float, default=defaults.y_offset, help="-100..100 pan (default: %(default)s)")
+    framing.add_argument("--crop", type=_crop_arg, default=defaults.crop, metavar="X1,Y1,X2,Y2", help="crop rectangle in source pixels; overrides pan/zoom")
+    framing.add_argument("--no-square", dest="square", action="store_false", help="keep the source aspect ratio instead of a 1:1 center crop")
+    framing.add_argument("--scale-mode", choices=SCALE_MODES, default=defaults.scale_mode, help="how the framed picture fits the output size (default: %(default)s)")
+    framing.add_argument("--size", dest="output_size", type=_size_arg, default=(defaults.output_width, defaults.output_height), metavar="WxH", help=f"export raster edges are detected and traced on, or 'native' (default: {defaults.output_width}x{defaults.output_height})")
+    framing.add_argument("--working-resolution", type=int, default=defaults.working_resolution, metavar="PIXELS", help="with --size native, downscale the framed image to this long side; 0 = native (default: %(default)s)")
+
+    adjust = parser.add_argument_group("image adjustments")
+    adjust.add_argument("--brightness", type=int, default=defaults.brightness, help="-100..100 (default: %(default)s)")
+    adjust.add_argument("--contrast", type=float, default=defaults.contrast, help="0.1-3.0 (default: %(default)s)")
+    adjust.add_argument("--pre-blur", type=int, default=defaults.pre_blur, help="0-25 (default: %(default)s)")
+    adjust.add_argument("--edge-detector", choices=EDGE_DETECTORS, default=defaults.edge_detector, help="canny-median / canny-otsu pick Canny thresholds per frame; sobel / scharr threshold the gradient at --threshold2; adaptive traces dark line art (default: %(default)s)")
+    adjust.add_argument("--threshold1", type=int, default=defaults.threshold1, help="Canny threshold 1 (default: %(default)s)")
+    adjust.add_argument("--threshold2", type=int, default=defaults.threshold2, help="Canny threshold 2, also the sobel / scharr cutoff (default: %(default)s)")
+    adjust.add_argument("--adaptive-block", type=int, default=defaults.adaptive_block, metavar="PIXELS", help="adaptive detector neighbourhood size (default: %(default)s)")
+    adjust.add_argument("--adaptive-offset", type=int, default=defaults.adaptive_offset, help="how much darker than its neighbourhood a pixel must be to count as a line (default: %(default)s)")
+
+    laser = parser.add_argument_group("laser optimization")
+    laser.add_argument("--multipass", action="store_true", help="centerline tracing: thin the edges to a skeleton and trace it as single-stroke lines")
+    laser.add_argument("--stroke-color", default=defaults.stroke_color, help="SVG stroke color (default: %(default)s)")
+    laser.add_argument("--tracer", choices=TRACER_CHOICES, default=None, help="tracing backend (default: potrace if installed, else in-process)")
+    laser.add_argument("--speckle-removal", dest="turdsize", type=int, default=defaults.turdsize, help="potrace --turdsize (default: %(default)s)")
+    laser.add_argument("--curve-smoothing", dest="opttolerance", type=float, default=defaults.opttolerance, help="potrace --opttolerance (default: %(default)s)")
+    laser.add_argument("--corner-smoothing", dest="alphamax", type=float, default=defaults.alphamax, help="potrace --alphamax (default: %(default)s)")
+    laser.add_argument("--compact-svg", dest="svg_compact", action="store_true", help="write one absolute, rounded path per frame without potrace's metadata and transform")
+    laser.add_argument("--precision", dest="svg_precision", type=int, default=defaults.svg_precision, metavar="DECIMALS", help="coordinate decimals kept by --compact-svg (default: %(default)s)")
+    laser.add_argument("--optimize-paths", action="store_true", help="reorder and reverse paths to minimize blanked laser travel (implies --compact-svg)")
+    laser.add_argument("--temporal", action="store_true", help="keep path order and start points stable from frame to frame to reduce shimmer (implies --compact-svg)")
+    laser.add_argument("--point-budget", type=int, default=defaults.point_budget, metavar="POINTS", help="max points per frame; frames over it are traced with coarser settings and reported in video2svg_points.csv (default: off)")
+
+    export = parser.add_argument_group("export")
+    export.add_argument("--step", dest="frame_step", type=int, default=defaults.frame_step, help="export every Nth frame (default: %(default)s)")
+    export.add_argument("-j", "--jobs", type=int, default=defaults.jobs, help="parallel worker processes (default: %(default)s)")
+    export.add_argument("--incremental", action="store_true", help="keep SVGs that are already up to date (restyle them on a color-only change)")
+    export.add_argument("--dedup", action="store_true", help="reuse the previous SVG when a frame's edges match the last traced frame")
+    export.add_argument("--dedup-tolerance", type=int, default=defaults.dedup_tolerance, metavar="PIXELS", help="differing edge pixels still treated as a duplicate (default: %(default)s)")
+    export.add_argument("--dedup-mode", choices=DEDUP_MODES, default=defaults.dedup_mode, help="how duplicates are written (default: %(default)s, falls back to copy)")
+    export.add_argument("--format", dest="output_format", choices=OUTPUT_FORMATS, default=defaults.output_format, help="svg: one file per frame; zip / ilda: every frame appended to one <output name>.zip / .ild file (default: %(default)s)")
+    export.add_argument("--decoder", choices=DECODER_CHOICES, default=defaults.decoder, help="video decoding backend; auto uses PyAV when installed (default: %(default)s)")
+    export.add_argument("--run-report", action="store_true", help="write per-stage timing histograms and per-frame times to video2svg_run.json / .csv")
+    export.add_argument("--ilda-point-spacing", type=float, default=defaults.ilda_point_spacing, metavar="PIXELS", help="max distance between ILDA points, in output pixels; lower = denser (default: %(default)s)")
+
+def settings_from_args(args):
+    tracer = args.tracer or (TRACER_POTRACE if is_potrace_installed() else TRACER_INPROCESS)
+    return ConversionSettings(
+        zoom=args.zoom, x_offset=args.x_offset, y_offset=args.y_offset, crop=args.crop, square=args.square, scale_mode=args.scale_mode,
+        output_width=args.output_size[0], output_height=args.output_size[1], working_resolution=args.working_resolution,
+        brightness=args.brightness, contrast=args.contrast, pre_blur=args.pre_blur,
+        edge_detector=args.edge_detector, threshold1=args.threshold1, threshold2=args.threshold2, adaptive_block=args.adaptive_block, adaptive_offset=args.adaptive_offset,
+        multipass=args.multipass, stroke_color=args.stroke_color, tracer=tracer, turdsize=args.turdsize, opttolerance=args.opttolerance, alphamax=args.alphamax, point_budget=args.point_budget,
+        svg_compact=args.svg_compact, svg_precision=args.svg_precision, optimize_paths=args.optimize_paths, temporal=args.temporal,
+        frame_step=args.frame_step, jobs=args.jobs, incremental=args.incremental,
+        dedup=args.dedup, dedup_tolerance=args.dedup_tolerance, dedup_mode=args.dedup_mode,
+        output_format=args.output_format, ilda_point_spacing=args.ilda_point_spacing, decoder=args.decoder, run_report=args.run_report,
+    )
+
+def _print_progress(metrics):
+    def report(completed, total):
+        # Pad over the previous, possibly longer, line
+        print(f"\r{metrics.progress_text(completed, total):<100}", end="" if completed < total else "\n", file=sys.stderr, flush=True)
+    return report
+
+def _run_profiled(profile_path, metrics, fn, *args):
+    """Calls fn(*args), under cProfile when profile_path is set; the workers' profiles come back through metrics."""
+    if not profile_path: return fn(*args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args)
+    finally:
+        metrics.dump_profile(profile_path, profiler)
+        print(f"Profile written to {profile_path} (view with: python -m pstats {profile_path})", file=sys.stderr)
+
+def convert_command(args):
+    try:
+        decoder = open_video(args.video, args.decoder)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr); return 1
+    fps, total_frames = decoder.fps, decoder.total_frames
+    decoder.close()
+
+    try:
+        in_frame = timecode_to_frame(args.in_time or 0, fps, total_frames)
+        out_frame = timecode_to_frame(args.out_time or total_frames - 1, fps, total_frames)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr); return 2
+    if in_frame >= out_frame:
+        print("Error: the in point must be before the out point.", file=sys.stderr); return 2
+
+    metrics = RunMetrics(profile=bool(args.profile))
+    actions = _run_profiled(args.profile, metrics, run_conversion, args.video, args.output, settings_from_args(args), in_frame, out_frame, _print_progress(metrics), metrics)
+    summary = metrics.summary()
+    print(f"Success! {sum(actions.values())} frames saved to: {args.output} ({', '.join(f'{n} {a}' for a, n in sorted(actions.items()))}; "
+          f"{summary['fps']:.1f} fps, slowest stage: {summary['bottleneck']})")
+    return 0
+
+def batch_command(args):
+    tracer_default = TRACER_POTRACE if is_potrace_installed() else TRACER_INPROCESS
+    try:
+        jobs = load_manifest(args.manifest, tracer_default)
+    except (OSError, ValueError) as e:
+        print(f"Error: could not read manifest: {e}", file=sys.stderr); return 2
+    state_path = args.state or args.manifest + ".state.json"
+    if args.restart and os.path.exists(state_path): os.remove(state_path)
+
+    def report_progress(job, completed, total):
+        if completed == total: print(f"Done: {job.output} ({total} frames)")
+
+    metrics = RunMetrics(profile=bool(args.profile))
+    _run_profiled(args.profile, metrics, run_batch, jobs, args.jobs, state_path, report_progress, metrics)
+    summary = metrics.summary()
+    print(f"Success! {sum(job.is_done for job in jobs)} of {len(jobs)} jobs complete ({summary['fps']:.1f} fps, slowest stage: {summary['bottleneck']}). Queue state: {state_path}")
+    return 0
+
+def live_command(args):
+    settings = settings_from_args(args)
+    try:
+        decoder, is_live = open_source(args.source, settings.decoder)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr); return 1
+    try:
+        sink = open_sink(args.to)
+    except (OSError, ValueError) as e:
+        decoder.close()
+        print(f"Error: {e}", file=sys.stderr); return 2
+
+    def print_status(converter):
+        print(f"\r{converter.status_text():<100}", end="", file=sys.stderr, flush=True)
+
+    converter = LiveConverter(decoder, sink, settings, args.payload, args.latency_budget, paced=not is_live, loop=args.loop, status_callback=print_status)
+    print(f"Streaming {args.source} to {args.to} ({args.payload}); Ctrl+C stops", file=sys.stderr)
+    try:
+        converter.run()
+    except KeyboardInterrupt:
+        pass # run() has already stopped its threads
+    finally:
+        decoder.close()
+    print(f"\n{converter.status_text()}; {converter.sent} of {converter.captured} captured frames sent", file=sys.stderr)
+    if args.report:
+        with open(args.report, "w") as f: json.dump(converter.report(), f, indent=2)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="video2svg", description="Convert video segments into SVG sequences for laser projectors.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="convert one video range into a folder of SVG frames")
+    convert.add_argument("video", help="input video file")
+    convert.add_argument("-o", "--output", required=True, help="folder the numbered SVG files are written to")
+    convert.add_argument("--in", dest="in_time", metavar="TIMECODE", help="in point, HH:MM:SS[:FF] (default: first frame)")
+    convert.add_argument("--out", dest="out_time", metavar="TIMECODE", help="out point, HH:MM:SS[:FF] (default: last frame)")
+    convert.add_argument("--profile", metavar="FILE", help="profile the run with cProfile (worker processes included) and write pstats data to FILE")
+    add_settings_arguments(convert)
+    convert.set_defaults(func=convert_command)
+
+    batch = subparsers.add_parser("batch", help="convert every job listed in a JSON or CSV manifest, resuming interrupted runs")
+    batch.add_argument("manifest", help="JSON or CSV job manifest (see video2svg/batch.py for the format)")
+    batch.add_argument("-j", "--jobs", type=int, default=ConversionSettings().jobs, help="worker processes shared by all jobs (default: %(default)s)")
+    batch.add_argument("--state", help="queue state file (default: <manifest>.state.json)")
+    batch.add_argument("--restart", action="store_true", help="ignore saved progress and convert every job from the start")
+    batch.add_argument("--profile", metavar="FILE", help="profile the run with cProfile (worker processes included) and write pstats data to FILE")
+    batch.set_defaults(func=batch_command)
+
+    live = subparsers.add_parser("live", help="convert a camera, capture device or video file in real time and stream the frames out")
+    live.add_argument("source", help="camera index (0), capture device (/dev/video2) or video file (played at its frame rate)")
+    live.add_argument("--to", default="-", metavar="OUTPUT", help="- (stdout), tcp://HOST:PORT or unix://PATH (listening sockets) or pipe://PATH (named pipe) (default: %(default)s)")
+    live.add_argument("--payload", choices=PAYLOADS, default=PAYLOAD_SVG, help="send each frame as an SVG or as point lists, one JSON line per frame (default: %(default)s)")
+    live.add_argument("--latency-budget", type=float, default=DEFAULT_LATENCY_BUDGET_MS, metavar="MS", help="drop frames that take longer than this from capture to send; 0 = never (default: %(default)s)")
+    live.add_argument("--loop", action="store_true", help="play a video file source in a loop")
+    live.add_argument("--report", metavar="FILE", help="write per-stage timings, latency percentiles and drop counts to FILE as JSON when stopped")
+    add_settings_arguments(live)
+    live.set_defaults(func=live_command)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,242 @@
+"""
+Video decoding. A decoder gives sequential, seekable access to one video's
+frames, decoding into caller-supplied arrays where the backend allows it:
+
+    opencv  cv2.VideoCapture; always available
+    pyav    PyAV (FFmpeg bindings, `pip install av`): multi-threaded codec
+            decode, and grayscale output converted from the luma plane
+            instead of through BGR
+    auto    pyav when it is installed, else opencv
+
+ThreadedFrameReader runs a decoder on a dedicated thread that fills a ring of
+preallocated frame arrays, so decoding overlaps the rest of the pipeline and
+steady-state reads allocate nothing.
+"""
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from video2svg.metrics import record, stage
+
+try:
+    import av
+except ImportError:
+    av = None
+
+DECODER_AUTO = "auto"
+DECODER_OPENCV = "opencv"
+DECODER_PYAV = "pyav"
+DECODER_CHOICES = (DECODER_AUTO, DECODER_OPENCV, DECODER_PYAV)
+RING_BUFFERS = 8 # Decoded frames the reader thread may run ahead by
+
+class OpenCVDecoder:
+    """cv2.VideoCapture behind the decoder interface; read() decodes straight into `out` when its shape matches."""
+    name = DECODER_OPENCV
+
+    def __init__(self, video_path, gray=False):
+        self._capture = cv2.VideoCapture(video_path)
+        if not self._capture.isOpened(): raise IOError(f"Could not open video file: {video_path}")
+        self.gray = gray
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS) or 30
+        self.total_frames = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width, self.height = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.position = 0 # Index of the frame read() returns next
+        self._bgr = None # Scratch frame for gray output
+
+    def frame_shape(self):
+        return (self.height, self.width) if self.gray else (self.height, self.width, 3)
+
+    def seek(self, frame_num):
+        if frame_num == self.position: return
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        self.position = frame_num
+
+    def read(self, out=None):
+        """The next frame (in `out` when possible), or None at the end of the stream."""
+        if not self.gray:
+            ret, frame = self._capture.read(out) if out is not None else self._capture.read()
+        else:
+            ret, self._bgr = self._capture.read(self._bgr) if self._bgr is not None else self._capture.read()
+            frame = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY, dst=out) if ret else None
+        if not ret: return None
+        self.position += 1
+        return frame
+
+    def skip(self):
+        """Advances one frame without converting it to an image."""
+        if not self._capture.grab(): return False
+        self.position += 1
+        return True
+
+    def close(self):
+        self._capture.release()
+
+class PyAVDecoder:
+    """
+    PyAV behind the decoder interface, with frame- and slice-threaded codec
+    decode. Frames are reformatted once (to bgr24, or gray from the luma plane)
+    and copied into `out`.
+    """
+    name = DECODER_PYAV
+
+    def __init__(self, video_path, gray=False):
+        try:
+            self._container = av.open(video_path)
+            self._stream = self._container.streams.video[0]
+        except Exception as e: # PyAV's error classes differ between versions
+            raise IOError(f"Could not open video file: {video_path} ({e})") from e
+        self._stream.thread_type = "AUTO"
+        self.gray = gray
+        self.fps = float(self._stream.average_rate or self._stream.guessed_rate or 30)
+        self._time_base = float(self._stream.time_base)
+        self._start_pts = self._stream.start_time or 0
+        duration = self._stream.duration * self._time_base if self._stream.duration else (self._container.duration or 0) / 1e6
+        self.total_frames = self._stream.frames or int(round(duration * self.fps))
+        self.width, self.height = self._stream.codec_context.width, self._stream.codec_context.height
+        self.position = 0
+        self._frames = self._container.decode(self._stream)
+        self._pending = None # A frame decoded while seeking, returned by the next read()
+
+    def frame_shape(self):
+        return (self.height, self.width) if self.gray else (self.height, self.width, 3)
+
+    def _index(self, frame):
+        return round((frame.pts - self._start_pts) * self._time_base * self.fps) if frame.pts is not None else self.position
+
+    def seek(self, frame_num):
+        """Seeks to the keyframe before frame_num and decodes forward to it."""
+        if frame_num == self.position: return
+        self._container.seek(self._start_pts + int(frame_num / self.fps / self._time_base), stream=self._stream, backward=True)
+        self._frames = self._container.decode(self._stream)
+        self._pending = None
+        for frame in self._frames:
+            if self._index(frame) >= frame_num:
+                self._pending = frame; break
+        self.position = frame_num
+
+    def _next(self):
+        frame, self._pending = self._pending, None
+        return frame if frame is not None else next(self._frames, None)
+
+    def read(self, out=None):
+        frame = self._next()
+        if frame is None: return None
+        self.position += 1
+        image = frame.reformat(format="gray" if self.gray else "bgr24")
+        plane = image.planes[0]
+        channels = 1 if self.gray else 3
+        # Rows are padded to line_size; view the frame without them, then copy it out once.
+        rows = np.frombuffer(plane, np.uint8).reshape(image.height, plane.line_size)[:, :image.width * channels]
+        pixels = rows.reshape((image.height, image.width) if self.gray else (image.height, image.width, 3))
+        if out is not None and out.shape == pixels.shape:
+            np.copyto(out, pixels); return out
+        return pixels.copy()
+
+    def skip(self):
+        if self._next() is None: return False
+        self.position += 1
+        return True
+
+    def close(self):
+        self._container.close()
+
+def open_video(video_path, backend=DECODER_AUTO, gray=False):
+    """A decoder for video_path; raises IOError when it can't be opened, ValueError for an unknown or missing backend."""
+    if backend == DECODER_AUTO: backend = DECODER_PYAV if av is not None else DECODER_OPENCV
+    if backend == DECODER_PYAV:
+        if av is None: raise ValueError("The pyav decoder needs PyAV: pip install av")
+        return PyAVDecoder(video_path, gray)
+    if backend == DECODER_OPENCV: return OpenCVDecoder(video_path, gray)
+    raise ValueError(f"Unknown decoder: {backend}")
+
+def read_frames(decoder, start_frame, end_frame, step=1, out=None):
+    """
+    Yields (frame_num, frame) pairs from start_frame to end_frame (inclusive) on
+    the calling thread. Seeks once and then decodes forward; frames skipped by
+    the step are never converted to an image. Stops early at the end of the stream.
+    """
+    step = max(1, int(step))
+    with stage("seek"): decoder.seek(start_frame)
+    frame_num = start_frame
+    while frame_num <= end_frame:
+        with stage("decode"): frame = decoder.read(out)
+        if frame is None: return
+        yield frame_num, frame
+        for _ in range(step - 1):
+            frame_num += 1
+            if frame_num > end_frame: return
+            with stage("decode"): ret = decoder.skip()
+            if not ret: return
+        frame_num += 1
+
+class ThreadedFrameReader:
+    """
+    Iterates like read_frames(), but decodes on a dedicated thread into a ring of
+    `buffers` preallocated arrays. A yielded frame stays valid until the
+    consumer asks for the next one; keep a copy of anything that must outlive
+    that. Decode errors are re-raised from the iteration.
+    """
+    def __init__(self, decoder, start_frame, end_frame, step=1, buffers=RING_BUFFERS):
+        self.decoder = decoder
+        self._ring = [np.empty(decoder.frame_shape(), np.uint8) for _ in range(max(2, buffers))]
+        self._free = queue.Queue()
+        for slot in range(len(self._ring)): self._free.put(slot)
+        self._filled = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._decode_loop, args=(start_frame, end_frame, step), daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _decode_loop(self, start_frame, end_frame, step):
+        try:
+            step = max(1, int(step))
+            started = time.perf_counter()
+            self.decoder.seek(start_frame)
+            extra = time.perf_counter() - started # Seeking and skipped frames count towards the next frame's decode time
+            frame_num = start_frame
+            while frame_num <= end_frame:
+                slot = self._free.get()
+                if self._stopped: return
+                started = time.perf_counter()
+                frame = self.decoder.read(self._ring[slot])
+                if frame is None: return
+                self._ring[slot] = frame # The decoder may have reallocated it (e.g. a mid-stream size change)
+                self._filled.put((frame_num, slot, extra + time.perf_counter() - started))
+                started = time.perf_counter()
+                for _ in range(step - 1):
+                    frame_num += 1
+                    if frame_num > end_frame or not self.decoder.skip(): return
+                extra = time.perf_counter() - started
+                frame_num += 1
+        except BaseException as e:
+            self._filled.put(e)
+        finally:
+            self._filled.put(None)
+
+    def __iter__(self):
+        previous = None
+        try:
+            while True:
+                if previous is not None: self._free.put(previous) # The consumer is done with it
+                with stage("decode_wait"): item = self._filled.get()
+                if item is None: return
+                if isinstance(item, BaseException): raise item
+                frame_num, previous, seconds = item
+                record("decode", seconds)
+                yield frame_num, self._ring[previous]
+        finally:
+            self.close()
+
+    def close(self):
+        """Stops the decode thread; the decoder itself stays open."""
+        self._stopped = True
+        self._free.put(0) # Wakes the thread if it is waiting for a free slot
+        self._thread.join()
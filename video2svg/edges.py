@@ -0,0 +1,117 @@
+"""
+Edge detectors. Each turns an adjusted grayscale frame into white edges on
+black, writing into `out` when given:
+
+    canny         cv2.Canny with the fixed threshold1 / threshold2
+    canny-median  Canny with thresholds picked per frame from the median
+                  gradient magnitude, which follows the frame's noise and
+                  texture level; fades and grain keep a steady amount of detail
+    canny-otsu    Canny with threshold2 at Otsu's split of the gradient
+                  magnitudes into flat areas and edges
+                  (For both, threshold2 / 150 scales the picked thresholds and
+                  threshold1 / threshold2 sets their ratio: the defaults use
+                  them as picked, and the point budget can still raise them.)
+    sobel         Sobel gradient magnitude (|dx| + |dy|, Canny's measure) above
+                  threshold2; no non-maximum suppression, so lines come out
+                  2-3 px thick but it is cheaper than Canny
+    scharr        the same with Scharr's more rotation-invariant kernel
+    adaptive      line art: pixels darker than their neighbourhood mean by
+                  adaptive_offset, over adaptive_block x adaptive_block blocks;
+                  traces drawings and cartoons as strokes instead of outlines
+
+register_detector() adds more. benchmarks/bench_edges.py compares their
+per-frame cost and the point counts they trace to.
+"""
+import cv2
+import numpy as np
+
+EDGE_CANNY = "canny"
+EDGE_CANNY_MEDIAN = "canny-median"
+EDGE_CANNY_OTSU = "canny-otsu"
+EDGE_SOBEL = "sobel"
+EDGE_SCHARR = "scharr"
+EDGE_ADAPTIVE = "adaptive"
+
+AUTO_REFERENCE = 150 # threshold2 at which the auto detectors use their picked thresholds unscaled
+MEDIAN_GAIN = 8 # canny-median's threshold2, in median gradient magnitudes
+SCHARR_GAIN = 4 # Scharr's kernel weights sum to 16 against Sobel's 4; thresholds are scaled to match
+_MAGNITUDE_SCALE = 0.5 # Gradient magnitudes are histogrammed at half resolution, saturating at 510
+
+def gradient_magnitude(image, scharr=False):
+    """L1 gradient magnitude |dx| + |dy| (Canny's measure) as int16, from Sobel or Scharr derivatives."""
+    if scharr: dx, dy = cv2.Scharr(image, cv2.CV_16S, 1, 0), cv2.Scharr(image, cv2.CV_16S, 0, 1)
+    else: dx, dy = cv2.Sobel(image, cv2.CV_16S, 1, 0), cv2.Sobel(image, cv2.CV_16S, 0, 1)
+    return cv2.add(np.abs(dx, out=dx), np.abs(dy, out=dy), dst=dx) # Up to 2 x 4080, fits int16
+
+def _scaled(settings, high):
+    high *= settings.threshold2 / AUTO_REFERENCE
+    return high * settings.threshold1 / max(1, settings.threshold2), high
+
+def median_thresholds(image, settings):
+    """(threshold1, threshold2) for canny-median, from the gradient magnitude histogram (no sort)."""
+    magnitude = cv2.convertScaleAbs(gradient_magnitude(image), alpha=_MAGNITUDE_SCALE)
+    cumulative = np.cumsum(cv2.calcHist([magnitude], [0], None, [256], [0, 256]).ravel())
+    median = max(1, int(np.searchsorted(cumulative, cumulative[-1] / 2))) / _MAGNITUDE_SCALE
+    return _scaled(settings, MEDIAN_GAIN * median)
+
+def otsu_thresholds(image, settings):
+    """(threshold1, threshold2) for canny-otsu."""
+    magnitude = cv2.convertScaleAbs(gradient_magnitude(image), alpha=_MAGNITUDE_SCALE)
+    level = cv2.threshold(magnitude, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[0]
+    return _scaled(settings, max(1, level) / _MAGNITUDE_SCALE)
+
+def _canny(image, settings, out):
+    return cv2.Canny(image, settings.threshold1, settings.threshold2, edges=out)
+
+def _canny_median(image, settings, out):
+    low, high = median_thresholds(image, settings)
+    return cv2.Canny(image, low, high, edges=out)
+
+def _canny_otsu(image, settings, out):
+    low, high = otsu_thresholds(image, settings)
+    return cv2.Canny(image, low, high, edges=out)
+
+def gradient_edges(image, threshold, scharr=False, out=None):
+    """Pixels whose L1 gradient magnitude exceeds threshold (in Sobel units), as 0/255."""
+    return cv2.compare(gradient_magnitude(image, scharr), float(threshold * (SCHARR_GAIN if scharr else 1)), cv2.CMP_GT, dst=out)
+
+def _sobel(image, settings, out):
+    return gradient_edges(image, settings.threshold2, False, out)
+
+def _scharr(image, settings, out):
+    return gradient_edges(image, settings.threshold2, True, out)
+
+def _adaptive(image, settings, out):
+    block = max(3, settings.adaptive_block | 1) # Odd and at least 3
+    return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, block, settings.adaptive_offset, dst=out)
+
+# Name -> (detect(image, settings, out) -> edges, whether it reads threshold1 / threshold2)
+_DETECTORS = {
+    EDGE_CANNY: (_canny, True),
+    EDGE_CANNY_MEDIAN: (_canny_median, True),
+    EDGE_CANNY_OTSU: (_canny_otsu, True),
+    EDGE_SOBEL: (_sobel, True),
+    EDGE_SCHARR: (_scharr, True),
+    EDGE_ADAPTIVE: (_adaptive, False),
+}
+EDGE_DETECTORS = tuple(_DETECTORS) # The built-in ones
+
+def register_detector(name, detect, uses_thresholds=False):
+    """
+    Adds a detector: detect(gray image, settings, out or None) -> uint8 edges,
+    white on black. Register at import time of a module the workers import too,
+    or worker processes won't know it.
+    """
+    _DETECTORS[name] = (detect, uses_thresholds)
+
+def uses_thresholds(name):
+    """Whether raising threshold1 / threshold2 (as the point budget does) thins out this detector's edges."""
+    return _DETECTORS[name][1]
+
+def find_edges(image, settings, out=None):
+    """Runs settings.edge_detector on an adjusted grayscale image; raises ValueError for an unknown detector."""
+    try:
+        detect = _DETECTORS[settings.edge_detector][0]
+    except KeyError:
+        raise ValueError(f"Unknown edge detector: {settings.edge_detector}") from None
+    return detect(image, settings, out)
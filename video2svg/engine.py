@@ -0,0 +1,361 @@
+"""
+The frame -> SVG conversion pipeline: framing (see video2svg.geometry), image
+adjustments, edge detection (Canny or another detector, see video2svg.edges), optional multi-pass thinning (see video2svg.skeleton),
+tracing and colorizing.
+Nothing here touches Tk, so it runs the same from the GUI, the CLI or a worker.
+"""
+import collections
+import concurrent.futures
+import os
+import shutil
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+from video2svg.budget import fit_to_budget, frame_stats, write_report
+from video2svg.decode import ThreadedFrameReader, open_video
+from video2svg.edges import find_edges, uses_thresholds
+from video2svg.geometry import FrameTransform
+from video2svg.incremental import ACTION_DEDUPLICATED, ACTION_RESTYLED, ACTION_SKIPPED, ACTION_TRACED, FrameManifest, discard_manifest, frame_entry, plan_frame
+from video2svg.metrics import RunMetrics, recording, stage, timed_call, write_run_report
+from video2svg.outputs import FORMAT_SVG, frame_payload, open_stream
+from video2svg.pathorder import travel_distance
+from video2svg.settings import DEDUP_LINK
+from video2svg.skeleton import thin_edges
+from video2svg.svgpath import compact_svg, finish_svg, ordered_paths, parse_svg_paths, restyle_svg
+from video2svg.temporal import TemporalAligner
+from video2svg.tracing import count_svg_points, create_tracer
+
+def format_timecode(frame_num, fps):
+    """Formats a frame number as HH:MM:SS:FF."""
+    if fps == 0: return "00:00:00:00"
+    seconds_total = frame_num / fps
+    hours, remainder = divmod(seconds_total, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    frames = int((seconds_total * fps) % fps)
+    return f"{int(hours):02}:{int(minutes):02}:{int(seconds):02}:{int(frames):02}"
+
+def parse_timecode(time_str, fps):
+    """Parses HH:MM:SS:FF or HH:MM:SS[.sss] into seconds. Raises ValueError on bad input."""
+    parts = time_str.strip().split(':')
+    if len(parts) == 4:
+        h, m, s, f = [int(p) for p in parts]
+        return (h * 3600) + (m * 60) + s + (f / fps)
+    if len(parts) == 3:
+        h, m = int(parts[0]), int(parts[1])
+        return (h * 3600) + (m * 60) + float(parts[2])
+    raise ValueError(f"Invalid timecode: {time_str!r}")
+
+def timecode_to_frame(value, fps, total_frames):
+    """Resolves a timecode string or a plain frame number to a frame index clamped to the video."""
+    frame = value if isinstance(value, int) else int(parse_timecode(str(value), fps) * fps)
+    return min(max(0, frame), total_frames - 1)
+
+class ScratchBuffers:
+    """
+    Named arrays reused from frame to frame; get() only reallocates when the
+    shape or dtype changes. Not thread-safe: one per thread (or process).
+    """
+    def __init__(self):
+        self._arrays = {}
+
+    def get(self, name, shape, dtype=np.uint8):
+        array = self._arrays.get(name)
+        if array is None or array.shape != shape or array.dtype != dtype:
+            array = self._arrays[name] = np.empty(shape, dtype)
+        return array
+
+_worker_scratch = ScratchBuffers() # Each pool process converts one frame at a time
+
+def adjust_image(frame, contrast, brightness, pre_blur, blur_scale=1.0, out=None):
+    """
+    Applies contrast/brightness and the optional Gaussian pre-blur, into `out`
+    when given. pre_blur is a radius in source pixels; blur_scale shrinks it for
+    an already downscaled frame.
+    """
+    with stage("adjust"):
+        adjusted = cv2.convertScaleAbs(frame, dst=out, alpha=contrast, beta=brightness)
+        blur_k = int(round(pre_blur * blur_scale)) * 2 + 1
+        return cv2.GaussianBlur(adjusted, (blur_k, blur_k), 0, dst=adjusted) if blur_k > 1 else adjusted
+
+def detect_edges(source_img, settings, blur_scale=1.0, scratch=None):
+    """
+    Adjustments, the edge detector and, in multi-pass mode, thinning to a skeleton. Returns
+    white edges on black. With `scratch` (a ScratchBuffers) the intermediate and
+    the result are reused buffers, valid until the next call with it.
+    """
+    shape = source_img.shape[:2]
+    processed = adjust_image(source_img, settings.contrast, settings.brightness, settings.pre_blur, blur_scale,
+                             scratch.get("adjusted", source_img.shape) if scratch else None)
+    with stage("edges"): edges = find_edges(processed, settings, scratch.get("edges", shape) if scratch else None)
+    return multipass_edges(edges, settings)
+
+def multipass_edges(edges, settings):
+    """In multi-pass mode, edges thinned to the skeleton the centerline tracer expects; otherwise edges unchanged."""
+    if not settings.multipass: return edges
+    with stage("thin"): return thin_edges(edges)
+
+def write_svg_file(filepath, content):
+    # Replace rather than overwrite in place: a deduplicated frame may be a hard link to this file.
+    temp_path = filepath + ".tmp"
+    with open(temp_path, 'w') as f: f.write(content)
+    os.replace(temp_path, filepath)
+
+def restyle_svg_file(filepath, color_hex):
+    """Swaps the stroke color of an already written SVG, without re-tracing it."""
+    with open(filepath, 'r') as f: content = f.read()
+    write_svg_file(filepath, restyle_svg(content, color_hex))
+
+def reuse_svg_file(source_path, target_path, mode=DEDUP_LINK):
+    """Makes target_path a hard link to (or, failing that, a copy of) an already written SVG."""
+    if os.path.lexists(target_path): os.remove(target_path)
+    if mode == DEDUP_LINK:
+        try:
+            os.link(source_path, target_path); return
+        except OSError:
+            pass # Filesystem without hard links: fall back to a copy
+    shutil.copyfile(source_path, target_path)
+
+def _init_conversion_worker():
+    # Each pool process handles one frame at a time; keep OpenCV from spawning its own threads on top.
+    cv2.setNumThreads(1)
+
+def convert_frame_to_svg(source_img, svg_filepath, settings, previous=None, blur_scale=1.0):
+    """
+    Runs edge detection and tracing for a single (already framed) image and
+    writes the colorized SVG. Runs inside the conversion process pool, so it only
+    touches its arguments. Tracing happens in memory (piped through potrace or
+    in-process), so the only disk write is the final file.
+
+    In incremental mode, `previous` is this file's manifest entry from the last
+    run; an up-to-date SVG is kept or just restyled. Returns (action, entry, stats,
+    payload): entry is the new manifest entry (None outside incremental mode),
+    stats the frame's point count and final tracing parameters (see
+    video2svg.budget) and payload, for stream output formats, what to append to
+    the stream instead of writing svg_filepath (see video2svg.outputs).
+    """
+    return trace_edges_to_svg(detect_edges(source_img, settings, blur_scale, _worker_scratch), svg_filepath, settings, previous, source_img, blur_scale)
+
+def trace_frame(edges, settings, source_img=None, blur_scale=1.0, scratch=_worker_scratch):
+    """
+    Fits the point budget, if one is set (re-running edge detection on source_img
+    when the thresholds have to go up), and traces the edges. Returns (the
+    tracer's SVG, the settings it was traced with, the point estimate or None).
+    """
+    estimate = None
+    if settings.point_budget > 0:
+        redetect = (lambda adapted: detect_edges(source_img, adapted, blur_scale, scratch)) if source_img is not None and uses_thresholds(settings.edge_detector) else None
+        with stage("budget"): edges, settings, estimate = fit_to_budget(edges, settings, redetect)
+    tracer = create_tracer(settings.tracer, settings.turdsize, settings.opttolerance, settings.alphamax, settings.multipass)
+    with stage("trace"): traced_svg = tracer.trace(cv2.bitwise_not(edges, dst=scratch.get("inverted", edges.shape)))
+    return traced_svg, settings, estimate
+
+def trace_edges_to_svg(edges, svg_filepath, settings, previous=None, source_img=None, blur_scale=1.0):
+    """
+    The tracing half of convert_frame_to_svg, for callers that already ran edge
+    detection. With a point budget, source_img lets the edge thresholds be raised too.
+    """
+    entry = None
+    if settings.incremental:
+        with stage("plan"):
+            entry = frame_entry(edges, settings)
+            action = plan_frame(previous, entry, svg_filepath)
+        if action != ACTION_TRACED: entry["stats"] = previous.get("stats")
+        if action == ACTION_SKIPPED: return action, entry, entry["stats"], None
+        if action == ACTION_RESTYLED:
+            with stage("write"): restyle_svg_file(svg_filepath, settings.stroke_color)
+            return action, entry, entry["stats"], None
+
+    traced_svg, settings, estimate = trace_frame(edges, settings, source_img, blur_scale)
+    if settings.temporal:
+        # Alignment depends on the previous frame, so SequenceWriter finishes and writes the frame in order.
+        with stage("finish"): width, height, subpaths, travel = ordered_paths(traced_svg, settings)
+        stats = frame_stats(count_svg_points(traced_svg), estimate, settings, travel)
+        if entry is not None: entry["stats"] = stats
+        return ACTION_TRACED, entry, stats, (width, height, subpaths)
+    with stage("finish"): svg_content, travel = finish_svg(traced_svg, settings)
+    payload = None
+    with stage("write"):
+        if settings.output_format == FORMAT_SVG: write_svg_file(svg_filepath, svg_content)
+        else: payload = frame_payload(svg_content, settings)
+    stats = frame_stats(count_svg_points(svg_content), estimate, settings, travel)
+    if entry is not None: entry["stats"] = stats
+    return ACTION_TRACED, entry, stats, payload
+
+class BoundedFramePool:
+    """
+    A process pool fed by a single decoder thread. At most 2x jobs frames are in
+    flight: submit() blocks, collecting finished frames in submission order, once
+    that limit is reached, so the decoder never runs far ahead and memory stays
+    flat on large input. Worker errors are re-raised from submit()/drain().
+    """
+    def __init__(self, jobs):
+        self.jobs = max(1, jobs)
+        self.max_in_flight = self.jobs * 2
+        self._pending = collections.deque()
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_conversion_worker)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._pool.shutdown(wait=True, cancel_futures=exc_type is not None)
+        self._pending.clear()
+        return False
+
+    def submit(self, on_done, fn, *args):
+        """Queues fn(*args) on a worker; on_done(result) runs on this thread once it finishes."""
+        self._pending.append((self._pool.submit(fn, *args), on_done))
+        while len(self._pending) >= self.max_in_flight: self._collect_oldest()
+
+    def submit_result(self, on_done, result):
+        """Queues an already known result, so on_done still runs in submission order."""
+        future = concurrent.futures.Future()
+        future.set_result(result)
+        self._pending.append((future, on_done))
+        while len(self._pending) >= self.max_in_flight: self._collect_oldest()
+
+    def drain(self):
+        while self._pending: self._collect_oldest()
+
+    def _collect_oldest(self):
+        future, on_done = self._pending.popleft()
+        with stage("wait"): result = future.result() # Decoder idle: the workers are the bottleneck
+        if on_done: on_done(result)
+
+class SequenceWriter:
+    """
+    Writes one numbered SVG sequence (00001.svg, 00002.svg, ...) through a
+    BoundedFramePool. Owns the per-sequence state that has to be applied in frame
+    order on the decoder thread: the incremental manifest, duplicate-frame
+    detection, temporal path alignment, the count of what happened to each frame
+    and, with a point budget, path optimization or temporal mode, the per-frame report.
+    """
+    def __init__(self, output_folder, settings, on_frame_done=None, resume_after=0, metrics=None):
+        os.makedirs(output_folder, exist_ok=True)
+        self.output_folder = output_folder
+        self.on_frame_done = on_frame_done
+        # Stream formats append frames in order, so there is no written SVG to skip or restyle.
+        self.stream = open_stream(output_folder, settings, resume_after)
+        if self.stream is not None and settings.incremental: settings = replace(settings, incremental=False)
+        self.settings = settings
+        self.manifest = FrameManifest.load(output_folder) if settings.incremental else None
+        if self.manifest is None and self.stream is None: discard_manifest(output_folder)
+        self.actions = collections.Counter()
+        self.frames = {} # SVG filename -> (action, stats), for the point report
+        self._key_edges = None # Edges of the last traced frame, for deduplication
+        self._key_filename = None
+        self._key_payload = None # Stream payload of the last traced frame, appended again for its duplicates
+        self.transform = None # Built from the first frame; every frame of a video has the same size
+        self.aligner = TemporalAligner() if settings.temporal else None
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.timings = {} # SVG filename -> worker stage times, for the run report
+
+    def submit(self, pool, index, frame):
+        """Frames and scales one decoded frame into the export raster and queues it."""
+        if self.transform is None: self.transform = FrameTransform.for_export(frame.shape[1], frame.shape[0], self.settings)
+        with stage("frame"):
+            source_img, blur_scale = np.ascontiguousarray(self.transform.apply(frame)), self.transform.scale
+            # Decoded frames live in a reused ring buffer, and the pool pickles its arguments later, on another thread.
+            if np.may_share_memory(source_img, frame): source_img = source_img.copy()
+        svg_filename = f"{index:05d}.svg"
+        svg_filepath = os.path.join(self.output_folder, svg_filename)
+        previous = self.manifest.get(svg_filename) if self.manifest is not None else None
+        on_done = lambda outcome: self._frame_done(svg_filename, *outcome)
+        profile = self.metrics.profile
+        if not self.settings.dedup:
+            pool.submit(on_done, timed_call, convert_frame_to_svg, profile, source_img, svg_filepath, self.settings, previous, blur_scale)
+            return
+
+        # Deduplication needs the edges here, in order, to compare against the last traced frame.
+        with stage("dedup"), recording(None): # Its edge detection is not a worker's
+            edges = detect_edges(source_img, self.settings, blur_scale)
+            duplicate = self._is_duplicate(edges)
+        if duplicate:
+            pool.submit_result(on_done, ((ACTION_DEDUPLICATED, self._key_filename, None, None), None, None))
+            return
+        self._key_edges, self._key_filename = edges, svg_filename
+        budget_source = source_img if self.settings.point_budget > 0 else None # Only needed to re-run edge detection
+        pool.submit(on_done, timed_call, trace_edges_to_svg, profile, edges, svg_filepath, self.settings, previous, budget_source, blur_scale)
+
+    def _is_duplicate(self, edges):
+        if self._key_edges is None or self._key_edges.shape != edges.shape: return False
+        return cv2.countNonZero(cv2.absdiff(edges, self._key_edges)) <= self.settings.dedup_tolerance
+
+    def _frame_done(self, svg_filename, result, times=None, profile_stats=None):
+        action, entry, stats, payload = result
+        self.metrics.add_frame(times, profile_stats)
+        if times is not None and self.settings.run_report: self.timings[svg_filename] = times
+        if action == ACTION_DEDUPLICATED:
+            key_filename = entry
+            if self.stream is None:
+                with stage("link"): reuse_svg_file(os.path.join(self.output_folder, key_filename), os.path.join(self.output_folder, svg_filename), self.settings.dedup_mode)
+            entry = self.manifest.get(key_filename) if self.manifest is not None else None
+            stats = self.frames[key_filename][1]
+            payload = self._key_payload
+        else:
+            if self.aligner is not None:
+                with stage("align"): payload = self._align(svg_filename, action, stats, payload)
+            if self.stream is not None: self._key_payload = payload
+        if self.stream is not None:
+            with stage("stream"): self.stream.write(svg_filename, payload)
+        self.actions[action] += 1
+        self.frames[svg_filename] = (action, stats)
+        if self.manifest is not None and entry is not None: self.manifest.record(svg_filename, entry)
+        if self.on_frame_done: self.on_frame_done(action)
+
+    def _align(self, svg_filename, action, stats, payload):
+        """Temporal mode: aligns a traced frame's paths with the previous frame's and writes it; returns its stream payload."""
+        svg_filepath = os.path.join(self.output_folder, svg_filename)
+        if action != ACTION_TRACED: # Already aligned by an earlier run; it becomes the reference for the next frame
+            with open(svg_filepath, "r") as f: width, height, subpaths = parse_svg_paths(f.read())
+            self.aligner.align(subpaths, width, height)
+            return payload
+        width, height, subpaths = payload
+        subpaths, matched = self.aligner.align(subpaths, width, height)
+        stats["matched"] = matched
+        if "travel_after" in stats: stats["travel_after"] = round(travel_distance(subpaths), 1)
+        svg_content = compact_svg(width, height, subpaths, self.settings.stroke_color, self.settings.svg_precision)
+        if self.stream is not None: return frame_payload(svg_content, self.settings)
+        write_svg_file(svg_filepath, svg_content)
+        return None
+
+    def close(self):
+        if self.stream is not None: self.stream.close()
+        if self.manifest is not None: self.manifest.save()
+        if (self.settings.point_budget > 0 or self.settings.optimize_paths or self.settings.temporal) and self.frames:
+            write_report(self.output_folder, self.settings.point_budget, self.frames)
+        if self.settings.run_report and self.frames: write_run_report(self.output_folder, self.metrics, self.frames, self.timings)
+
+def run_conversion(video_path, output_folder, settings, in_frame=0, out_frame=None, progress_callback=None, metrics=None):
+    """
+    Converts frames in_frame..out_frame (inclusive, default: to the end) of a video
+    into 00001.svg, 00002.svg, ... in output_folder, using settings.jobs worker
+    processes behind a BoundedFramePool. Frames are decoded on their own thread
+    (see video2svg.decode).
+    progress_callback(completed, total) is called after each frame is written;
+    metrics (a video2svg.metrics.RunMetrics) collects stage timings, e.g. for a
+    live status line. Returns a Counter of per-frame actions (traced / restyled / skipped /
+    deduplicated); worker errors are re-raised.
+    """
+    decoder = open_video(video_path, settings.decoder, gray=True) # Canny only needs luma; everything after decode is single-channel
+    if out_frame is None or out_frame < 0: out_frame = decoder.total_frames - 1
+
+    step = max(1, settings.frame_step)
+    total_frames_to_process = len(range(in_frame, out_frame + 1, step))
+    writer = SequenceWriter(output_folder, settings, metrics=metrics)
+    writer.metrics.parallelism = max(1, settings.jobs)
+    if progress_callback: writer.on_frame_done = lambda _: progress_callback(sum(writer.actions.values()), total_frames_to_process)
+
+    try:
+        with recording(writer.metrics), BoundedFramePool(settings.jobs) as pool, ThreadedFrameReader(decoder, in_frame, out_frame, step) as frames:
+            for i, (frame_num, frame) in enumerate(frames):
+                # The filename is fixed at submit time, so output stays ordered whichever worker finishes first.
+                writer.submit(pool, i + 1, frame)
+            pool.drain()
+    finally:
+        decoder.close()
+        writer.close()
+    return writer.actions
@@ -0,0 +1,134 @@
+"""
+Frame cache for the timeline preview. Decoded frames and derived intermediates
+(e.g. the adjusted, resized preview image) are kept in one LRU cache with a byte
+budget, and a background thread decodes frames around the playhead so scrubbing
+and parameter changes rarely have to seek and decode.
+"""
+import collections
+import threading
+
+from video2svg.decode import DECODER_AUTO, open_video
+
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+PREFETCH_AHEAD = 24 # Frames decoded after the playhead
+PREFETCH_BEHIND = 6 # Frames decoded before the playhead (costs a seek)
+
+class FrameCache:
+    """A thread-safe LRU cache of NumPy arrays, bounded by their total nbytes."""
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None: self._items.move_to_end(key)
+            return value
+
+    def __contains__(self, key):
+        with self._lock: return key in self._items
+
+    def put(self, key, value):
+        if value.nbytes > self.max_bytes: return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None: self.current_bytes -= old.nbytes
+            self._items[key] = value
+            self.current_bytes += value.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None: self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self.current_bytes = 0
+
+class CachedFrameSource:
+    """
+    Random access to decoded frames of one video through a FrameCache. get_frame()
+    decodes on the caller's thread when the frame is missing; prefetch_around()
+    points a background decoder (with its own decoder, as decoders are not
+    thread-safe) at the playhead. Raw frames are cached under ('frame', n); callers
+    can store their own intermediates in .cache under other keys. Raises IOError
+    when the video can't be opened.
+    """
+    def __init__(self, video_path, max_bytes=DEFAULT_CACHE_BYTES, decoder=DECODER_AUTO, gray=False):
+        self.video_path = video_path
+        self.decoder_backend = decoder
+        self.gray = gray # Single-channel frames: a third of the memory, so three times the frames fit the cache
+        self.cache = FrameCache(max_bytes)
+        self._decoder = open_video(video_path, decoder, gray) # Only seeks when asked for a frame other than the next one
+        self._decoder_lock = threading.Lock()
+        self.total_frames = self._decoder.total_frames
+        self.fps = self._decoder.fps
+        self.frame_size = (self._decoder.width, self._decoder.height)
+
+        self._playhead = None
+        self._wake = threading.Condition()
+        self._closed = False
+        self._prefetch_thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self._prefetch_thread.start()
+
+    def is_opened(self):
+        return not self._closed
+
+    def get_frame(self, frame_num):
+        key = ('frame', frame_num)
+        frame = self.cache.get(key)
+        if frame is not None: return frame
+        with self._decoder_lock:
+            self._decoder.seek(frame_num)
+            frame = self._decoder.read()
+        if frame is None: return None
+        self.cache.put(key, frame)
+        return frame
+
+    def prefetch_around(self, frame_num):
+        with self._wake:
+            self._playhead = frame_num
+            self._wake.notify()
+
+    def close(self):
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        self._prefetch_thread.join(timeout=1)
+        with self._decoder_lock: self._decoder.close()
+        self.cache.clear()
+
+    def _prefetch_loop(self):
+        try:
+            decoder = open_video(self.video_path, self.decoder_backend, self.gray)
+        except IOError:
+            return # The preview decodes on demand instead
+        try:
+            while True:
+                with self._wake:
+                    while self._playhead is None and not self._closed: self._wake.wait()
+                    if self._closed: return
+                    playhead, self._playhead = self._playhead, None
+
+                start = max(0, playhead - PREFETCH_BEHIND)
+                end = min(self.total_frames - 1, playhead + PREFETCH_AHEAD)
+                frame_num = start
+                while frame_num <= end:
+                    if self._playhead is not None or self._closed: break # Playhead moved: restart around it
+                    key = ('frame', frame_num)
+                    if key in self.cache:
+                        frame_num += 1; continue
+                    decoder.seek(frame_num)
+                    frame = decoder.read()
+                    if frame is None: break
+                    self.cache.put(key, frame)
+                    frame_num += 1
+        finally:
+            decoder.close()
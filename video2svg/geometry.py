@@ -0,0 +1,131 @@
+"""
+Frame geometry: where the traced picture comes from in the source frame and how
+it is scaled into the output raster. A FrameTransform is built once per job (or
+per preview request) from the frame size and the settings, so the per-frame work
+is a single slice, at most one cv2.resize and, for Fit, one border pad (or, with
+a reused canvas from new_canvas(), a resize straight into its interior). Export
+traces on a fixed output raster (512x512 by default), so tracing time and SVG
+size don't grow with the source resolution.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+import cv2
+import numpy as np
+
+def _pan_zoom_roi(frame_w, frame_h, zoom, x_offset, y_offset):
+    """The window shown at `zoom`, panned by -100..100 percent of the free space in each direction."""
+    zoomed_w, zoomed_h = int(frame_w / zoom), int(frame_h / zoom)
+    # Slider values map to -1..1 of the maximum offset from the center
+    offset_x = int(x_offset / 100.0 * (frame_w - zoomed_w) / 2)
+    offset_y = int(y_offset / 100.0 * (frame_h - zoomed_h) / 2)
+    x1 = max(0, frame_w // 2 - zoomed_w // 2 + offset_x)
+    y1 = max(0, frame_h // 2 - zoomed_h // 2 + offset_y)
+    return x1, y1, min(frame_w, x1 + zoomed_w), min(frame_h, y1 + zoomed_h)
+
+def source_roi(frame_w, frame_h, settings):
+    """The crop (or pan/zoom when no crop is set) plus the optional 1:1 center crop, in source pixels."""
+    if settings.crop:
+        x1, y1, x2, y2 = settings.crop
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(frame_w, x2), min(frame_h, y2)
+        if x2 > x1 and y2 > y1: roi = (x1, y1, x2, y2)
+        else: roi = (0, 0, frame_w, frame_h) # Crop fell outside the frame: use the whole frame
+    else:
+        roi = _pan_zoom_roi(frame_w, frame_h, settings.zoom, settings.x_offset, settings.y_offset)
+
+    if settings.square:
+        x1, y1, x2, y2 = roi
+        side = min(x2 - x1, y2 - y1)
+        x1 += (x2 - x1 - side) // 2; y1 += (y2 - y1 - side) // 2
+        roi = (x1, y1, x1 + side, y1 + side)
+    return roi
+
+@dataclass(frozen=True)
+class FrameTransform:
+    """
+    An immutable source ROI -> output raster mapping. `size` is the resized
+    picture, `canvas` the output raster it is placed on at `offset` (they only
+    differ for Fit, which letterboxes). `scale` is the linear output/source
+    factor, used to scale pixel-sized parameters such as the pre-blur radius.
+    """
+    roi: Tuple[int, int, int, int] # (x1, y1, x2, y2) in source pixels
+    size: Tuple[int, int]
+    canvas: Tuple[int, int]
+    offset: Tuple[int, int] = (0, 0)
+    scale: float = 1.0
+
+    @classmethod
+    def fit(cls, roi, box_w, box_h):
+        """Scales roi to fit inside box_w x box_h without padding (e.g. the timeline preview canvas)."""
+        x1, y1, x2, y2 = roi
+        w, h = x2 - x1, y2 - y1
+        scale = min(box_w / w, box_h / h) if w > 0 and h > 0 else 1.0
+        size = (max(1, int(w * scale)), max(1, int(h * scale))) if w > 0 and h > 0 else (w, h)
+        return cls(roi, size, size, (0, 0), scale)
+
+    @classmethod
+    def for_output(cls, frame_w, frame_h, settings, out_w, out_h):
+        """Frames the source and places it on an out_w x out_h raster using settings.scale_mode."""
+        roi = source_roi(frame_w, frame_h, settings)
+        x1, y1, x2, y2 = roi
+        w, h = x2 - x1, y2 - y1
+        if w <= 0 or h <= 0: return cls(roi, (w, h), (w, h))
+        if settings.scale_mode == "Stretch":
+            return cls(roi, (out_w, out_h), (out_w, out_h), (0, 0), ((out_w / w) * (out_h / h)) ** 0.5)
+        if settings.scale_mode == "Fit":
+            scale = min(out_w / w, out_h / h)
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+            return cls(roi, size, (out_w, out_h), ((out_w - size[0]) // 2, (out_h - size[1]) // 2), scale)
+        # Fill: crop the source to the out_w:out_h aspect ratio instead of cropping after the resize
+        scale = max(out_w / w, out_h / h)
+        visible_w, visible_h = min(w, round(out_w / scale)), min(h, round(out_h / scale))
+        x1 += (w - visible_w) // 2; y1 += (h - visible_h) // 2
+        return cls((x1, y1, x1 + visible_w, y1 + visible_h), (out_w, out_h), (out_w, out_h), (0, 0), scale)
+
+    @classmethod
+    def for_working_resolution(cls, frame_w, frame_h, settings):
+        """Frames the source and shrinks it so the long side is at most settings.working_resolution (0 = native)."""
+        roi = source_roi(frame_w, frame_h, settings)
+        x1, y1, x2, y2 = roi
+        w, h = x2 - x1, y2 - y1
+        max_side = settings.working_resolution
+        if max_side <= 0 or w <= 0 or h <= 0 or max(w, h) <= max_side: return cls(roi, (w, h), (w, h))
+        return cls.fit(roi, max_side, max_side)
+
+    @classmethod
+    def for_export(cls, frame_w, frame_h, settings):
+        """The fixed output_width x output_height raster, or the working resolution when none is set."""
+        if settings.output_width > 0 and settings.output_height > 0:
+            return cls.for_output(frame_w, frame_h, settings, settings.output_width, settings.output_height)
+        return cls.for_working_resolution(frame_w, frame_h, settings)
+
+    def new_canvas(self, frame):
+        """A zeroed output raster for frame's channels and dtype, to pass to apply() as `out` frame after frame."""
+        return np.zeros((self.canvas[1], self.canvas[0]) + frame.shape[2:], frame.dtype)
+
+    def apply(self, frame, out=None):
+        """
+        Returns the output raster for one frame; may be a view of `frame` when no
+        resize is needed. With `out` (from new_canvas(), reused only with this
+        transform) the picture is written into it and nothing is allocated.
+        """
+        x1, y1, x2, y2 = self.roi
+        region = frame[y1:y2, x1:x2]
+        if region.size == 0: return region
+        if out is not None:
+            (x_off, y_off), (w, h) = self.offset, self.size
+            target = out[y_off:y_off + h, x_off:x_off + w] # The padding around it stays zero
+            if (region.shape[1], region.shape[0]) == self.size: np.copyto(target, region)
+            else: cv2.resize(region, self.size, dst=target, interpolation=cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR)
+            return out
+        if (region.shape[1], region.shape[0]) != self.size:
+            region = cv2.resize(region, self.size, interpolation=cv2.INTER_AREA if self.scale < 1 else cv2.INTER_LINEAR)
+        if self.canvas != self.size:
+            (x_off, y_off), (w, h), (cw, ch) = self.offset, self.size, self.canvas
+            region = cv2.copyMakeBorder(region, y_off, ch - h - y_off, x_off, cw - w - x_off, cv2.BORDER_CONSTANT, value=0)
+        return region
+
+    def to_source(self, x, y):
+        """Maps a point on the output raster back to source pixels."""
+        return (self.roi[0] + (x - self.offset[0]) * (self.roi[2] - self.roi[0]) / max(1, self.size[0]),
+                self.roi[1] + (y - self.offset[1]) * (self.roi[3] - self.roi[1]) / max(1, self.size[1]))
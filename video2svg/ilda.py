@@ -0,0 +1,128 @@
+"""
+ILDA Image Data Transfer Format (.ild) output. Traced SVG paths are flattened
+into polylines sampled at most `spacing` output pixels apart and stored as
+format 5 (2D, true color) frames. Every path starts with a blanked move to its
+first point; closed paths return to their start. Coordinates are centered and
+scaled so the longer side of the output raster spans the full int16 range.
+"""
+import math
+import os
+import struct
+
+import numpy as np
+
+from video2svg.svgpath import parse_svg_paths
+
+FORMAT_TRUE_COLOR_2D = 5
+HEADER = struct.Struct(">4s3xB8s8sHHHBx") # "ILDA", format, frame name, company, records, frame number, total frames, projector
+RECORD = np.dtype([("x", ">i2"), ("y", ">i2"), ("status", "u1"), ("b", "u1"), ("g", "u1"), ("r", "u1")])
+STATUS_LAST_POINT = 0x80
+STATUS_BLANKED = 0x40
+MAX_RECORDS = 0xFFFF
+COMPANY = b"vid2svg"
+
+def svg_polylines(svg_content, spacing):
+    """
+    Flattens every path of an SVG into (N, 2) float arrays in viewBox units,
+    sampled at most `spacing` apart. Returns (polylines, (width, height)).
+    """
+    width, height, subpaths = parse_svg_paths(svg_content)
+    spacing = max(0.1, spacing)
+
+    polylines = []
+    for subpath in subpaths:
+        points = [np.array([subpath.start])]
+        current = np.asarray(subpath.start)
+        segments = subpath.segments + [('L', subpath.start)] if subpath.closed else subpath.segments
+        for segment in segments:
+            if segment[0] == 'L':
+                end = np.asarray(segment[1])
+                n = max(1, math.ceil(np.linalg.norm(end - current) / spacing))
+                t = np.arange(1, n + 1)[:, None] / n
+                points.append(current + t * (end - current))
+            else:
+                p0, p1, p2, end = current, np.asarray(segment[1]), np.asarray(segment[2]), np.asarray(segment[3])
+                length = (np.linalg.norm(p1 - p0) + np.linalg.norm(p2 - p1) + np.linalg.norm(end - p2) + np.linalg.norm(end - p0)) / 2
+                n = max(1, math.ceil(length / spacing))
+                t = np.arange(1, n + 1)[:, None] / n
+                points.append((1 - t) ** 3 * p0 + 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t ** 2 * p2 + t ** 3 * end)
+            current = end
+        polylines.append(np.vstack(points))
+    return polylines, (width, height)
+
+def _hex_to_rgb(color_hex):
+    value = color_hex.lstrip('#')
+    if len(value) == 3: value = ''.join(c * 2 for c in value)
+    try:
+        return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+    except ValueError:
+        return 255, 255, 255
+
+def frame_records(svg_content, color_hex, spacing):
+    """Converts one traced SVG into the point records of an ILDA format 5 frame, as bytes."""
+    polylines, (width, height) = svg_polylines(svg_content, spacing)
+    scale = 65534 / max(width, height, 1e-9)
+    r, g, b = _hex_to_rgb(color_hex)
+
+    chunks = []
+    for polyline in polylines:
+        records = np.zeros(len(polyline) + 1, dtype=RECORD)
+        points = np.vstack([polyline[:1], polyline]) # Blanked move to the start, then the lit path
+        records["x"] = np.clip(np.round((points[:, 0] - width / 2) * scale), -32768, 32767)
+        records["y"] = np.clip(np.round((height / 2 - points[:, 1]) * scale), -32768, 32767)
+        records["r"], records["g"], records["b"] = r, g, b
+        records["status"][0] = STATUS_BLANKED
+        records["r"][0] = records["g"][0] = records["b"][0] = 0
+        chunks.append(records)
+    records = np.concatenate(chunks, dtype=RECORD)[:MAX_RECORDS] if chunks else np.zeros(1, dtype=RECORD) # Plain concatenate promotes to native byte order
+    if not chunks: records["status"][0] = STATUS_BLANKED # An empty frame still needs one (dark) point
+    records["status"][-1] |= STATUS_LAST_POINT
+    return records.tobytes()
+
+class IldaWriter:
+    """
+    Appends frames to one .ild file as they are produced. The total frame count
+    in every header and the closing zero-record header are written by close().
+    keep_frames > 0 continues an existing file after its first keep_frames frames.
+    """
+    def __init__(self, path, keep_frames=0):
+        self.path = path
+        self._offsets = []
+        if keep_frames > 0:
+            self._file = open(path, "r+b")
+            self._offsets = self._scan(keep_frames)
+            if len(self._offsets) < keep_frames:
+                self._file.close()
+                raise IOError(f"{path} holds only {len(self._offsets)} of the {keep_frames} frames to resume after; restart the job")
+            self._file.truncate()
+        else:
+            self._file = open(path, "wb")
+
+    def _scan(self, keep_frames):
+        """Header offsets of the first keep_frames frames; leaves the file positioned after the last of them."""
+        offsets, end = [], 0
+        while len(offsets) < keep_frames:
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size or header[:4] != b"ILDA": break
+            records = HEADER.unpack(header)[4]
+            if records == 0: break # End-of-file header
+            offsets.append(end)
+            end += HEADER.size + records * RECORD.itemsize
+            self._file.seek(end)
+        self._file.seek(end)
+        return offsets
+
+    def write(self, name, records):
+        frame_name = os.path.splitext(name)[0].encode("ascii", "replace")[:8]
+        self._offsets.append(self._file.tell())
+        self._file.write(HEADER.pack(b"ILDA", FORMAT_TRUE_COLOR_2D, frame_name, COMPANY, len(records) // RECORD.itemsize, (len(self._offsets) - 1) & 0xFFFF, 0, 0))
+        self._file.write(records)
+        self._file.flush() # The batch state may count this frame as written from now on
+
+    def close(self):
+        total = min(len(self._offsets), 0xFFFF)
+        self._file.write(HEADER.pack(b"ILDA", FORMAT_TRUE_COLOR_2D, b"", COMPANY, 0, total, total, 0))
+        total_field = struct.Struct(">H")
+        for offset in self._offsets:
+            self._file.seek(offset + 28); self._file.write(total_field.pack(total))
+        self._file.close()
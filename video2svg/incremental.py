@@ -0,0 +1,73 @@
+"""
+Incremental conversion. A manifest next to the SVGs records, per output file, a
+hash of the edge bitmap that was traced and a hash of the tracing parameters.
+On a re-run, a frame whose SVG is still up to date is skipped; if only the
+stroke color changed, the existing SVG is restyled instead of traced again.
+"""
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_FILENAME = "video2svg_manifest.json"
+MANIFEST_SAVE_INTERVAL = 1.0 # Seconds between manifest writes while frames complete
+
+ACTION_TRACED = "traced"
+ACTION_RESTYLED = "restyled"
+ACTION_SKIPPED = "skipped"
+ACTION_DEDUPLICATED = "deduplicated" # Reused the previous frame's SVG (see SequenceWriter)
+
+def hash_edges(edges):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(edges.shape).encode())
+    digest.update(edges.tobytes())
+    return digest.hexdigest()
+
+def hash_trace_params(settings):
+    """Everything after edge detection that changes the traced geometry (but not the styling)."""
+    params = (settings.tracer, settings.multipass, settings.turdsize, settings.opttolerance, settings.alphamax, settings.point_budget,
+              settings.svg_compact, settings.svg_precision, settings.optimize_paths, settings.temporal, settings.output_format, settings.ilda_point_spacing)
+    return hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+def frame_entry(edges, settings):
+    return {"edges": hash_edges(edges), "trace": hash_trace_params(settings), "stroke_color": settings.stroke_color}
+
+def plan_frame(previous, entry, svg_filepath):
+    """Decides how to bring svg_filepath up to date: ACTION_SKIPPED, ACTION_RESTYLED or ACTION_TRACED."""
+    if not previous or not os.path.exists(svg_filepath): return ACTION_TRACED
+    if previous.get("edges") != entry["edges"] or previous.get("trace") != entry["trace"]: return ACTION_TRACED
+    return ACTION_SKIPPED if previous.get("stroke_color") == entry["stroke_color"] else ACTION_RESTYLED
+
+def discard_manifest(folder):
+    """Called by non-incremental runs, which overwrite SVGs without recording what they traced."""
+    path = os.path.join(folder, MANIFEST_FILENAME)
+    if os.path.exists(path): os.remove(path)
+
+class FrameManifest:
+    """The per-folder record of what each SVG was traced from. Saved atomically, at most once per interval."""
+    def __init__(self, folder, frames=None):
+        self.path = os.path.join(folder, MANIFEST_FILENAME)
+        self.frames = frames or {}
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def load(cls, folder):
+        path = os.path.join(folder, MANIFEST_FILENAME)
+        try:
+            with open(path) as f: frames = json.load(f).get("frames", {})
+        except (OSError, ValueError):
+            frames = {} # Missing or unreadable: everything gets traced again
+        return cls(folder, frames)
+
+    def get(self, svg_filename):
+        return self.frames.get(svg_filename)
+
+    def record(self, svg_filename, entry):
+        self.frames[svg_filename] = entry
+        if time.monotonic() - self._last_save >= MANIFEST_SAVE_INTERVAL: self.save()
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f: json.dump({"frames": self.frames}, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self._last_save = time.monotonic()
@@ -0,0 +1,316 @@
+"""
+Live mode: converts frames from a capture source in real time and streams
+them out, for shows where the picture is made on the spot. The source is a
+camera index ("0"), a capture device such as a v4l2 loopback (/dev/video2) or
+a video file, which is played at its native frame rate. Frames go through the
+same framing, edge detection, point budget and tracing as a conversion, on
+settings.jobs worker threads, so there are no per-frame process hand-offs.
+Only OpenCV calls and waiting on the potrace process release the GIL, though:
+the in-process and centerline tracers walk paths and build SVG text in Python,
+so with those live mode is GIL-bound and extra jobs add little.
+
+Nothing queues: the capture thread and the sink each hold only the newest
+frame, and a frame still waiting when a newer one arrives is dropped. So is a
+frame that finishes after a newer one or over the latency budget. Every frame
+is sent as one line of JSON:
+
+    {"frame": 12, "time": <capture time, Unix seconds>, "latency_ms": 41.3,
+     "width": 512, "height": 512, "svg": "<svg ...>"}
+
+or, with the points payload, "paths": [[[x, y], ...], ...] in place of "svg"
+(polylines sampled settings.ilda_point_spacing apart, in output pixels).
+Sinks: "-" (stdout), tcp://HOST:PORT and unix://PATH (listening sockets; every
+connected client gets each frame) and pipe://PATH (a named pipe, created if
+needed).
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import numpy as np
+
+from video2svg.decode import DECODER_AUTO, OpenCVDecoder, open_video
+from video2svg.engine import ScratchBuffers, detect_edges, trace_frame
+from video2svg.geometry import FrameTransform
+from video2svg.ilda import svg_polylines
+from video2svg.metrics import FPS_WINDOW, FrameTimes, RunMetrics, recording, stage
+from video2svg.svgpath import compact_svg, finish_svg, ordered_paths
+from video2svg.temporal import TemporalAligner
+
+PAYLOAD_SVG = "svg"
+PAYLOAD_POINTS = "points"
+PAYLOADS = (PAYLOAD_SVG, PAYLOAD_POINTS)
+DEFAULT_LATENCY_BUDGET_MS = 100
+STATUS_INTERVAL = 1.0 # Seconds between status callbacks
+JOIN_TIMEOUT = 2.0 # Seconds a stopping session waits for each of its threads
+
+class LatestSlot:
+    """A one-item handoff: put() replaces an item nobody has taken yet, so the taker always gets the newest."""
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._closed = False
+
+    def put(self, item):
+        """Returns True when an untaken item was replaced (dropped)."""
+        with self._cond:
+            replaced, self._item = self._item is not None, item
+            self._cond.notify()
+            return replaced
+
+    def take(self):
+        """The newest item; blocks until there is one. None once closed and empty."""
+        with self._cond:
+            while self._item is None and not self._closed: self._cond.wait()
+            item, self._item = self._item, None
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+def open_source(source, backend=DECODER_AUTO):
+    """
+    A decoder for a camera index, a capture device path or a video file (with
+    `backend`, see video2svg.decode). Returns (decoder, is_live); raises IOError
+    or ValueError as open_video() does.
+    """
+    if source.isdigit(): return OpenCVDecoder(int(source), gray=True), True
+    if source.startswith("/dev/"): return OpenCVDecoder(source, gray=True), True
+    return open_video(source, backend, gray=True), False
+
+class _StdoutSink:
+    def send(self, data):
+        sys.stdout.buffer.write(data); sys.stdout.buffer.flush()
+
+    def close(self):
+        pass
+
+class _PipeSink:
+    """A named pipe; opening it waits for a reader, and a reader that goes away is waited for again."""
+    def __init__(self, path):
+        if not os.path.exists(path): os.mkfifo(path)
+        self.path = path
+        self._file = None
+
+    def send(self, data):
+        if self._file is None: self._file = open(self.path, "wb")
+        try:
+            self._file.write(data); self._file.flush()
+        except BrokenPipeError:
+            self._close_file()
+
+    def _close_file(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def close(self):
+        if self._file is not None: self._close_file()
+
+class _SocketSink:
+    """A listening socket; frames go to every connected client, and clients that fail are dropped."""
+    def __init__(self, family, address):
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET: self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        elif os.path.exists(address): os.remove(address) # A stale socket file from an earlier run
+        self._server.bind(address)
+        self._server.listen()
+        self.address = address if family != socket.AF_INET else self._server.getsockname()
+        self._unix_path = address if family != socket.AF_INET else None
+        self._clients = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return # Closed
+            with self._lock: self._clients.append(client)
+
+    def send(self, data):
+        with self._lock: clients = list(self._clients)
+        for client in clients:
+            try:
+                client.sendall(data)
+            except OSError:
+                with self._lock: self._clients.remove(client)
+                client.close()
+
+    def close(self):
+        self._server.close()
+        with self._lock:
+            for client in self._clients: client.close()
+            self._clients = []
+        if self._unix_path and os.path.exists(self._unix_path): os.remove(self._unix_path)
+
+def open_sink(target):
+    """A sink for "-", tcp://HOST:PORT, unix://PATH or pipe://PATH; raises ValueError for anything else."""
+    if target == "-": return _StdoutSink()
+    scheme, _, rest = target.partition("://")
+    if scheme == "tcp":
+        host, _, port = rest.rpartition(":")
+        if not port.isdigit(): raise ValueError(f"Expected tcp://HOST:PORT, got {target!r}")
+        return _SocketSink(socket.AF_INET, (host or "127.0.0.1", int(port)))
+    if scheme == "unix" and rest: return _SocketSink(socket.AF_UNIX, rest)
+    if scheme == "pipe" and rest: return _PipeSink(rest)
+    raise ValueError(f"Unknown live output {target!r}: use -, tcp://HOST:PORT, unix://PATH or pipe://PATH")
+
+class LiveConverter:
+    """
+    One live session: a capture thread, settings.jobs worker threads, the
+    emitting thread (whoever calls run()) and a sink thread. Stage times, the
+    capture-to-send latency ("latency") and the drop counters end up in `metrics`.
+    """
+    def __init__(self, decoder, sink, settings, payload=PAYLOAD_SVG, latency_budget_ms=DEFAULT_LATENCY_BUDGET_MS,
+                 paced=False, loop=False, status_callback=None, metrics=None):
+        self.decoder, self.sink, self.settings, self.payload = decoder, sink, settings, payload
+        self.latency_budget = latency_budget_ms / 1000 if latency_budget_ms > 0 else None
+        self.paced, self.loop = paced, loop # Play a file at its frame rate (and from the start again at its end)
+        self.status_callback = status_callback
+        self.metrics = metrics if metrics is not None else RunMetrics()
+        self.metrics.parallelism = max(1, settings.jobs)
+        self.dropped = {"busy": 0, "late": 0, "unsent": 0} # Replaced before a worker took it / finished too late / replaced before the sink sent it
+        self.captured = self.sent = 0
+        self._frames, self._outgoing = LatestSlot(), LatestSlot()
+        self._results = []
+        self._results_cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._aligner = TemporalAligner() if settings.temporal else None
+        self._transform = None
+
+    def stop(self):
+        self._stopped.set()
+
+    def _capture_loop(self):
+        try:
+            started, index = time.perf_counter(), 0
+            out = None # Decode buffer, reused from frame to frame
+            while not self._stopped.is_set():
+                if self.paced:
+                    delay = started + index / self.decoder.fps - time.perf_counter()
+                    if delay > 0: time.sleep(delay)
+                frame = out = self.decoder.read(out)
+                if frame is None:
+                    if not (self.loop and self.paced and index > 0): return
+                    self.decoder.seek(0)
+                    started, index = time.perf_counter(), 0
+                    continue
+                captured_at, wall_time = time.perf_counter(), time.time()
+                index += 1; self.captured += 1
+                if self._transform is None: self._transform = FrameTransform.for_export(frame.shape[1], frame.shape[0], self.settings)
+                source_img = np.ascontiguousarray(self._transform.apply(frame))
+                if np.may_share_memory(source_img, frame): source_img = source_img.copy() # The decode buffer is reused
+                if self._frames.put((self.captured, captured_at, wall_time, source_img)): self.dropped["busy"] += 1
+        finally:
+            self._frames.close()
+
+    def _worker_loop(self):
+        scratch = ScratchBuffers() # Per thread: buffers are reused from frame to frame
+        try:
+            while True:
+                item = self._frames.take()
+                if item is None: return
+                number, captured_at, wall_time, source_img = item
+                times = FrameTimes()
+                with recording(times):
+                    edges = detect_edges(source_img, self.settings, self._transform.scale, scratch)
+                    traced_svg, _, _ = trace_frame(edges, self.settings, source_img, self._transform.scale, scratch)
+                    with stage("finish"):
+                        if self._aligner is not None: result = ordered_paths(traced_svg, self.settings)[:3] # Aligned in frame order when emitted
+                        else: result = self._body(finish_svg(traced_svg, self.settings)[0])
+                with self._results_cond:
+                    self._results.append((number, captured_at, wall_time, result, dict(times)))
+                    self._results_cond.notify()
+        finally:
+            with self._results_cond:
+                self._results.append(None)
+                self._results_cond.notify()
+
+    def _sink_loop(self):
+        last_error = None
+        while True:
+            data = self._outgoing.take()
+            if data is None: return
+            try:
+                self.sink.send(data)
+            except OSError as e:
+                if str(e) != last_error: print(f"Live output error: {e}", file=sys.stderr)
+                last_error = str(e)
+
+    def _body(self, svg_content):
+        """The frame's payload fields; built on the workers unless temporal alignment has to come first."""
+        width, height = self._transform.canvas
+        if self.payload == PAYLOAD_POINTS:
+            polylines, _ = svg_polylines(svg_content, self.settings.ilda_point_spacing)
+            return {"width": width, "height": height, "paths": [np.round(points, 1).tolist() for points in polylines]}
+        return {"width": width, "height": height, "svg": svg_content}
+
+    def _message(self, number, wall_time, latency, result):
+        if self._aligner is not None:
+            width, height, subpaths = result
+            with stage("align"):
+                subpaths, _ = self._aligner.align(subpaths, width, height)
+                result = self._body(compact_svg(width, height, subpaths, self.settings.stroke_color, self.settings.svg_precision))
+        message = {"frame": number, "time": round(wall_time, 6), "latency_ms": round(latency * 1000, 2)}
+        message.update(result)
+        return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+    def run(self):
+        """Runs until the source ends (a file without loop) or stop() is called; returns the metrics."""
+        jobs = max(1, self.settings.jobs)
+        threads = [threading.Thread(target=self._capture_loop, name="live-capture", daemon=True)]
+        threads += [threading.Thread(target=self._worker_loop, name=f"live-worker-{i}", daemon=True) for i in range(jobs)]
+        sink_thread = threading.Thread(target=self._sink_loop, name="live-sink", daemon=True)
+        with recording(self.metrics):
+            for thread in threads + [sink_thread]: thread.start()
+            finished, last_sent, last_status = 0, 0, time.perf_counter()
+            try:
+                while finished < jobs:
+                    with self._results_cond:
+                        while not self._results and not self._stopped.is_set(): self._results_cond.wait(STATUS_INTERVAL)
+                        results, self._results = self._results, []
+                    if self._stopped.is_set(): break
+                    for item in sorted(results, key=lambda r: r[0] if r else 0):
+                        if item is None:
+                            finished += 1; continue
+                        number, captured_at, wall_time, result, times = item
+                        latency = time.perf_counter() - captured_at
+                        if number <= last_sent or (self.latency_budget and latency > self.latency_budget):
+                            # Overtaken by a newer frame, or too old to show; its stage times still count
+                            for name, seconds in times.items(): self.metrics.record(name, seconds)
+                            self.dropped["late"] += 1; continue
+                        data = self._message(number, wall_time, latency, result)
+                        self.metrics.add_frame(times)
+                        self.metrics.record("latency", time.perf_counter() - captured_at)
+                        if self._outgoing.put(data): self.dropped["unsent"] += 1 # The frame it replaced never went out
+                        else: self.sent += 1
+                        last_sent = number
+                    if self.status_callback and time.perf_counter() - last_status >= STATUS_INTERVAL:
+                        self.status_callback(self); last_status = time.perf_counter()
+            finally:
+                self._stopped.set()
+                self._frames.close(); self._outgoing.close()
+                # A camera read or a pipe nobody has opened yet can block indefinitely; those threads are daemons.
+                for thread in threads + [sink_thread]: thread.join(JOIN_TIMEOUT)
+                self.sink.close()
+        return self.metrics
+
+    def status_text(self):
+        """"live: 29.7 fps, latency p50 38 ms / p90 52 ms, dropped 4 busy, 1 late, 0 unsent"."""
+        latencies = np.array(self.metrics.samples.get("latency", [])[-FPS_WINDOW:]) * 1000
+        text = f"live: {self.metrics.fps():.1f} fps"
+        if len(latencies): text += f", latency p50 {np.percentile(latencies, 50):.0f} ms / p90 {np.percentile(latencies, 90):.0f} ms"
+        return text + ", dropped " + ", ".join(f"{n} {reason}" for reason, n in self.dropped.items())
+
+    def report(self):
+        """The run report (see RunMetrics.summary()) plus frame counts and drops."""
+        return dict(self.metrics.summary(), captured=self.captured, sent=self.sent, dropped=dict(self.dropped))
@@ -0,0 +1,182 @@
+"""
+Pipeline instrumentation. Code wraps its stages in `with stage("edges"):`,
+which costs one clock read when nothing is recording. Each worker task runs
+under timed_call(), which hands the frame's stage times (and, when profiling,
+its cProfile stats) back with the result. The decoder thread records its own
+stages (seek, decode, framing, waiting on workers, stream writes) straight into
+the run's RunMetrics. RunMetrics turns this into the live progress line
+(frames/sec, ETA) and the optional run report:
+
+    video2svg_run.json  per-stage count, total, mean / p50 / p90 / p99 / max and a histogram
+    video2svg_run.csv   per frame: action, point count and the time of every worker stage
+
+Stages can nest (a point budget re-runs edge detection; "trace.potrace" is part of
+"trace"), so stage totals can add up to more than the wall time.
+"""
+import bisect
+import collections
+import cProfile
+import csv
+import json
+import os
+import pstats
+import threading
+import time
+
+import numpy as np
+
+RUN_REPORT_JSON = "video2svg_run.json"
+RUN_REPORT_CSV = "video2svg_run.csv"
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+FPS_WINDOW = 50 # Recent frames the live frames/sec and ETA are averaged over
+
+_local = threading.local()
+
+class stage:
+    """Times a `with` block as a named stage on this thread's recorder, if one is active."""
+    __slots__ = ("name", "start")
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        recorder = getattr(_local, "recorder", None)
+        if recorder is not None: recorder.record(self.name, time.perf_counter() - self.start)
+
+def record(name, seconds):
+    """Records a stage timed elsewhere (e.g. on a helper thread) on this thread's recorder, if one is active."""
+    recorder = getattr(_local, "recorder", None)
+    if recorder is not None: recorder.record(name, seconds)
+
+class recording:
+    """Sends this thread's stage() times to recorder (anything with record(name, seconds)) inside the block."""
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.previous, _local.recorder = getattr(_local, "recorder", None), self.recorder
+        return self.recorder
+
+    def __exit__(self, *exc):
+        _local.recorder = self.previous
+
+class FrameTimes(dict):
+    """Stage name -> seconds for one frame; repeated stages add up."""
+    def record(self, name, seconds):
+        self[name] = self.get(name, 0.0) + seconds
+
+def timed_call(fn, profile, *args):
+    """Runs fn(*args) on a worker; returns (result, stage times, cProfile stats or None)."""
+    times = FrameTimes()
+    profiler = cProfile.Profile() if profile else None
+    with recording(times):
+        if profiler: profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            if profiler: profiler.disable()
+    if profiler: profiler.create_stats()
+    return result, dict(times), profiler.stats if profiler else None
+
+class _ProfileData:
+    """Lets pstats load the raw stats dict a worker sent back."""
+    def __init__(self, stats):
+        self.stats = stats
+    def create_stats(self):
+        pass
+
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+class RunMetrics:
+    """
+    Stage samples, frame completions and (with profile=True) merged worker
+    profiles for one conversion or batch. Only touched from the decoder thread.
+    """
+    def __init__(self, profile=False):
+        self.profile = profile
+        self.parallelism = 1 # Worker processes, set by whoever runs the pool
+        self.samples = collections.defaultdict(list) # Stage -> seconds per occurrence
+        self.worker_stages = set()
+        self.started = time.perf_counter()
+        self.frames = 0
+        self._recent = collections.deque(maxlen=FPS_WINDOW) # Completion times
+        self._profile_stats = None
+
+    def record(self, name, seconds):
+        self.samples[name].append(seconds)
+
+    def add_frame(self, times=None, profile_stats=None):
+        """Counts one finished frame and takes in the stage times and profile its worker sent back."""
+        self.frames += 1
+        self._recent.append(time.perf_counter())
+        for name, seconds in (times or {}).items():
+            self.samples[name].append(seconds); self.worker_stages.add(name)
+        if profile_stats:
+            if self._profile_stats is None: self._profile_stats = pstats.Stats(_ProfileData(profile_stats))
+            else: self._profile_stats.add(_ProfileData(profile_stats))
+
+    def fps(self):
+        if len(self._recent) >= 2 and self._recent[-1] > self._recent[0]:
+            return (len(self._recent) - 1) / (self._recent[-1] - self._recent[0])
+        elapsed = time.perf_counter() - self.started
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def bottleneck(self):
+        """The top-level stage with the most wall time (worker stages run `parallelism` at a time), or None."""
+        totals = {name: sum(values) / (self.parallelism if name in self.worker_stages else 1)
+                  for name, values in self.samples.items() if '.' not in name and name not in ("wait", "decode_wait", "latency")} # Waiting, or not stages of their own
+        return max(totals, key=totals.get) if totals else None
+
+    def progress_text(self, completed, total):
+        """The live status line: "Processing frame 12 of 60 - 8.3 fps - ETA 0:00:05 - slowest: trace"."""
+        text = f"Processing frame {completed} of {total}"
+        fps = self.fps()
+        if fps > 0 and completed < total: text += f" - {fps:.1f} fps - ETA {_format_duration((total - completed) / fps)}"
+        slowest = self.bottleneck()
+        if slowest: text += f" - slowest: {slowest}"
+        return text + "..."
+
+    def summary(self):
+        """The JSON run report."""
+        elapsed = time.perf_counter() - self.started
+        stages = {}
+        for name, values in sorted(self.samples.items()):
+            ms = np.array(values) * 1000
+            counts = collections.Counter(bisect.bisect_left(HISTOGRAM_BOUNDS_MS, value) for value in ms)
+            labels = [f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}ms"]
+            p50, p90, p99 = np.percentile(ms, (50, 90, 99))
+            stages[name] = {"count": len(values), "total_s": round(float(ms.sum()) / 1000, 3), "mean_ms": round(float(ms.mean()), 3),
+                            "p50_ms": round(float(p50), 3), "p90_ms": round(float(p90), 3), "p99_ms": round(float(p99), 3),
+                            "max_ms": round(float(ms.max()), 3), "histogram": {labels[k]: counts[k] for k in sorted(counts)}}
+        return {"frames": self.frames, "elapsed_s": round(elapsed, 3), "fps": round(self.frames / elapsed, 3) if elapsed > 0 else 0.0,
+                "workers": self.parallelism, "bottleneck": self.bottleneck(), "stages": stages}
+
+    def dump_profile(self, path, main_profiler=None):
+        """Writes the merged worker profiles (plus main_profiler, the decoder thread's) as a pstats file."""
+        stats = self._profile_stats
+        if main_profiler is not None:
+            if stats is None: stats = pstats.Stats(main_profiler)
+            else: stats.add(main_profiler)
+        if stats is not None: stats.dump_stats(path)
+
+def write_run_report(folder, metrics, frames, timings):
+    """
+    Writes RUN_REPORT_JSON and RUN_REPORT_CSV; `frames` maps SVG filename ->
+    (action, stats or None), `timings` SVG filename -> worker stage times.
+    """
+    with open(os.path.join(folder, RUN_REPORT_JSON), "w") as f: json.dump(metrics.summary(), f, indent=2)
+    names = sorted({name for times in timings.values() for name in times})
+    temp_path = os.path.join(folder, RUN_REPORT_CSV + ".tmp")
+    with open(temp_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("frame", "action", "points") + tuple(f"{name}_ms" for name in names))
+        for svg_filename, (action, stats) in sorted(frames.items()):
+            times = timings.get(svg_filename, {})
+            row = tuple(round(times[name] * 1000, 3) if name in times else "" for name in names)
+            writer.writerow((svg_filename, action, (stats or {}).get("points", "")) + row)
+    os.replace(temp_path, os.path.join(folder, RUN_REPORT_CSV))
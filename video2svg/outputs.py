@@ -0,0 +1,96 @@
+"""
+Output formats. The default writes one SVG file per frame. The stream formats
+append every frame to a single file, in order, as soon as it completes, which
+playback software imports much faster than tens of thousands of small files:
+
+    zip   <folder>/<folder name>.zip, an uncompressed archive of 00001.svg,
+          00002.svg, ...; its central directory is the frame index
+    ilda  <folder>/<folder name>.ild, one ILDA format 5 frame per SVG (see video2svg.ilda)
+
+Workers convert each traced SVG to its stream payload (see frame_payload), so
+only the append itself happens on the decoder thread.
+"""
+import os
+import shutil
+import struct
+import zipfile
+import zlib
+
+from video2svg.ilda import IldaWriter, frame_records
+
+FORMAT_SVG = "svg"
+FORMAT_ZIP = "zip"
+FORMAT_ILDA = "ilda"
+OUTPUT_FORMATS = (FORMAT_SVG, FORMAT_ZIP, FORMAT_ILDA)
+STREAM_EXTENSIONS = {FORMAT_ZIP: ".zip", FORMAT_ILDA: ".ild"}
+
+def stream_path(folder, output_format):
+    return os.path.join(folder, os.path.basename(os.path.normpath(folder)) + STREAM_EXTENSIONS[output_format])
+
+def frame_payload(svg_content, settings):
+    """What a worker hands back for a stream format: the SVG bytes, or the frame's ILDA records."""
+    if settings.output_format == FORMAT_ILDA: return frame_records(svg_content, settings.stroke_color, settings.ilda_point_spacing)
+    return svg_content.encode("utf-8")
+
+def _read_entries(path, limit):
+    """
+    Yields (name, data) for the first `limit` entries of an archive. One whose
+    writer was killed has no central directory; its complete entries are then
+    read back from their local headers.
+    """
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        archive = None
+    if archive is not None:
+        with archive:
+            for name in sorted(archive.namelist())[:limit]: yield name, archive.read(name)
+        return
+    with open(path, "rb") as f:
+        for _ in range(limit):
+            header = f.read(30)
+            if len(header) < 30 or header[:4] != b"PK\x03\x04": return
+            _, _, flags, method, _, _, crc, size, _, name_len, extra_len = struct.unpack("<4s5H3L2H", header)
+            name = f.read(name_len).decode("utf-8")
+            f.seek(extra_len, os.SEEK_CUR)
+            data = f.read(size)
+            if method != zipfile.ZIP_STORED or flags & 0x08 or len(data) < size or zlib.crc32(data) != crc: return # Cut off mid-entry
+            yield name, data
+
+class ZipBundleWriter:
+    """
+    Appends SVGs to one stored (uncompressed) ZIP archive. keep_frames > 0
+    continues an existing archive after its first keep_frames entries. The
+    central directory is only written by close(), so after a hard kill the
+    archive reads as corrupt to other tools until the job is resumed, which
+    recovers every complete entry from its local header.
+    """
+    def __init__(self, path, keep_frames=0):
+        self.path = path
+        if keep_frames > 0:
+            temp_path = path + ".resume"
+            shutil.move(path, temp_path) # A missing file raises here, before anything is lost
+            self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+            try:
+                kept = 0
+                for name, data in _read_entries(temp_path, keep_frames):
+                    self._zip.writestr(name, data); kept += 1
+                if kept < keep_frames: raise IOError(f"{path} holds only {kept} of the {keep_frames} frames to resume after; restart the job")
+            except (zipfile.BadZipFile, IOError):
+                self._zip.close(); shutil.move(temp_path, path); raise
+            os.remove(temp_path)
+        else:
+            self._zip = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED)
+
+    def write(self, name, payload):
+        self._zip.writestr(name, payload)
+        self._zip.fp.flush() # The batch state may count this frame as written from now on
+
+    def close(self):
+        self._zip.close()
+
+def open_stream(folder, settings, keep_frames=0):
+    """The stream writer for settings.output_format, or None when frames are written as separate SVG files."""
+    if settings.output_format == FORMAT_SVG: return None
+    writer_class = IldaWriter if settings.output_format == FORMAT_ILDA else ZipBundleWriter
+    return writer_class(stream_path(folder, settings.output_format), keep_frames)
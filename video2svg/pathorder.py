@@ -0,0 +1,116 @@
+"""
+Path ordering for laser output. Tracers emit paths in scan order, so the
+projector spends much of each frame on blanked jumps between far-apart paths.
+optimize_order() reorders a frame's subpaths, reversing open ones where that
+shortens the jump, with a greedy nearest-neighbour pass over a grid index of
+path end points followed by vectorized 2-opt refinement.
+"""
+import math
+import time
+
+import numpy as np
+
+TWO_OPT_TIME_LIMIT = 0.05 # Seconds of 2-opt refinement per frame, so ordering never dominates a trace
+
+def path_end(subpath):
+    if subpath.closed or not subpath.segments: return subpath.start
+    return subpath.segments[-1][-1]
+
+def reverse_subpath(subpath):
+    """The same path drawn from its end to its start (closed paths just run the other way round)."""
+    points = [subpath.start] + [segment[-1] for segment in subpath.segments]
+    segments = []
+    for k in range(len(subpath.segments) - 1, -1, -1):
+        segment = subpath.segments[k]
+        segments.append(('L', points[k]) if segment[0] == 'L' else ('C', segment[2], segment[1], points[k]))
+    return subpath._replace(start=points[-1], segments=segments)
+
+def travel_distance(subpaths):
+    """Total blanked travel between consecutive paths."""
+    return sum(math.dist(path_end(a), b.start) for a, b in zip(subpaths, subpaths[1:]))
+
+class PointGrid:
+    """A uniform grid over points (path ends, centroids) with removal, for nearest-neighbour queries."""
+    def __init__(self, points, cell):
+        self.cell = cell
+        self.points = points
+        self.buckets = {}
+        for i, (x, y) in enumerate(points):
+            self.buckets.setdefault((int(x // cell), int(y // cell)), []).append(i)
+        cells = np.array(list(self.buckets)) if self.buckets else np.zeros((1, 2), dtype=int)
+        self.low, self.high = cells.min(axis=0), cells.max(axis=0)
+        self.alive = np.ones(len(points), dtype=bool)
+
+    def remove(self, i):
+        self.alive[i] = False
+
+    def nearest(self, x, y):
+        cx, cy = int(x // self.cell), int(y // self.cell)
+        best, best_d = None, math.inf
+        max_ring = int(max(cx - self.low[0], self.high[0] - cx, cy - self.low[1], self.high[1] - cy, 0))
+        for ring in range(max_ring + 1):
+            if best is not None and (ring - 1) * self.cell > best_d: break # No closer point can be further out
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in (range(cy - ring, cy + ring + 1) if gx in (cx - ring, cx + ring) else (cy - ring, cy + ring)):
+                    for i in self.buckets.get((gx, gy), ()):
+                        if not self.alive[i]: continue
+                        d = math.hypot(self.points[i][0] - x, self.points[i][1] - y)
+                        if d < best_d: best, best_d = i, d
+        return best
+
+def _greedy_order(subpaths, origin):
+    """Nearest-neighbour tour: (index, reversed) pairs, always jumping to the closest free end point."""
+    points = []
+    for subpath in subpaths: points += [subpath.start, path_end(subpath)]
+    extent = np.ptp(np.array(points), axis=0).max() if points else 1.0
+    grid = PointGrid(points, max(1.0, extent / max(1.0, math.sqrt(len(subpaths)))))
+    for k, subpath in enumerate(subpaths):
+        if subpath.closed: grid.remove(2 * k + 1) # Closed paths are entered and left at their start
+    order, position = [], origin
+    for _ in range(len(subpaths)):
+        i = grid.nearest(*position)
+        k, reverse = divmod(i, 2)
+        grid.remove(2 * k); grid.remove(2 * k + 1)
+        order.append((k, bool(reverse)))
+        position = points[2 * k] if reverse else points[2 * k + 1]
+    return order
+
+def _two_opt(starts, ends, time_limit):
+    """
+    Reverses blocks of the tour (flipping every path in them) while that shortens
+    the travel. starts/ends are (n, 2) arrays in tour order; returns the new
+    order of their rows and whether each row ended up reversed.
+    """
+    n = len(starts)
+    order = np.arange(n); flipped = np.zeros(n, dtype=bool)
+    S, E = starts.copy(), ends.copy()
+    deadline = time.perf_counter() + time_limit
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            # Reversing i..j replaces the jumps E[i-1]->S[i] and E[j]->S[j+1] with E[i-1]->E[j] and S[i]->S[j+1].
+            j = np.arange(i, n)
+            before = np.hypot(*(E[i - 1] - S[i])) + np.append(np.hypot(*(E[j[:-1]] - S[j[:-1] + 1]).T), 0.0)
+            after = np.hypot(*(E[i - 1] - E[j]).T) + np.append(np.hypot(*(S[i] - S[j[:-1] + 1]).T), 0.0)
+            best = int(np.argmin(after - before))
+            if after[best] - before[best] < -1e-9:
+                j = i + best
+                S[i:j + 1], E[i:j + 1] = E[i:j + 1][::-1].copy(), S[i:j + 1][::-1].copy()
+                order[i:j + 1] = order[i:j + 1][::-1]; flipped[i:j + 1] = ~flipped[i:j + 1][::-1]
+                improved = True
+            if time.perf_counter() >= deadline: break
+    return order, flipped
+
+def optimize_order(subpaths, origin=(0.0, 0.0), time_limit=TWO_OPT_TIME_LIMIT):
+    """Returns (reordered subpaths, travel before, travel after)."""
+    before = travel_distance(subpaths)
+    if len(subpaths) < 3: return subpaths, before, before
+    tour = [reverse_subpath(subpaths[k]) if reverse else subpaths[k] for k, reverse in _greedy_order(subpaths, origin)]
+    starts = np.array([subpath.start for subpath in tour], dtype=float)
+    ends = np.array([path_end(subpath) for subpath in tour], dtype=float)
+    order, flipped = _two_opt(starts, ends, time_limit)
+    tour = [reverse_subpath(tour[k]) if flip and not tour[k].closed else tour[k] for k, flip in zip(order, flipped)]
+    after = travel_distance(tour)
+    if after > before: return subpaths, before, before # Scan order happened to be better
+    return tour, before, after
@@ -0,0 +1,140 @@
+"""
+The live preview: a persistent worker thread with a latest-wins request slot
+and cooperative cancellation between pipeline stages, and PreviewRenderer, the
+preview's image pipeline without Tk (so benchmarks can run it headless).
+"""
+import contextlib
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from video2svg.edges import find_edges
+from video2svg.engine import ScratchBuffers, adjust_image, detect_edges, multipass_edges
+from video2svg.geometry import FrameTransform
+from video2svg.tracing import count_svg_points, create_tracer
+
+OUTPUT_PREVIEW_SIZE = 210 # Long side of the output (export raster) preview
+
+class PreviewCancelled(Exception):
+    """Raised at a stage checkpoint when a newer request has superseded the running one."""
+
+class StageTimer:
+    """Times named pipeline stages; every stage start is also a cancellation checkpoint."""
+    def __init__(self, is_cancelled=lambda: False):
+        self._is_cancelled = is_cancelled
+        self.timings = {} # Stage name -> seconds, in execution order
+
+    def checkpoint(self):
+        if self._is_cancelled(): raise PreviewCancelled()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.checkpoint()
+        t0 = time.perf_counter()
+        yield
+        self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - t0
+
+    def summary(self):
+        return " | ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.timings.items())
+
+class LatestWinsWorker:
+    """
+    One persistent background thread with a single request slot. submit() replaces
+    any request that has not started yet and marks the running one as superseded;
+    the running handler stops at its next StageTimer checkpoint, so the worker
+    always converges on the newest request without finishing stale work.
+    handler(request, stages) runs on the worker thread.
+    """
+    def __init__(self, handler, name="preview-worker"):
+        self._handler = handler
+        self._cond = threading.Condition()
+        self._pending = None
+        self._generation = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, request):
+        with self._cond:
+            self._pending = request
+            self._generation += 1
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed: self._cond.wait()
+                if self._closed: return
+                request, self._pending = self._pending, None
+                generation = self._generation
+
+            stages = StageTimer(lambda: self._generation != generation)
+            try:
+                self._handler(request, stages)
+            except PreviewCancelled:
+                pass
+            except Exception as e:
+                print(f"Error in preview thread: {e}")
+
+class PreviewRenderer:
+    """
+    Renders one preview request: the main preview's edges, the output preview
+    (framed like the export raster) and a traced point estimate. Keeps its
+    buffers between calls, so use one per thread.
+    """
+    def __init__(self, output_size=OUTPUT_PREVIEW_SIZE):
+        self.output_size = output_size
+        self._output_buffer = None # (transform, canvas) the output preview is framed into
+        self._scratch = ScratchBuffers()
+
+    def render(self, frame, frame_num, settings, preview_size, stages, cache=None):
+        """
+        Returns (main edges, output edges or None, point estimate or "---", preview
+        transform). `cache` (a FrameCache) keeps the resized and adjusted frames,
+        so threshold-only changes skip straight to edge detection.
+        """
+        h, w = frame.shape[:2]
+        transform = FrameTransform.fit((0, 0, w, h), *preview_size)
+        with stages.stage("resize"):
+            # Downscale first so the adjustments only touch preview-sized pixels; the blur radius is scaled to match.
+            resize = lambda: np.ascontiguousarray(transform.apply(frame))
+            small = cache.get_or_compute(('resized', frame_num, transform.size), resize) if cache is not None else resize()
+            adjust = lambda: adjust_image(small, settings.contrast, settings.brightness, settings.pre_blur, transform.scale)
+            adjust_key = ('adjusted', frame_num, settings.contrast, settings.brightness, settings.pre_blur, transform.size)
+            resized = cache.get_or_compute(adjust_key, adjust) if cache is not None else adjust()
+
+        with stages.stage("edges"):
+            main_edges = find_edges(resized, settings)
+            output_edges = self.output_edges(frame, settings)
+
+        with stages.stage("estimate"):
+            # Traced from the same (in multi-pass mode, thinned) edges as the export; the main preview shows them unthinned
+            point_count = self.estimate_points(cv2.bitwise_not(multipass_edges(main_edges, settings)), settings)
+        return main_edges, output_edges, point_count, transform
+
+    def output_edges(self, frame, settings):
+        h, w = frame.shape[:2]
+        # Same placement as the export raster, shrunk to fit the preview canvas
+        out_w, out_h = (settings.output_width, settings.output_height) if settings.output_width > 0 and settings.output_height > 0 else (1, 1)
+        fit = self.output_size / max(out_w, out_h)
+        transform = FrameTransform.for_output(w, h, settings, max(1, round(out_w * fit)), max(1, round(out_h * fit)))
+        if self._output_buffer is None or self._output_buffer[0] != transform:
+            self._output_buffer = (transform, transform.new_canvas(frame)) # Reused until the framing changes
+        scaled = transform.apply(frame, out=self._output_buffer[1])
+        if scaled.size == 0: return None
+        return detect_edges(scaled, settings, transform.scale, self._scratch)
+
+    def estimate_points(self, image_data, settings):
+        try:
+            tracer = create_tracer(settings.tracer, settings.turdsize, settings.opttolerance, settings.alphamax, settings.multipass)
+            return count_svg_points(tracer.trace(image_data, timeout=1))
+        except Exception:
+            return "---"
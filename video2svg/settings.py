@@ -0,0 +1,97 @@
+"""Plain conversion settings shared by the GUI, the headless CLI and the worker processes."""
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from video2svg.decode import DECODER_AUTO
+from video2svg.edges import EDGE_CANNY
+from video2svg.outputs import FORMAT_SVG
+from video2svg.tracing import TRACER_POTRACE
+
+SCALE_MODES = ("Fit", "Fill", "Stretch")
+DEDUP_LINK = "link"
+DEDUP_COPY = "copy"
+DEDUP_MODES = (DEDUP_LINK, DEDUP_COPY)
+
+def parse_output_size(value):
+    """Parses an export raster size, "WIDTHxHEIGHT" or "native" (returned as (0, 0)). Raises ValueError."""
+    value = str(value).strip().lower()
+    if value in ("native", "0", "0x0"): return (0, 0)
+    width, height = (int(v) for v in value.split('x'))
+    if width <= 0 or height <= 0: raise ValueError(f"Invalid output size: {value!r}")
+    return (width, height)
+
+@dataclass
+class ConversionSettings:
+    """
+    Every knob of the frame -> SVG pipeline. Mirrors the GUI controls, but holds
+    plain values so it can be pickled to worker processes and built without Tk.
+    """
+    # Framing
+    zoom: float = 1.0
+    x_offset: float = 0.0 # -100..100, percent of the available pan range
+    y_offset: float = 0.0
+    crop: Optional[Tuple[int, int, int, int]] = None # (x1, y1, x2, y2) in source pixels; overrides pan/zoom
+    square: bool = True # Force a 1:1 center crop
+    scale_mode: str = "Fill"
+    output_width: int = 512 # Export raster the framed picture is scaled into (using scale_mode) before edge detection
+    output_height: int = 512 # 0 x 0 = no fixed raster: trace the framed source at working_resolution
+    working_resolution: int = 1024 # Max long side (px) frames are downscaled to before adjustments; 0 = native
+
+    # Image adjustments and edge detection
+    brightness: int = 0
+    contrast: float = 1.0
+    pre_blur: int = 0
+    edge_detector: str = EDGE_CANNY # See video2svg.edges
+    threshold1: int = 50
+    threshold2: int = 150
+    adaptive_block: int = 15 # Neighbourhood (px, odd) the adaptive detector compares each pixel against
+    adaptive_offset: int = 15 # How much darker than that neighbourhood a pixel must be to count as a line
+
+    # Laser optimization / tracing
+    multipass: bool = False
+    stroke_color: str = "#000000"
+    tracer: str = TRACER_POTRACE
+    turdsize: int = 2
+    opttolerance: float = 0.2
+    alphamax: float = 1.0
+    point_budget: int = 0 # Max points per frame; over-budget frames get coarser parameters. 0 = off
+    svg_compact: bool = False # Rewrite the traced paths without potrace's preamble and transform (see video2svg.svgpath)
+    svg_precision: int = 1 # Decimals kept for coordinates in compact SVGs
+    optimize_paths: bool = False # Reorder / reverse paths to minimize blanked travel; implies compact SVGs
+    temporal: bool = False # Keep path order and start points stable from frame to frame; implies compact SVGs (see video2svg.temporal)
+
+    # Export
+    frame_step: int = 1
+    jobs: int = max(1, (os.cpu_count() or 2) - 1)
+    incremental: bool = False # Skip or just restyle frames whose SVG is already up to date
+    dedup: bool = False # Reuse the previous SVG when a frame's edges barely changed
+    dedup_tolerance: int = 0 # Max differing edge pixels that still count as a duplicate
+    dedup_mode: str = DEDUP_LINK # Hard link (falls back to a copy) or always copy
+    output_format: str = FORMAT_SVG # svg (one file per frame), zip or ilda (one streamed file); see video2svg.outputs
+    ilda_point_spacing: float = 4.0 # Max distance between ILDA points, in output raster pixels
+    decoder: str = DECODER_AUTO # Video decoding backend, see video2svg.decode
+    run_report: bool = False # Write per-stage timings to video2svg_run.json / .csv (see video2svg.metrics)
+
+    @classmethod
+    def from_dict(cls, values):
+        """
+        Builds settings from a JSON object or CSV row. String values are coerced to
+        the field's type (CSV cells are always strings); unknown keys are rejected
+        so typos in job manifests fail loudly instead of being silently ignored.
+        """
+        defaults = cls()
+        kwargs = {}
+        for name, value in values.items():
+            if not hasattr(defaults, name): raise ValueError(f"Unknown setting: {name}")
+            if value is None or value == "": continue
+            if name == 'crop':
+                if isinstance(value, str): value = value.split(',')
+                value = tuple(int(v) for v in value)
+            elif isinstance(value, str):
+                default = getattr(defaults, name)
+                if isinstance(default, bool): value = value.strip().lower() in ("1", "true", "yes", "on")
+                elif isinstance(default, int): value = int(float(value))
+                elif isinstance(default, float): value = float(value)
+            kwargs[name] = value
+        return cls(**kwargs)
@@ -0,0 +1,103 @@
+"""
+Centerline (multi-pass) tracing. Canny edges are merged where they run within a
+pixel or two of each other and thinned to a one-pixel skeleton, with
+cv2.ximgproc.thinning when opencv-contrib is installed and a vectorized NumPy
+Zhang-Suen pass otherwise. skeleton_polylines() then walks the skeleton into open
+polylines (closed where it forms a loop), so every line is drawn once instead of
+as the doubled outline potrace traces around it.
+"""
+import cv2
+import numpy as np
+
+_ximgproc = getattr(cv2, "ximgproc", None)
+
+# Neighbour offsets (dy, dx) clockwise from north: P2..P9 in Zhang & Suen's notation
+_NEIGHBOURS = ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1))
+
+def zhang_suen_thinning(image):
+    """Thins a binary image (non-zero = foreground) to a one-pixel skeleton; returns 0/255 uint8."""
+    result = np.zeros(image.shape, dtype=np.uint8)
+    ys, xs = np.nonzero(image)
+    if len(ys) == 0: return result
+    y0, y1, x0, x1 = ys.min(), ys.max() + 1, xs.min(), xs.max() + 1
+    P = np.pad((image[y0:y1, x0:x1] > 0).astype(np.uint8), 1) # Only the bounding box, with a background border
+    h, w = y1 - y0, x1 - x0
+    changed = True
+    while changed:
+        changed = False
+        for step in (0, 1):
+            p = [P[1 + dy:1 + dy + h, 1 + dx:1 + dx + w] for dy, dx in _NEIGHBOURS]
+            count = sum(p, np.zeros((h, w), dtype=np.uint8))
+            transitions = sum(((p[k] == 0) & (p[(k + 1) % 8] == 1)).view(np.uint8) for k in range(8))
+            if step == 0: sides = (p[0] & p[2] & p[4]) | (p[2] & p[4] & p[6]) # P2*P4*P6 or P4*P6*P8 set
+            else: sides = (p[0] & p[2] & p[6]) | (p[0] & p[4] & p[6]) # P2*P4*P8 or P2*P6*P8 set
+            remove = (P[1:-1, 1:-1] == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & (sides == 0)
+            if remove.any():
+                P[1:-1, 1:-1][remove] = 0; changed = True
+    result[y0:y1, x0:x1] = P[1:-1, 1:-1] * 255
+    return result
+
+def thin_edges(edges):
+    """Merges near-parallel edges and thins them to a skeleton, with ximgproc when available."""
+    merged = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    if _ximgproc is not None: return _ximgproc.thinning(merged)
+    return zhang_suen_thinning(merged)
+
+def _adjacency(skeleton):
+    """
+    Pixel coordinates and neighbour lists of a skeleton. Diagonal links are only
+    kept where no shared 4-neighbour also connects the pair, so staircase corners
+    don't show up as junctions.
+    """
+    mask = np.pad(skeleton > 0, 1)
+    ys, xs = np.nonzero(mask)
+    ids = np.full(mask.shape, -1, dtype=np.int64)
+    ids[ys, xs] = np.arange(len(ys))
+    neighbours = np.full((len(ys), 8), -1, dtype=np.int64)
+    for k, (dy, dx) in enumerate(_NEIGHBOURS):
+        linked = ids[ys + dy, xs + dx]
+        if dy and dx: linked = np.where(mask[ys + dy, xs] | mask[ys, xs + dx], -1, linked)
+        neighbours[:, k] = linked
+    points = np.stack([xs - 1, ys - 1], axis=1)
+    return points, [row[row >= 0].tolist() for row in neighbours]
+
+def skeleton_polylines(skeleton, min_pixels=0):
+    """
+    Splits a one-pixel skeleton into polylines running between end points and
+    junctions. Returns [(points (N, 2) int array of x, y, closed)], dropping lines
+    of min_pixels pixels or fewer.
+    """
+    points, adjacent = _adjacency(skeleton)
+    visited = np.zeros(len(points), dtype=bool)
+    polylines, walked = [], set()
+
+    def walk(start, first):
+        chain, previous, current = [start], start, first
+        while len(adjacent[current]) == 2 and not visited[current]:
+            visited[current] = True; chain.append(current)
+            a, b = adjacent[current]
+            previous, current = current, (b if a == previous else a)
+        chain.append(current)
+        return chain
+
+    nodes = [i for i, linked in enumerate(adjacent) if len(linked) != 2]
+    for node in nodes:
+        visited[node] = True
+        if not adjacent[node]: polylines.append([node]) # Isolated dot
+        for first in adjacent[node]:
+            if visited[first] and len(adjacent[first]) == 2: continue # Chain already walked from its other end
+            if len(adjacent[first]) != 2:
+                if (min(node, first), max(node, first)) in walked: continue
+                walked.add((min(node, first), max(node, first)))
+            polylines.append(walk(node, first))
+    for start in np.flatnonzero(~visited): # What is left are closed loops
+        if visited[start]: continue
+        visited[start] = True
+        polylines.append(walk(start, adjacent[start][0]))
+
+    result = []
+    for chain in polylines:
+        if len(chain) - (chain[0] == chain[-1] and len(chain) > 1) <= min_pixels: continue
+        closed = len(chain) > 2 and chain[0] == chain[-1]
+        result.append((points[chain[:-1] if closed else chain], closed))
+    return result
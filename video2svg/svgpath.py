@@ -0,0 +1,156 @@
+"""
+In-memory post-processing of traced SVGs. style_svg() colors a tracer's
+document with a single substitution on its group. In compact mode the path data
+is parsed instead (with potrace's translate/scale group transform applied) and
+re-emitted as one absolute, rounded path without the XML declaration, metadata
+and transform preamble, optionally reordered to minimize blanked travel (see
+video2svg.pathorder). The parsed subpaths are also what the ILDA writer flattens.
+"""
+import re
+from typing import List, NamedTuple, Tuple
+
+from video2svg.pathorder import optimize_order
+
+Point = Tuple[float, float]
+
+class Subpath(NamedTuple):
+    """One moveto and its segments, ('L', end) or ('C', control1, control2, end), in absolute viewBox units."""
+    start: Point
+    segments: List[tuple]
+    closed: bool
+
+_VIEWBOX = re.compile(r'viewBox="\s*([-\d.]+)[\s,]+([-\d.]+)[\s,]+([-\d.]+)[\s,]+([-\d.]+)\s*"')
+_GROUP_TRANSFORM = re.compile(r'<g[^>]*\stransform="([^"]*)"')
+_PATH_DATA = re.compile(r'<path[^>]*\sd="([^"]*)"')
+_PATH_TOKEN = re.compile(r'[A-Za-z]|-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_PATH_COMMANDS = "MmLlCcHhVvZz" # What tracers emit; S, Q, T and A are not supported
+_GROUP_STYLE = re.compile(r'(<g\b[^>]*?)\sfill="[^"]*"\s+stroke="[^"]*"')
+_STROKE = re.compile(r'(<(?:g|path)\b[^>]*?\sstroke=")[^"]*"')
+
+def style_svg(content, color_hex):
+    """Strokes every path of a tracer's SVG in color_hex, unfilled, by restyling the enclosing group once."""
+    content, n = _GROUP_STYLE.subn(rf'\1 fill="none" stroke="{color_hex}"', content, count=1)
+    if n: return content
+    return content.replace('<path', f'<path stroke="{color_hex}" fill="none"') # No styled group: style each path
+
+def restyle_svg(content, color_hex):
+    """Swaps the stroke color style_svg (or compact_svg) applied, without re-tracing."""
+    return _STROKE.sub(rf'\g<1>{color_hex}"', content)
+
+def _group_transform(svg_content):
+    """The translate(...) scale(...) potrace puts on its <g>, as (sx, sy, tx, ty); identity when absent."""
+    match = _GROUP_TRANSFORM.search(svg_content)
+    if not match: return 1.0, 1.0, 0.0, 0.0
+    transform = match.group(1)
+    translate = re.search(r'translate\(\s*([-\d.eE]+)[\s,]*([-\d.eE]+)?\s*\)', transform)
+    scale = re.search(r'scale\(\s*([-\d.eE]+)[\s,]*([-\d.eE]+)?\s*\)', transform)
+    tx, ty = (float(translate.group(1)), float(translate.group(2) or 0)) if translate else (0.0, 0.0)
+    sx = float(scale.group(1)) if scale else 1.0
+    sy = float(scale.group(2) or sx) if scale else 1.0
+    return sx, sy, tx, ty
+
+def _parse_subpaths(path_data, transform):
+    """
+    Splits one path's data into Subpaths, resolving relative and implicit commands.
+    Raises ValueError for commands outside _PATH_COMMANDS and numbers after a closepath.
+    """
+    sx, sy, tx, ty = transform
+    apply = lambda p: (p[0] * sx + tx, p[1] * sy + ty)
+    tokens = _PATH_TOKEN.findall(path_data)
+    subpaths, segments = [], None
+    command, i = None, 0
+    current = start = (0.0, 0.0) # Untransformed, as relative commands are relative to these
+    def number():
+        nonlocal i
+        i += 1
+        return float(tokens[i - 1])
+    while i < len(tokens):
+        if tokens[i].isalpha():
+            command = tokens[i]; i += 1
+            if command not in _PATH_COMMANDS: raise ValueError(f"Unsupported path command: {command}")
+            if command in "Zz":
+                if segments is not None: subpaths.append(Subpath(apply(start), segments, True)); segments = None
+                current = start
+                continue
+        if command is None:
+            i += 1; continue # Numbers before the first command
+        if command in "Zz": raise ValueError(f"Number after closepath in path data: {tokens[i]}")
+        relative = command.islower()
+        base = current if relative else (0.0, 0.0)
+        op = command.upper()
+        if op != 'M' and segments is None: segments = [] # Drawing on after a closepath starts a new subpath at its start point
+        if op == 'M':
+            if segments: subpaths.append(Subpath(apply(start), segments, False))
+            current = start = (base[0] + number(), base[1] + number())
+            segments = []
+            command = 'l' if relative else 'L' # Further pairs are implicit linetos
+        elif op == 'L':
+            current = (base[0] + number(), base[1] + number()); segments.append(('L', apply(current)))
+        elif op == 'H':
+            current = ((current[0] if relative else 0.0) + number(), current[1]); segments.append(('L', apply(current)))
+        elif op == 'V':
+            current = (current[0], (current[1] if relative else 0.0) + number()); segments.append(('L', apply(current)))
+        elif op == 'C':
+            c1 = (base[0] + number(), base[1] + number())
+            c2 = (base[0] + number(), base[1] + number())
+            current = (base[0] + number(), base[1] + number())
+            segments.append(('C', apply(c1), apply(c2), apply(current)))
+    if segments: subpaths.append(Subpath(apply(start), segments, False))
+    return subpaths
+
+def parse_svg_paths(svg_content):
+    """Returns (width, height, subpaths) of a traced SVG, in viewBox units with any group transform applied."""
+    match = _VIEWBOX.search(svg_content)
+    width, height = (float(match.group(3)), float(match.group(4))) if match else (1.0, 1.0)
+    transform = _group_transform(svg_content)
+    subpaths = []
+    for path_data in _PATH_DATA.findall(svg_content): subpaths.extend(_parse_subpaths(path_data, transform))
+    return width, height, subpaths
+
+def _number(value, precision):
+    text = f"{value:.{precision}f}"
+    if precision > 0: text = text.rstrip('0').rstrip('.')
+    return "0" if text == "-0" else text
+
+def path_data(subpaths, precision=1):
+    """Absolute path data for subpaths, coordinates rounded to `precision` decimals, commands only where they change."""
+    fmt = lambda p: f"{_number(p[0], precision)} {_number(p[1], precision)}"
+    parts = []
+    for subpath in subpaths:
+        parts.append("M" + fmt(subpath.start))
+        command = None
+        for segment in subpath.segments:
+            points = ' '.join(fmt(p) for p in segment[1:])
+            parts.append(points if segment[0] == command else segment[0] + points)
+            command = segment[0]
+        if subpath.closed: parts.append("Z")
+    return ' '.join(parts)
+
+def compact_svg(width, height, subpaths, color_hex, precision=1):
+    """A minimal SVG document: one stroked path, no XML declaration, metadata or transform."""
+    w, h = _number(width, precision), _number(height, precision)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">'
+            f'<path fill="none" stroke="{color_hex}" d="{path_data(subpaths, precision)}"/></svg>\n')
+
+def ordered_paths(svg_content, settings):
+    """
+    Parses a tracer's SVG and, with settings.optimize_paths, reorders its paths.
+    Returns (width, height, subpaths, travel), travel being the blanked travel
+    (before, after) when paths were reordered.
+    """
+    width, height, subpaths = parse_svg_paths(svg_content)
+    travel = None
+    if settings.optimize_paths:
+        subpaths, before, after = optimize_order(subpaths)
+        travel = (before, after)
+    return width, height, subpaths, travel
+
+def finish_svg(svg_content, settings):
+    """
+    The post-trace stage: styles the tracer output, or rewrites it compactly when
+    settings.svg_compact or settings.optimize_paths is set. Returns (svg, travel)
+    as for ordered_paths.
+    """
+    if not (settings.svg_compact or settings.optimize_paths): return style_svg(svg_content, settings.stroke_color), None
+    width, height, subpaths, travel = ordered_paths(svg_content, settings)
+    return compact_svg(width, height, subpaths, settings.stroke_color, settings.svg_precision), travel
@@ -0,0 +1,72 @@
+"""
+Temporal coherence for laser output. Each frame is traced on its own, so the
+order paths are drawn in and where closed paths start jump around from frame to
+frame, which shows as shimmer on a projector. A TemporalAligner, fed the frames
+of a sequence in order, matches each path to the previous frame's path with the
+nearest centroid (through a grid index) and then draws matched paths in the
+previous frame's order, starting at the point nearest to where their match
+started and running the same way round. Paths without a match follow, in their
+traced (or travel-optimized) order.
+"""
+import math
+
+from video2svg.pathorder import PointGrid, path_end, reverse_subpath
+
+MATCH_RADIUS = 0.04 # Max centroid distance for a match, as a fraction of the raster's longer side
+
+def _vertices(subpath):
+    return [subpath.start] + [segment[-1] for segment in subpath.segments]
+
+def centroid(subpath):
+    """Mean of a path's vertices (segment end points)."""
+    points = _vertices(subpath)
+    return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+def _signed_area(points):
+    return sum(a[0] * b[1] - b[0] * a[1] for a, b in zip(points, points[1:] + points[:1])) / 2
+
+def rotate_closed(subpath, k):
+    """A closed path redrawn from its k-th vertex; the implicit closing line is made explicit first."""
+    segments = list(subpath.segments)
+    if segments and segments[-1][-1] != subpath.start: segments.append(('L', subpath.start))
+    if not segments or k % len(segments) == 0: return subpath
+    k %= len(segments)
+    return subpath._replace(start=segments[k - 1][-1], segments=segments[k:] + segments[:k])
+
+def align_start(subpath, reference):
+    """Orients subpath like reference: same direction round, starting at the vertex nearest reference's start."""
+    target = reference.start
+    if not subpath.closed:
+        return reverse_subpath(subpath) if math.dist(path_end(subpath), target) < math.dist(subpath.start, target) else subpath
+    if not subpath.segments: return subpath
+    if reference.closed and (_signed_area(_vertices(subpath)) > 0) != (_signed_area(_vertices(reference)) > 0):
+        subpath = reverse_subpath(subpath)
+    points = _vertices(subpath)
+    k = min(range(len(points)), key=lambda i: math.dist(points[i], target))
+    return rotate_closed(subpath, k)
+
+class TemporalAligner:
+    """Aligns each frame's subpaths with the previous frame's; call align() in frame order."""
+    def __init__(self):
+        self.reference = None
+
+    def align(self, subpaths, width, height):
+        """Returns (aligned subpaths, number of paths matched to the previous frame)."""
+        reference, self.reference = self.reference, subpaths
+        if not reference or not subpaths: return subpaths, 0
+        radius = max(1.0, MATCH_RADIUS * max(width, height))
+        grid = PointGrid([centroid(subpath) for subpath in reference], radius)
+
+        matched, unmatched = [], []
+        # Long paths claim their match first, so a small new path can't steal a big shape's predecessor
+        for k in sorted(range(len(subpaths)), key=lambda k: -len(subpaths[k].segments)):
+            c = centroid(subpaths[k])
+            i = grid.nearest(*c)
+            if i is not None and math.dist(grid.points[i], c) <= radius:
+                grid.remove(i)
+                matched.append((i, align_start(subpaths[k], reference[i])))
+            else:
+                unmatched.append((k, subpaths[k]))
+        matched.sort(key=lambda m: m[0]); unmatched.sort(key=lambda m: m[0])
+        self.reference = [subpath for _, subpath in matched] + [subpath for _, subpath in unmatched]
+        return self.reference, len(matched)
@@ -0,0 +1,151 @@
+"""
+Vector tracing backends. Each tracer turns an inverted edge bitmap (black lines
+on a white background, uint8, single channel) into an SVG document.
+"""
+import re
+import subprocess
+
+import cv2
+import numpy as np
+
+try:
+    import potrace as potrace_bindings # pypotrace
+except ImportError:
+    potrace_bindings = None
+
+from video2svg.metrics import stage
+from video2svg.skeleton import skeleton_polylines
+
+TRACER_POTRACE = "potrace"
+TRACER_INPROCESS = "in-process"
+TRACER_CHOICES = (TRACER_POTRACE, TRACER_INPROCESS)
+
+_PATH_DATA = re.compile(r'<path[^>]*\sd="([^"]*)"')
+_PATH_COMMAND = re.compile(r'([MmLlCcSsQqTtHhVvAaZz])([^MmLlCcSsQqTtHhVvAaZz]*)')
+_PATH_NUMBER = re.compile(r'-?(?:\d+\.?\d*|\.\d+)')
+_COMMAND_ARITY = {'m': 2, 'l': 2, 't': 2, 'h': 1, 'v': 1, 's': 4, 'q': 4, 'c': 6, 'a': 7}
+
+def count_svg_points(svg_content):
+    """
+    The point count shown in the UI and used for the laser point budget: the
+    number of segment end points in all path data. potrace repeats commands
+    implicitly ("c x1 y1 x2 y2 x y x1 ..."), so every coordinate group counts.
+    """
+    points = 0
+    for path_data in _PATH_DATA.findall(svg_content):
+        for command, args in _PATH_COMMAND.findall(path_data):
+            arity = _COMMAND_ARITY.get(command.lower())
+            if arity: points += len(_PATH_NUMBER.findall(args)) // arity
+    return points
+
+def count_svg_paths(svg_content):
+    """Number of subpaths (moveto commands) in the SVG."""
+    return len(re.findall(r'[Mm]', svg_content))
+
+def is_potrace_installed():
+    try:
+        subprocess.run(['potrace', '--version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+
+def _svg_document(width, height, path_data):
+    return (
+        '<?xml version="1.0" standalone="no"?>\n'
+        f'<svg version="1.0" xmlns="http://www.w3.org/2000/svg" width="{width}pt" height="{height}pt" viewBox="0 0 {width} {height}" preserveAspectRatio="xMidYMid meet">\n'
+        '<g fill="#000000" stroke="none">\n'
+        + ''.join(f'<path d="{d}"/>\n' for d in path_data) +
+        '</g>\n</svg>\n'
+    )
+
+class Tracer:
+    """Base class for tracing backends, configured with the potrace-style laser settings."""
+    name = None
+
+    def __init__(self, turdsize=2, opttolerance=0.2, alphamax=1.0):
+        self.turdsize = turdsize
+        self.opttolerance = opttolerance
+        self.alphamax = alphamax
+
+    def trace(self, bitmap, timeout=None):
+        raise NotImplementedError
+
+class PotraceCLITracer(Tracer):
+    """Pipes the bitmap to the potrace command-line tool and reads the SVG from stdout."""
+    name = "potrace"
+
+    def trace(self, bitmap, timeout=None):
+        command = ['potrace', '-', '-s', '--turdsize', str(self.turdsize), '--opttolerance', str(self.opttolerance), '--alphamax', str(self.alphamax)]
+        with stage("trace.encode"): bmp = cv2.imencode('.bmp', bitmap)[1].tobytes()
+        with stage("trace.potrace"): proc = subprocess.run(command, input=bmp, capture_output=True, check=True, timeout=timeout)
+        return proc.stdout.decode('utf-8')
+
+class PypotraceTracer(Tracer):
+    """Traces in-process with the pypotrace bindings, producing the same curves as the CLI."""
+    name = "pypotrace"
+
+    def trace(self, bitmap, timeout=None):
+        path = potrace_bindings.Bitmap(bitmap < 128).trace(turdsize=self.turdsize, alphamax=self.alphamax, opticurve=1, opttolerance=self.opttolerance)
+        path_data = []
+        for curve in path:
+            d = [f"M{curve.start_point[0]:.1f} {curve.start_point[1]:.1f}"]
+            for segment in curve:
+                if segment.is_corner:
+                    d.append(f"L{segment.c[0]:.1f} {segment.c[1]:.1f} L{segment.end_point[0]:.1f} {segment.end_point[1]:.1f}")
+                else:
+                    d.append(f"C{segment.c1[0]:.1f} {segment.c1[1]:.1f} {segment.c2[0]:.1f} {segment.c2[1]:.1f} {segment.end_point[0]:.1f} {segment.end_point[1]:.1f}")
+            path_data.append(' '.join(d) + 'z')
+        return _svg_document(bitmap.shape[1], bitmap.shape[0], path_data)
+
+class ContourTracer(Tracer):
+    """
+    Pure OpenCV fallback: cv2.findContours plus Douglas-Peucker simplification.
+    Produces straight polylines instead of Bezier curves, so alphamax is ignored;
+    opttolerance widens the simplification tolerance.
+    """
+    name = "contours"
+
+    def trace(self, bitmap, timeout=None):
+        foreground = np.where(bitmap < 128, 255, 0).astype(np.uint8)
+        contours, _ = cv2.findContours(foreground, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        epsilon = 0.5 + self.opttolerance
+        path_data = []
+        for contour in contours:
+            # Approximate pixel count of the blob, matching potrace's --turdsize meaning.
+            if cv2.contourArea(contour) + cv2.arcLength(contour, True) / 2 <= self.turdsize: continue
+            points = cv2.approxPolyDP(contour, epsilon, True).reshape(-1, 2)
+            if len(points) < 2: continue
+            path_data.append(f"M{points[0][0]} {points[0][1]} " + ' '.join(f"L{x} {y}" for x, y in points[1:]) + 'z')
+        return _svg_document(bitmap.shape[1], bitmap.shape[0], path_data)
+
+class CenterlineTracer(Tracer):
+    """
+    Traces a thinned bitmap along its skeleton as single-stroke polylines (see
+    video2svg.skeleton). turdsize drops lines of that many pixels or fewer,
+    opttolerance widens the simplification tolerance; alphamax is ignored.
+    """
+    name = "centerline"
+
+    def trace(self, bitmap, timeout=None):
+        epsilon = 0.5 + self.opttolerance
+        path_data = []
+        for points, closed in skeleton_polylines(bitmap < 128, self.turdsize):
+            if len(points) < 2: continue
+            points = cv2.approxPolyDP(points.reshape(-1, 1, 2).astype(np.int32), epsilon, closed).reshape(-1, 2)
+            path_data.append(f"M{points[0][0]} {points[0][1]} " + ' '.join(f"L{x} {y}" for x, y in points[1:]) + ('z' if closed else ''))
+        return _svg_document(bitmap.shape[1], bitmap.shape[0], path_data)
+
+def create_tracer(backend=TRACER_POTRACE, turdsize=2, opttolerance=0.2, alphamax=1.0, centerline=False):
+    """
+    Builds a tracer for a TRACER_CHOICES entry; in-process prefers pypotrace when
+    it is installed. centerline (multi-pass mode) overrides the backend.
+    """
+    if centerline:
+        tracer_class = CenterlineTracer
+    elif backend == TRACER_POTRACE:
+        tracer_class = PotraceCLITracer
+    elif backend == TRACER_INPROCESS:
+        tracer_class = PypotraceTracer if potrace_bindings is not None else ContourTracer
+    else:
+        raise ValueError(f"Unknown tracer backend: {backend}")
+    return tracer_class(turdsize, opttolerance, alphamax)